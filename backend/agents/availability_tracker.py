@@ -3,7 +3,7 @@ from datetime import datetime, timedelta
 from .base_agent import BaseAgent
 from models import Availability, AvailabilityStatus
 from database import get_database
-from ml_classifier import MLTextClassifier
+from ml_classifier import get_ml_classifier
 
 class AvailabilityTrackerAgent(BaseAgent):
     """Agent responsible for tracking and managing volunteer availability"""
@@ -11,7 +11,7 @@ class AvailabilityTrackerAgent(BaseAgent):
     def __init__(self):
         super().__init__("AvailabilityTracker")
         self.db = None
-        self.ml_classifier = MLTextClassifier()
+        self.ml_classifier = get_ml_classifier()
     
     async def _ensure_db_connection(self):
         if self.db is None:
@@ -26,16 +26,15 @@ class AvailabilityTrackerAgent(BaseAgent):
             # volunteer_id is already a string, no conversion needed
             
             # Validate and convert availability data
-            validated_availability = []
-            for av_data in availability_data:
-                availability = self._validate_availability(av_data)
-                if availability:
-                    validated_availability.append(availability)
+            validated_availability = self.validate_slots(availability_data)
             
             # Update volunteer profile with new availability
             result = await self.db.volunteer_profiles.update_one(
                 {"volunteer_id": volunteer_id},
-                {"$set": {"availability": [av.dict() for av in validated_availability]}}
+                {"$set": {
+                    "availability": [av.dict() for av in validated_availability],
+                    "updated_at": datetime.utcnow()
+                }}
             )
             
             if result.modified_count > 0:
@@ -58,6 +57,15 @@ class AvailabilityTrackerAgent(BaseAgent):
                 "message": f"Error: {str(e)}"
             }
     
+    def validate_slots(self, availability_data: List[Dict]) -> List[Availability]:
+        """Valid availability slots of ``availability_data``; invalid ones are dropped"""
+        validated_availability = []
+        for av_data in availability_data:
+            availability = self._validate_availability(av_data)
+            if availability:
+                validated_availability.append(availability)
+        return validated_availability
+    
     def _validate_availability(self, av_data: Dict) -> Availability:
         """Validate and create Availability object"""
         try:
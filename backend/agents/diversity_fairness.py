@@ -3,7 +3,7 @@ import logging
 from datetime import datetime, timedelta
 from .base_agent import BaseAgent
 from database import get_database
-from ml_classifier import MLTextClassifier
+from ml_classifier import get_ml_classifier
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +13,12 @@ class DiversityFairnessAgent(BaseAgent):
     def __init__(self):
         super().__init__("Diversity & Fairness Agent")
         self.agent_name = "Diversity & Fairness Agent"
-        self.ml_classifier = MLTextClassifier()
+        self.ml_classifier = get_ml_classifier()
+        self.db = None
+    
+    async def _ensure_db_connection(self):
+        if self.db is None:
+            self.db = get_database()
     
     async def process(self, job_id: str, candidate_matches: List[Dict]) -> Dict[str, Any]:
         """Apply diversity and fairness filters to candidate matches"""
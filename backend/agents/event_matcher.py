@@ -2,8 +2,26 @@ from typing import Dict, List, Any
 from .base_agent import BaseAgent
 from models import VolunteerProfile, VolunteerJob, JobMatch
 from database import get_database
+from config import MATCH_BATCH_SIZE
+from bson import ObjectId
+from match_index import (
+    job_index, volunteer_index, VolunteerSnapshot, JobCatalogue,
+    location_score_table, time_commitment_text, job_interest_text, job_skill_ids, profile_skill_ids
+)
+import numpy as np
+from scipy import sparse
+import heapq
 import math
 
+# Job fields the match scoring reads
+MATCH_PROJECTION = {
+    'title': 1, 'description': 1, 'organization': 1,
+    'location': 1, 'skills_required': 1, 'skill_ids_required': 1, 'time_commitment': 1
+}
+
+# Weight of each component in the total match score
+MATCH_WEIGHTS = {'skill_score': 0.4, 'location_score': 0.25, 'availability_score': 0.2, 'interest_score': 0.15}
+
 class EventMatcherAgent(BaseAgent):
     """Agent responsible for matching volunteers with job opportunities"""
     
@@ -15,7 +33,7 @@ class EventMatcherAgent(BaseAgent):
         if self.db is None:
             self.db = get_database()
     
-    async def process(self, volunteer_id) -> Dict[str, Any]:
+    async def process(self, volunteer_id, top_k: int = 20, batch_size: int = MATCH_BATCH_SIZE) -> Dict[str, Any]:
         """Find matching jobs for a volunteer"""
         try:
             await self._ensure_db_connection()
@@ -28,73 +46,210 @@ class EventMatcherAgent(BaseAgent):
             if not volunteer:
                 return {"matches": [], "total": 0}
             
-            # Get all available jobs
-            jobs_cursor = self.db.volunteer_jobs.find({})
-            jobs = await jobs_cursor.to_list(length=None)
+            await job_index.ensure_fresh(self.db)
+            # Every batch is scored in the TF-IDF space of one index snapshot, even if the index is rebuilt meanwhile
+            snapshot = job_index.snapshot
+            volunteers = VolunteerSnapshot([volunteer], self._calculate_availability_match, snapshot)
             
-            matches = []
-            for job in jobs:
-                match_score = await self._calculate_match_score(volunteer, job)
-                if match_score['total_score'] > 0.1:  # Lower threshold
-                    # Convert ObjectId to string for JSON serialization
-                    job['_id'] = str(job['_id'])
-                    matches.append({
-                        'job': job,
-                        'match_score': match_score['total_score'],
-                        'skill_match': match_score['skill_score'],
-                        'location_match': match_score['location_score'],
-                        'availability_match': match_score['availability_score'],
-                        'interest_match': match_score['interest_score'],
-                        'reasons': match_score['reasons']
-                    })
+            # Stream jobs in batches, keeping only the best top_k scores in a min-heap
+            top_matches = []
+            total_matches = 0
+            jobs_scanned = 0
+            batch = []
+            jobs_cursor = self.db.volunteer_jobs.find({}, MATCH_PROJECTION).batch_size(batch_size)
+            async for job in jobs_cursor:
+                batch.append(job)
+                if len(batch) >= batch_size:
+                    total_matches += self._score_batch(volunteers, JobCatalogue(batch, snapshot), jobs_scanned,
+                                                       top_matches, top_k)
+                    jobs_scanned += len(batch)
+                    batch = []
+            if batch:
+                total_matches += self._score_batch(volunteers, JobCatalogue(batch, snapshot), jobs_scanned,
+                                                   top_matches, top_k)
+                jobs_scanned += len(batch)
             
-            # Sort by match score
-            matches.sort(key=lambda x: x['match_score'], reverse=True)
+            # Sort by match score, earlier jobs first on ties
+            top_matches.sort(key=lambda entry: (-entry[0], -entry[1]))
             
-            self.log_info(f"Found {len(matches)} matches out of {len(jobs)} jobs for volunteer")
+            # Fetch the full documents of the selected jobs only
+            job_ids = [entry[2] for entry in top_matches]
+            jobs_cursor = self.db.volunteer_jobs.find({"_id": {"$in": job_ids}}, {"search_tokens": 0})
+            jobs_by_id = {job['_id']: job for job in await jobs_cursor.to_list(length=len(job_ids))}
+            
+            matches = []
+            for _, _, job_id, components in top_matches:
+                job = jobs_by_id.get(job_id)
+                if job is None:
+                    continue  # Deleted while matching
+                # Convert ObjectId to string for JSON serialization
+                job['_id'] = str(job['_id'])
+                matches.append({'job': job, **self._build_match(components)})
+            
+            self.log_info(f"Found {total_matches} matches out of {jobs_scanned} jobs for volunteer")
             self.log_info(f"Volunteer has {len(volunteer.get('skills', []))} skills")
-            return {"matches": matches[:20], "total": len(matches)}  # Top 20 matches
+            return {"matches": matches, "total": total_matches}
             
         except Exception as e:
             self.log_error(f"Error finding matches: {e}")
             return {"matches": [], "total": 0}
     
-    async def _calculate_match_score(self, volunteer: Dict, job: Dict) -> Dict[str, Any]:
-        """Calculate comprehensive match score between volunteer and job"""
-        
-        # Skill matching (40% weight)
-        skill_score = self._calculate_skill_match(volunteer.get('skills', []), job.get('skills_required', []))
-        
-        # Location matching (25% weight)
-        location_score = self._calculate_location_match(volunteer.get('location'), job.get('location'))
-        
-        # Availability matching (20% weight)
-        availability_score = self._calculate_availability_match(volunteer.get('availability', []), job)
-        
-        # Interest matching (15% weight)
-        interest_score = self._calculate_interest_match(volunteer.get('interests', []), job)
-        
-        # Calculate weighted total
-        total_score = (
-            skill_score * 0.4 +
-            location_score * 0.25 +
-            availability_score * 0.2 +
-            interest_score * 0.15
-        )
-        
-        # Generate reasons
-        reasons = self._generate_match_reasons(skill_score, location_score, availability_score, interest_score)
-        
+    def _score_batch(self, volunteers: VolunteerSnapshot, batch: JobCatalogue, offset: int,
+                     top_matches: List[tuple], top_k: int) -> int:
+        """Score a batch of jobs for one volunteer into the bounded ``top_matches`` heap, returning how many passed the threshold"""
+        scores = {name: values[0] for name, values in self._score_matrix(volunteers, batch).items()}
+        passing = np.flatnonzero(scores['total_score'] > 0.1)  # Lower threshold
+        
+        for i in passing:
+            total_score = float(scores['total_score'][i])
+            # Ties keep the job seen first, like a stable sort of the whole catalogue
+            entry = (total_score, -(offset + int(i)))
+            if len(top_matches) >= top_k and entry <= top_matches[0][:2]:
+                continue
+            components = {name: float(values[i]) for name, values in scores.items()}
+            entry += (batch.job_ids[i], components)
+            if len(top_matches) < top_k:
+                heapq.heappush(top_matches, entry)
+            else:
+                heapq.heapreplace(top_matches, entry)
+        
+        return len(passing)
+    
+    def _build_match(self, scores: Dict[str, float]) -> Dict[str, Any]:
+        """Build the score fields and reasons of a match entry from its component scores"""
         return {
-            'total_score': total_score,
-            'skill_score': skill_score,
-            'location_score': location_score,
-            'availability_score': availability_score,
-            'interest_score': interest_score,
-            'reasons': reasons
+            'match_score': scores['total_score'],
+            'skill_match': scores['skill_score'],
+            'location_match': scores['location_score'],
+            'availability_match': scores['availability_score'],
+            'interest_match': scores['interest_score'],
+            'reasons': self._generate_match_reasons(scores['skill_score'], scores['location_score'],
+                                                    scores['availability_score'], scores['interest_score'])
+        }
+    
+    async def rank_volunteers(self, job_id: str, top_k: int = 50) -> Dict[str, Any]:
+        """Find the best matching volunteers for a job"""
+        try:
+            await self._ensure_db_connection()
+            self.log_info(f"Ranking volunteers for job {job_id}")
+            
+            job = await self.db.volunteer_jobs.find_one({"_id": ObjectId(job_id)})
+            if not job:
+                return {"matches": [], "total": 0}
+            
+            await volunteer_index.ensure_fresh(self.db, self._calculate_availability_match)
+            # One snapshot for scoring and the profile ids, even if the index is rebuilt meanwhile
+            volunteers = volunteer_index.snapshot
+            scores = {name: values[:, 0] for name, values in
+                      self._score_matrix(volunteers, JobCatalogue([job], volunteers.job_snapshot)).items()}
+            
+            # Rank passing volunteers, earlier profiles first on ties
+            passing = np.flatnonzero(scores['total_score'] > 0.1)  # Lower threshold
+            ranked = passing[np.argsort(-scores['total_score'][passing], kind='stable')[:top_k]]
+            
+            # Fetch the selected profiles only
+            profile_ids = [volunteers.profile_ids[i] for i in ranked]
+            profiles_cursor = self.db.volunteer_profiles.find({"_id": {"$in": profile_ids}}, {"cv_text": 0})
+            profiles_by_id = {profile['_id']: profile for profile in await profiles_cursor.to_list(length=len(profile_ids))}
+            
+            matches = []
+            for i in ranked:
+                profile = profiles_by_id.get(volunteers.profile_ids[i])
+                if profile is None:
+                    continue  # Deleted while ranking
+                profile['_id'] = str(profile['_id'])
+                components = {name: float(values[i]) for name, values in scores.items()}
+                matches.append({
+                    'volunteer_id': profile.get('volunteer_id'),
+                    'volunteer': profile,
+                    **self._build_match(components)
+                })
+            
+            self.log_info(f"Found {len(passing)} matching volunteers out of {len(volunteers)} for job")
+            return {"matches": matches, "total": len(passing)}
+            
+        except Exception as e:
+            self.log_error(f"Error ranking volunteers: {e}")
+            return {"matches": [], "total": 0}
+    
+    def _score_matrix(self, volunteers: VolunteerSnapshot, catalogue: JobCatalogue) -> Dict[str, np.ndarray]:
+        """Weighted match scores (see MATCH_WEIGHTS) and their components for every (volunteer, job) pair.
+
+        The one scorer behind matching jobs to a volunteer, ranking volunteers
+        for a job and the batch rematch. Both sides must be built on the same
+        job snapshot; every returned array has shape (len(volunteers), len(catalogue)).
+        """
+        n_volunteers, n_jobs = len(volunteers), len(catalogue)
+        
+        # Skill matching: TF-IDF cosine plus exact share by skill id, as in enhanced_skill_matching
+        semantic = np.zeros((n_volunteers, n_jobs))
+        if volunteers.skill_matrix is not None and catalogue.job_matrix is not None:
+            semantic = (volunteers.skill_matrix @ catalogue.job_matrix.T).toarray()
+        shared = [(column, volunteers.skill_vocabulary[skill])
+                  for skill, column in catalogue.skill_vocabulary.items() if skill in volunteers.skill_vocabulary]
+        projection = sparse.csr_matrix(
+            (np.ones(len(shared)), ([job_column for job_column, _ in shared], [column for _, column in shared])),
+            shape=(len(catalogue.skill_vocabulary), len(volunteers.skill_vocabulary))
+        )
+        exact_matches = (volunteers.exact_matrix @ (catalogue.skill_matrix @ projection).T).toarray()
+        has_requirements = (catalogue.skill_counts > 0)[None, :]
+        exact = np.divide(exact_matches, catalogue.skill_counts[None, :],
+                          out=np.zeros((n_volunteers, n_jobs)), where=has_requirements)
+        skill_scores = np.where(volunteers.has_skills[:, None], np.minimum(semantic * 0.7 + exact * 0.3, 1.0), 0.2)
+        skill_scores = np.where(has_requirements, skill_scores, 0.8)
+        
+        # Location matching, scored once per pair of distinct locations
+        location_table = location_score_table(volunteers.locations, catalogue.locations)
+        location_scores = location_table[volunteers.location_ids[:, None], catalogue.location_ids[None, :]]
+        
+        # Availability matching, pre-scored per distinct availability and time-commitment class
+        availability_scores = volunteers.availability_table[volunteers.availability_ids][:, catalogue.commitment_columns]
+        
+        # Interest matching, one substring scan of the catalogue per distinct interest
+        interest_hits = np.zeros((len(volunteers.interest_vocabulary), n_jobs))
+        for interest, column in volunteers.interest_vocabulary.items():
+            interest_hits[column] = [interest in text for text in catalogue.interest_texts]
+        interest_matches = volunteers.interest_matrix @ interest_hits
+        has_interests = (volunteers.interest_counts > 0)[:, None]
+        interest_scores = np.divide(interest_matches, volunteers.interest_counts[:, None],
+                                    out=np.zeros((n_volunteers, n_jobs)), where=has_interests)
+        interest_scores = np.where(has_interests, np.minimum(interest_scores, 1.0), 0.5)
+        
+        scores = {
+            'skill_score': skill_scores,
+            'location_score': location_scores,
+            'availability_score': availability_scores,
+            'interest_score': interest_scores
         }
+        total_scores = sum(scores[name] * weight for name, weight in MATCH_WEIGHTS.items())
+        # Unreadable profiles fall below every threshold
+        total_scores = np.where(volunteers.valid[:, None], total_scores, 0.0)
+        return {'total_score': total_scores, **scores}
+    
+    def top_matches_block(self, volunteers: List[Dict], catalogue: JobCatalogue, top_n: int) -> List[Dict[str, Any]]:
+        """Best ``top_n`` jobs of the catalogue for each volunteer of a block"""
+        scores = self._score_matrix(VolunteerSnapshot(volunteers, self._calculate_availability_match, catalogue.index),
+                                    catalogue)
+        total_scores = scores['total_score']
+        
+        results = []
+        for row, volunteer in enumerate(volunteers):
+            passing = np.flatnonzero(total_scores[row] > 0.1)  # Lower threshold
+            ranked = passing[np.argsort(-total_scores[row, passing], kind='stable')[:top_n]]
+            matches = []
+            for column in ranked:
+                components = {name: float(values[row, column]) for name, values in scores.items()}
+                matches.append({'job_id': catalogue.job_ids[column], **self._build_match(components)})
+            results.append({
+                'volunteer_id': volunteer['_id'],
+                'matches': matches,
+                'total': len(passing)
+            })
+        
+        return results
     
-    def _calculate_skill_match(self, volunteer_skills: List[Dict], required_skills: List[str]) -> float:
+    def _calculate_skill_match(self, volunteer_skills: List[Dict], required_skills: List[str],
+                               required_skill_ids: List[int] = None) -> float:
         """Calculate skill match score using ML methods"""
         if not required_skills:
             return 0.8  # High score if no specific skills required
@@ -104,29 +259,23 @@ class EventMatcherAgent(BaseAgent):
         
         try:
             # Import ML classifier
-            from ml_classifier import MLTextClassifier
-            ml_classifier = MLTextClassifier()
+            from ml_classifier import get_ml_classifier
+            ml_classifier = get_ml_classifier()
             
             volunteer_skill_names = [skill.get('name', '') for skill in volunteer_skills]
             
             # Use ML-enhanced skill matching
-            ml_score = ml_classifier.enhanced_skill_matching(volunteer_skill_names, required_skills)
+            ml_score = ml_classifier.enhanced_skill_matching(volunteer_skill_names, required_skills,
+                                                             profile_skill_ids(volunteer_skills), required_skill_ids)
             
             return ml_score
             
         except Exception as e:
-            # Fallback to original method if ML fails
-            volunteer_skill_names = [skill.get('name', '').lower() for skill in volunteer_skills]
-            required_skills_lower = [skill.lower() for skill in required_skills]
-            
-            matches = 0
-            for req_skill in required_skills_lower:
-                for vol_skill in volunteer_skill_names:
-                    if (req_skill in vol_skill or vol_skill in req_skill or 
-                        any(word in vol_skill for word in req_skill.split()) or
-                        any(word in req_skill for word in vol_skill.split())):
-                        matches += 1
-                        break
+            # Fallback to exact matching on skill ids if ML fails
+            volunteer_skill_ids = set(profile_skill_ids(volunteer_skills))
+            if required_skill_ids is None:
+                required_skill_ids = job_skill_ids({'skills_required': required_skills})
+            matches = sum(1 for skill in required_skill_ids if skill in volunteer_skill_ids)
             
             return min(matches / len(required_skills), 1.0)
     
@@ -187,7 +336,7 @@ class EventMatcherAgent(BaseAgent):
                     total_available_hours += max(0, end_hour - start_hour)
         
         # Job time commitment matching
-        job_time_commitment = job.get('time_commitment', '').lower()
+        job_time_commitment = time_commitment_text(job)
         
         # Score based on available days and hours
         day_score = min(available_days / 7.0, 1.0)  # Normalize to 0-1
@@ -217,7 +366,7 @@ class EventMatcherAgent(BaseAgent):
         preferred_days = monthly_availability.get('preferredDays', 'flexible')
         time_preference = monthly_availability.get('timePreference', 'flexible')
         
-        job_time_commitment = job.get('time_commitment', '').lower()
+        job_time_commitment = time_commitment_text(job)
         
         # Base score from hours commitment
         if hours_per_week >= 20:
@@ -248,7 +397,7 @@ class EventMatcherAgent(BaseAgent):
         if not volunteer_interests:
             return 0.5
         
-        job_text = f"{job.get('title', '')} {job.get('description', '')} {job.get('organization', '')}".lower()
+        job_text = job_interest_text(job)
         interest_matches = 0
         
         for interest in volunteer_interests:
@@ -1,4 +1,5 @@
 from typing import Dict, Any, List
+from match_index import job_skill_ids, profile_skill_ids
 
 
 class SkillGapRecommenderAgent:
@@ -21,24 +22,28 @@ class SkillGapRecommenderAgent:
 
     def recommend(self, profile: Dict[str, Any], jobs: List[Dict[str, Any]]) -> Dict[str, Any]:
         try:
-            user_skills = {self._normalize(s.get("name") if isinstance(s, dict) else str(s)) for s in (profile.get("skills") or [])}
-            # Pydantic Skill objects may already be dict-like; ensure strings are extracted robustly
-            user_skills = {self._normalize(s.get("name")) for s in profile.get("skills", []) if isinstance(s, dict) and s.get("name")}
+            # Skills are compared by interned id, so synonyms of one skill count as the same skill
+            profile_skills = [s for s in profile.get("skills") or [] if isinstance(s, dict) and (s.get("name") or s.get("skill_id") is not None)]
+            user_skills = set(profile_skill_ids(profile_skills))
 
-            required_skill_counts: Dict[str, int] = {}
+            required_skill_counts: Dict[int, int] = {}
+            skill_names: Dict[int, str] = {}
             for job in jobs or []:
-                for skill in job.get("skills_required") or []:
+                for skill, skill_id in zip(job.get("skills_required") or [], job_skill_ids(job)):
                     skill_norm = self._normalize(skill)
                     if not skill_norm:
                         continue
-                    required_skill_counts[skill_norm] = required_skill_counts.get(skill_norm, 0) + 1
+                    required_skill_counts[skill_id] = required_skill_counts.get(skill_id, 0) + 1
+                    skill_names.setdefault(skill_id, skill_norm)
 
             # Compute gaps
             gaps: List[Dict[str, Any]] = []
-            for skill, count in required_skill_counts.items():
-                if skill not in user_skills:
+            for skill_id, count in required_skill_counts.items():
+                if skill_id not in user_skills:
+                    skill = skill_names[skill_id]
                     gaps.append({
                         "skill": skill,
+                        "skill_id": skill_id,
                         "demand": count,
                         "suggestion": f"Improve '{skill}' via a short course or practice project"
                     })
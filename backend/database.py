@@ -1,4 +1,5 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
 from config import MONGODB_URL, DATABASE_NAME
 import logging
 
@@ -31,6 +32,57 @@ async def close_mongo_connection():
         db.client.close()
         logger.info("Disconnected from MongoDB")
 
+async def _create_unique_index(collection, keys, remedy: str, **options) -> bool:
+    """Create a unique index; existing duplicates are logged with ``remedy`` instead of aborting startup"""
+    try:
+        await collection.create_index(keys, unique=True, **options)
+        return True
+    except DuplicateKeyError as e:
+        logger.error(f"Unique index {keys} on {collection.name} not created, existing documents "
+                     f"have duplicate keys ({e}); {remedy} and restart")
+        return False
+
+async def ensure_indexes():
+    """Create the indexes the services rely on"""
+    try:
+        # Upsert key of ingested jobs; jobs without an external id are plain inserts
+        await _create_unique_index(
+            db.database.volunteer_jobs,
+            [("external_id", 1), ("source", 1)],
+            "run python dedupe_jobs.py",
+            partialFilterExpression={"external_id": {"$gt": ""}}
+        )
+        # Weighted full-text search, and token prefix search for type-ahead
+        await db.database.volunteer_jobs.create_index(
+            [("title", "text"), ("organization", "text"), ("skills_required", "text"), ("description", "text")],
+            weights={"title": 10, "organization": 5, "skills_required": 5, "description": 1},
+            name="job_text_search"
+        )
+        await db.database.volunteer_jobs.create_index([("search_tokens", 1)])
+        # Skill filters on interned ids
+        await db.database.volunteer_jobs.create_index([("skill_ids_required", 1)])
+        await db.database.volunteer_profiles.create_index([("skills.skill_id", 1)])
+        # Keyset pagination of job and volunteer listings (see pagination.py)
+        await db.database.volunteer_jobs.create_index([("created_at", -1), ("_id", -1)])
+        await db.database.volunteer_profiles.create_index([("created_at", -1), ("_id", -1)])
+        await db.database.volunteer_profiles.create_index([("uploaded_by", 1), ("created_at", -1), ("_id", -1)])
+        # Freshness checks for the in-memory job and volunteer indexes
+        await db.database.volunteer_jobs.create_index([("updated_at", -1)])
+        await db.database.volunteer_profiles.create_index([("updated_at", -1)])
+        # Least recently used processed CVs are evicted first
+        await db.database.cv_cache.create_index([("last_used_at", 1)])
+        # Materialized matches are read per volunteer in score order
+        await db.database.job_matches.create_index([("volunteer_id", 1), ("match_score", -1)])
+        await _create_unique_index(
+            db.database.job_matches,
+            [("volunteer_id", 1), ("job_id", 1)],
+            "run a full rematch (POST /api/matches/rematch?full=true)"
+        )
+        logger.info("Database indexes ensured")
+    except Exception as e:
+        logger.error(f"Failed to create indexes: {e}")
+        raise
+
 def get_database():
     """Get database instance"""
     return db.database
@@ -0,0 +1,63 @@
+"""Remove duplicate ingested jobs so the unique (external_id, source) index can be built.
+
+Databases filled before the index existed may hold several documents for one
+external job. The most recently updated copy of each is kept.
+
+    python dedupe_jobs.py
+    python dedupe_jobs.py --dry-run
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, Any
+from database import connect_to_mongo, close_mongo_connection, get_database, ensure_indexes
+
+
+async def dedupe_jobs(db, dry_run: bool) -> Dict[str, int]:
+    """Delete every copy but the latest of each duplicated (external_id, source)"""
+    duplicated = db.volunteer_jobs.aggregate([
+        {'$match': {'external_id': {'$gt': ''}}},
+        {'$sort': {'updated_at': -1, '_id': -1}},
+        {'$group': {'_id': {'external_id': '$external_id', 'source': '$source'},
+                    'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+        {'$match': {'count': {'$gt': 1}}}
+    ], allowDiskUse=True)
+
+    keys = removed = 0
+    async for group in duplicated:
+        keys += 1
+        extra_ids = group['ids'][1:]
+        if not dry_run:
+            result = await db.volunteer_jobs.delete_many({'_id': {'$in': extra_ids}})
+            removed += result.deleted_count
+        else:
+            removed += len(extra_ids)
+    return {'duplicated_keys': keys, 'removed': removed}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        report = await dedupe_jobs(db, args.dry_run)
+        if not args.dry_run:
+            await ensure_indexes()
+        return report
+    finally:
+        await close_mongo_connection()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Remove duplicate ingested jobs")
+    parser.add_argument("--dry-run", action="store_true", help="count duplicates without deleting them")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    json.dump(report, sys.stdout, indent=2, default=str)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
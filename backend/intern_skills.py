@@ -0,0 +1,93 @@
+"""Recompute the interned skill ids stored on volunteer profiles and jobs.
+
+Profiles and jobs get their skill ids when they are written; run this once to
+fill them in for documents stored before, and again after a taxonomy edit adds
+synonyms or skills so stored ids follow the new taxonomy.
+
+    python intern_skills.py
+    python intern_skills.py --batch-size 500
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+from typing import Dict, Any, List
+from pymongo import UpdateOne
+from database import connect_to_mongo, close_mongo_connection, get_database
+from skill_taxonomy import get_skill_taxonomy, skill_id, skill_ids
+from config import JOB_WRITE_BATCH_SIZE
+
+
+async def _flush(collection, updates: List[UpdateOne]) -> int:
+    if not updates:
+        return 0
+    result = await collection.bulk_write(updates, ordered=False)
+    updates.clear()
+    return result.modified_count
+
+
+async def intern_profiles(db, batch_size: int) -> Dict[str, int]:
+    """Set ``skills.N.skill_id`` on every profile whose stored ids differ from the current ones"""
+    scanned = updated = 0
+    updates: List[UpdateOne] = []
+    async for profile in db.volunteer_profiles.find({}, {'skills.name': 1, 'skills.skill_id': 1}):
+        scanned += 1
+        changes = {}
+        for i, skill in enumerate(profile.get('skills') or []):
+            current = skill_id(skill.get('name', ''))
+            if skill.get('skill_id') != current:
+                changes[f'skills.{i}.skill_id'] = current
+        if changes:
+            changes['updated_at'] = datetime.utcnow()
+            updates.append(UpdateOne({'_id': profile['_id']}, {'$set': changes}))
+        if len(updates) >= batch_size:
+            updated += await _flush(db.volunteer_profiles, updates)
+    updated += await _flush(db.volunteer_profiles, updates)
+    return {'scanned': scanned, 'updated': updated}
+
+
+async def intern_jobs(db, batch_size: int) -> Dict[str, int]:
+    """Set ``skill_ids_required`` on every job whose stored ids differ from the current ones"""
+    scanned = updated = 0
+    updates: List[UpdateOne] = []
+    async for job in db.volunteer_jobs.find({}, {'skills_required': 1, 'skill_ids_required': 1}):
+        scanned += 1
+        ids = skill_ids(job.get('skills_required') or [])
+        if job.get('skill_ids_required') != ids:
+            updates.append(UpdateOne(
+                {'_id': job['_id']},
+                {'$set': {'skill_ids_required': ids, 'updated_at': datetime.utcnow()}}
+            ))
+        if len(updates) >= batch_size:
+            updated += await _flush(db.volunteer_jobs, updates)
+    updated += await _flush(db.volunteer_jobs, updates)
+    return {'scanned': scanned, 'updated': updated}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        return {
+            'taxonomy_revision': get_skill_taxonomy().revision,
+            'profiles': await intern_profiles(db, args.batch_size),
+            'jobs': await intern_jobs(db, args.batch_size)
+        }
+    finally:
+        await close_mongo_connection()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Recompute interned skill ids of profiles and jobs")
+    parser.add_argument("--batch-size", type=int, default=JOB_WRITE_BATCH_SIZE, help="updates per bulk write")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    json.dump(report, sys.stdout, indent=2, default=str)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,23 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from datetime import datetime
 from typing import List, Dict, Any
-from services.job_service import JobService
+from services.job_service import JobService, search_tokens
+from services.job_scheduler import JobRefreshScheduler
 from services.cv_processor import CVProcessorService
-from ml_classifier import MLTextClassifier
+from services.cv_extractor import cv_extraction_pool
+from services.cv_cache import cv_cache
+from services.bulk_import import BulkImportService
+from services.facet_service import facet_service
+from ml_classifier import get_ml_classifier, get_classifier_metrics
+from skill_taxonomy import get_skill_taxonomy, reload_skill_taxonomy, skill_id
 from services.volunteer_service import VolunteerService
-from models import JobRetrievalResponse, CVUploadResponse, MatchingResponse
-from database import connect_to_mongo, close_mongo_connection
+from models import JobRetrievalAccepted, CVUploadResponse, MatchingResponse
+from database import connect_to_mongo, close_mongo_connection, ensure_indexes
+from pagination import fetch_page, count_total, encode_offset_cursor, decode_offset_cursor
 from config import API_HOST, API_PORT
 from auth import AuthService
 from agents.diversity_fairness import DiversityFairnessAgent
@@ -24,9 +32,26 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up Volunteer Matching System...")
     await connect_to_mongo()
+    await ensure_indexes()
+    # Warm the shared classifier and compile the skill taxonomy before the first request
+    get_ml_classifier()
+    get_skill_taxonomy()
+    # Keep the job catalogue fresh in the background
+    job_refresh_scheduler.start()
+    # Jobs stored before prefix search existed need their search tokens
+    search_backfill = asyncio.create_task(job_service.backfill_search_tokens())
     yield
     # Shutdown
     logger.info("Shutting down Volunteer Matching System...")
+    search_backfill.cancel()
+    try:
+        await search_backfill
+    except asyncio.CancelledError:
+        pass
+    await job_refresh_scheduler.stop()
+    await job_service.close()
+    cv_extraction_pool.shutdown()
+    bulk_import_service.close()
     await close_mongo_connection()
 
 # Create FastAPI app
@@ -50,9 +75,10 @@ app.add_middleware(
 job_service = JobService()
 cv_processor = CVProcessorService()
 volunteer_service = VolunteerService()
+job_refresh_scheduler = JobRefreshScheduler(job_service, rematch_service=volunteer_service.rematch_service)
+bulk_import_service = BulkImportService(cv_processor, volunteer_service)
 auth_service = AuthService()
 diversity_agent = DiversityFairnessAgent()
-ml_classifier = MLTextClassifier()
 skill_gap_agent = SkillGapRecommenderAgent(top_n=10)
 
 @app.get("/")
@@ -69,6 +95,30 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "API is running"}
 
+@app.get("/api/metrics/ml-classifier")
+async def ml_classifier_metrics():
+    """Construction cost and memory of the shared ML classifier"""
+    return get_classifier_metrics()
+
+@app.get("/api/metrics/cv-cache")
+async def cv_cache_metrics():
+    """Hit and miss rates of the processed CV cache"""
+    return cv_cache.get_metrics()
+
+@app.get("/api/metrics/skill-taxonomy")
+async def skill_taxonomy_metrics():
+    """Version, size and artefact of the skill taxonomy mapped by this process"""
+    return get_skill_taxonomy().get_metrics()
+
+@app.post("/api/taxonomy/reload")
+async def reload_taxonomy():
+    """Recompile the skill taxonomy source and map it without a restart"""
+    try:
+        return await asyncio.to_thread(reload_skill_taxonomy)
+    except Exception as e:
+        logger.error(f"Error reloading skill taxonomy: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to reload skill taxonomy: {str(e)}")
+
 @app.post("/api/auth/login")
 async def login(credentials: dict):
     """Login endpoint"""
@@ -101,23 +151,28 @@ async def signup(credentials: dict):
     else:
         raise HTTPException(status_code=400, detail=result['message'])
 
-@app.post("/api/jobs/retrieve", response_model=JobRetrievalResponse)
-async def retrieve_jobs(limit: int = 100):
+@app.post("/api/jobs/retrieve", response_model=JobRetrievalAccepted, status_code=202)
+async def retrieve_jobs(limit: int = 100, resume: bool = True):
     """
-    Retrieve volunteer jobs from external API and store in database
+    Start retrieving volunteer jobs from external API into the database, in the background
+    
+    The refresh runs on the scheduler, under its single-flight lock and lease; its progress
+    and result (``last_result``) are reported by ``GET /api/jobs/refresh/status``.
     """
     try:
         logger.info(f"Starting job retrieval with limit: {limit}")
         
-        result = await job_service.retrieve_and_store_jobs(limit)
-        
-        if result['success']:
-            logger.info(f"Job retrieval completed successfully: {result['jobs_stored']} jobs stored")
-        else:
-            logger.error(f"Job retrieval failed: {result['message']}")
+        if not job_refresh_scheduler.trigger(limit, resume=resume):
+            raise HTTPException(status_code=409, detail="A job refresh is already running")
         
-        return JobRetrievalResponse(**result)
+        return JobRetrievalAccepted(
+            success=True,
+            message="Job retrieval started",
+            status_url="/api/jobs/refresh/status"
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error in retrieve_jobs endpoint: {e}")
         raise HTTPException(
@@ -125,18 +180,52 @@ async def retrieve_jobs(limit: int = 100):
             detail=f"Internal server error: {str(e)}"
         )
 
+@app.get("/api/jobs/retrieve/status")
+async def get_job_retrieval_status():
+    """
+    Get the checkpoint and progress counters of the current or last job retrieval
+    """
+    try:
+        status = await job_service.get_ingestion_status()
+        if status is None:
+            return {"status": "never_run"}
+        return status
+        
+    except Exception as e:
+        logger.error(f"Error getting job retrieval status: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get job retrieval status: {str(e)}"
+        )
+
+@app.get("/api/jobs/refresh/status")
+async def get_job_refresh_status():
+    """
+    Get the background job refresh schedule, last-run duration, throughput and error counts
+    """
+    return job_refresh_scheduler.get_status()
+
 @app.get("/api/jobs")
 async def get_jobs(
-    skip: int = 0, 
     limit: int = 100,
+    cursor: str = None,
+    include_total: bool = True,
     search: str = None,
     location: str = None,
     skill: str = None,
-    organization: str = None
+    organization: str = None,
+    sort: str = "newest"
 ):
     """
     Get stored volunteer jobs from database with filtering
+    
+    ``search`` matches word prefixes for type-ahead; with ``sort=relevance`` it runs a
+    weighted full-text search ranked by text score instead. Pages are fetched by passing
+    the returned ``next_cursor`` back as ``cursor``.
     """
+    if sort not in ("newest", "relevance"):
+        raise HTTPException(status_code=400, detail="sort must be 'newest' or 'relevance'")
+    
     try:
         from database import get_database
         db = get_database()
@@ -145,28 +234,40 @@ async def get_jobs(
         # Build filter query
         filter_query = {}
         
-        if search:
-            filter_query["$or"] = [
-                {"title": {"$regex": search, "$options": "i"}},
-                {"description": {"$regex": search, "$options": "i"}},
-                {"organization": {"$regex": search, "$options": "i"}}
-            ]
+        rank_by_relevance = bool(search) and sort == "relevance"
+        if rank_by_relevance:
+            # Weighted text index: title > organization, skills > description
+            filter_query["$text"] = {"$search": search}
+        elif search:
+            # Every typed word must prefix an indexed token (anchored regexes use the index)
+            terms = search_tokens(search)
+            if terms:
+                filter_query["$and"] = [{"search_tokens": {"$regex": f"^{term}"}} for term in terms]
         
         if location:
             filter_query["location"] = {"$regex": location, "$options": "i"}
         
         if skill:
-            filter_query["skills_required"] = {"$regex": skill, "$options": "i"}
+            # Any name or synonym of the skill finds it
+            filter_query["skill_ids_required"] = skill_id(skill)
         
         if organization:
             filter_query["organization"] = {"$regex": organization, "$options": "i"}
         
-        # Get total count for pagination
-        total_count = await jobs_collection.count_documents(filter_query)
+        # Get total count for pagination (estimated when unfiltered, skipped on request)
+        total_count = await count_total(jobs_collection, filter_query) if include_total else None
         
         # Get jobs with pagination and filtering
-        cursor = jobs_collection.find(filter_query).skip(skip).limit(limit).sort("created_at", -1)
-        jobs = await cursor.to_list(length=limit)
+        if rank_by_relevance:
+            # Relevance order has no stable key to resume from, so its cursor carries an offset
+            offset = decode_offset_cursor(cursor)
+            projection = {"score": {"$meta": "textScore"}, "search_tokens": 0}
+            page_cursor = jobs_collection.find(filter_query, projection).sort([("score", {"$meta": "textScore"})])
+            jobs = await page_cursor.skip(offset).limit(limit + 1).to_list(length=limit + 1)
+            next_cursor = encode_offset_cursor(offset + limit) if len(jobs) > limit else None
+            jobs = jobs[:limit]
+        else:
+            jobs, next_cursor = await fetch_page(jobs_collection, filter_query, limit, cursor, {"search_tokens": 0})
         
         # Convert ObjectId to string for JSON serialization
         for job in jobs:
@@ -175,11 +276,13 @@ async def get_jobs(
         return {
             "jobs": jobs,
             "total": total_count,
-            "skip": skip,
             "limit": limit,
-            "has_more": (skip + limit) < total_count
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting jobs: {e}")
         raise HTTPException(
@@ -211,41 +314,10 @@ async def get_jobs_count():
 @app.get("/api/jobs/filters")
 async def get_filter_options():
     """
-    Get available filter options (locations, skills, organizations)
+    Get available filter options (locations, skills, organizations) with per-value job counts
     """
     try:
-        from database import get_database
-        db = get_database()
-        jobs_collection = db.volunteer_jobs
-        
-        # Get all jobs to extract unique values
-        cursor = jobs_collection.find({}, {
-            "location": 1,
-            "skills_required": 1,
-            "organization": 1
-        })
-        jobs = await cursor.to_list(length=None)
-        
-        # Extract unique values
-        locations = set()
-        skills = set()
-        organizations = set()
-        
-        for job in jobs:
-            if job.get("location"):
-                locations.add(job["location"])
-            if job.get("skills_required"):
-                for skill in job["skills_required"]:
-                    if skill:
-                        skills.add(skill)
-            if job.get("organization"):
-                organizations.add(job["organization"])
-        
-        return {
-            "locations": sorted(list(locations)),
-            "skills": sorted(list(skills)),
-            "organizations": sorted(list(organizations))
-        }
+        return await facet_service.get_facets()
         
     except Exception as e:
         logger.error(f"Error getting filter options: {e}")
@@ -254,6 +326,41 @@ async def get_filter_options():
             detail=f"Failed to get filter options: {str(e)}"
         )
 
+@app.get("/api/jobs/{job_id}/volunteers", response_model=MatchingResponse)
+async def get_volunteer_matches(job_id: str, limit: int = 50, apply_diversity: bool = False):
+    """Rank the best volunteers for a job with optional diversity filters"""
+    try:
+        logger.info(f"Finding volunteers for job {job_id}")
+        
+        result = await volunteer_service.find_volunteers_for_job(job_id, top_k=max(1, limit))
+        
+        if result['success'] and apply_diversity:
+            try:
+                diversity_result = await diversity_agent.process(
+                    job_id=job_id,
+                    candidate_matches=result['matches']
+                )
+                
+                if diversity_result['success']:
+                    result['matches'] = diversity_result['filtered_matches']
+            except Exception as e:
+                logger.warning(f"Diversity filtering failed: {e}")
+        
+        if result['success']:
+            return MatchingResponse(
+                success=True,
+                matches=result['matches'],
+                total_matches=result['total_matches']
+            )
+        else:
+            raise HTTPException(status_code=500, detail="Failed to find volunteers")
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error finding volunteers: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Volunteer Profile Endpoints
 @app.post("/api/volunteers/upload-cv", response_model=CVUploadResponse)
 async def upload_cv(
@@ -269,32 +376,12 @@ async def upload_cv(
     try:
         logger.info(f"Processing CV upload for {name}")
         
-        # Process CV with ML enhancement
+        # Process CV with ML enhancement (cached for identical files)
         cv_result = await cv_processor.process_cv(file)
         
         if not cv_result['success']:
             raise HTTPException(status_code=400, detail=cv_result['message'])
         
-        # Enhance skills with ML classification
-        try:
-            ml_skills = ml_classifier.extract_skills_ml(cv_result['cv_text'])
-            if ml_skills:
-                # Merge ML skills with existing skills
-                existing_skills = {skill.name.lower(): skill for skill in cv_result['skills']}
-                for ml_skill in ml_skills:
-                    skill_name = ml_skill['name'].lower()
-                    if skill_name not in existing_skills:
-                        from models import Skill, SkillLevel
-                        new_skill = Skill(
-                            name=ml_skill['name'],
-                            level=SkillLevel(ml_skill['level']),
-                            years_experience=ml_skill.get('years_experience', 0)
-                        )
-                        cv_result['skills'].append(new_skill)
-                logger.info(f"Enhanced skills with ML: added {len(ml_skills)} skills")
-        except Exception as e:
-            logger.warning(f"ML skill enhancement failed: {e}")
-        
         # Create volunteer profile
         profile_data = {
             'name': name,
@@ -360,9 +447,29 @@ async def upload_cv(
         logger.error(f"Error in CV upload: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/volunteers/bulk-import")
+async def bulk_import_cvs(
+    archive: UploadFile = File(...),
+    manifest: UploadFile = File(None),
+    uploaded_by: str = Form(...)
+):
+    """Import a zip archive of CVs described by a CSV manifest, with a per-file report"""
+    try:
+        result = await bulk_import_service.import_upload(archive, manifest, uploaded_by)
+        if not result['success']:
+            raise HTTPException(status_code=400, detail=result['message'])
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in bulk CV import: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/volunteers/all")
-async def get_all_volunteers(user_role: str = None, username: str = None):
-    """Get volunteer profiles based on user role"""
+async def get_all_volunteers(user_role: str = None, username: str = None, limit: int = 100,
+                             cursor: str = None, include_total: bool = True):
+    """Get volunteer profiles based on user role, one cursor page at a time"""
     try:
         from database import get_database
         db = get_database()
@@ -373,11 +480,11 @@ async def get_all_volunteers(user_role: str = None, username: str = None):
             query["uploaded_by"] = username
             logger.info(f"Filtering CVs for user: {username}, query: {query}")
         
-        cursor = db.volunteer_profiles.find(query, {
+        profiles, next_cursor = await fetch_page(db.volunteer_profiles, query, limit, cursor, {
             "name": 1, "email": 1, "location": 1, 
             "skills": 1, "created_at": 1, "cv_filename": 1, "volunteer_id": 1, "uploaded_by": 1
         })
-        profiles = await cursor.to_list(length=100)
+        total = await count_total(db.volunteer_profiles, query) if include_total else None
         
         # Convert ObjectIds to strings
         for profile in profiles:
@@ -387,9 +494,13 @@ async def get_all_volunteers(user_role: str = None, username: str = None):
         return {
             "success": True,
             "profiles": profiles,
-            "total": len(profiles)
+            "total": total,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting volunteers: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -405,6 +516,8 @@ async def get_volunteer_profile(profile_id: str):
         
         return profile
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting profile: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -479,11 +592,33 @@ async def get_job_matches(profile_id: str, apply_diversity: bool = False):
         else:
             raise HTTPException(status_code=500, detail="Failed to find matches")
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error finding matches: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/matches/rematch")
+async def rematch(full: bool = False):
+    """Materialize job matches for volunteers and jobs changed since the last run"""
+    try:
+        result = await volunteer_service.rematch_service.run(full=full)
+        if result is None:
+            raise HTTPException(status_code=409, detail="A rematch is already running")
+        
+        if result['success']:
+            return result
+        else:
+            raise HTTPException(status_code=500, detail=result['message'])
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in rematch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/recommendations/skills")
 async def get_skill_gap_recommendations(profile_id: str, limit: int = 10):
     """Recommend top skill gaps for a volunteer profile based on current jobs."""
@@ -506,7 +641,7 @@ async def get_skill_gap_recommendations(profile_id: str, limit: int = 10):
             raise HTTPException(status_code=404, detail="Profile not found")
 
         # Fetch a representative set of jobs
-        jobs_cursor = db.volunteer_jobs.find({}, {"skills_required": 1}).limit(1000)
+        jobs_cursor = db.volunteer_jobs.find({}, {"skills_required": 1, "skill_ids_required": 1}).limit(1000)
         jobs = await jobs_cursor.to_list(length=1000)
 
         # Run agent
@@ -536,6 +671,8 @@ async def delete_volunteer_profile(profile_id: str):
         else:
             raise HTTPException(status_code=404, detail=result['message'])
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting profile: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -544,9 +681,12 @@ async def delete_volunteer_profile(profile_id: str):
 async def search_volunteers(
     skills: str = None,
     location: str = None,
-    availability_days: str = None
+    availability_days: str = None,
+    limit: int = 100,
+    cursor: str = None,
+    include_total: bool = True
 ):
-    """Search volunteers with filters"""
+    """Search volunteers with filters, one cursor page at a time"""
     try:
         filters = {}
         
@@ -559,9 +699,11 @@ async def search_volunteers(
         if availability_days:
             filters['availability_days'] = [int(d) for d in availability_days.split(',')]
         
-        result = await volunteer_service.search_profiles(filters)
+        result = await volunteer_service.search_profiles(filters, limit, cursor, include_total)
         return result
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error searching volunteers: {e}")
         raise HTTPException(status_code=500, detail=str(e))
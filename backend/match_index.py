@@ -0,0 +1,391 @@
+import asyncio
+import copy
+import itertools
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ml_classifier import preprocess_text
+from skill_taxonomy import skill_id, skill_ids
+
+logger = logging.getLogger(__name__)
+
+# Keywords the availability scoring looks for in a job's time commitment
+TIME_COMMITMENT_KEYWORDS = ['part-time', 'flexible', 'full-time', 'weekend']
+
+
+def time_commitment_text(job: Dict[str, Any]) -> str:
+    """Lowercased time commitment of a job, empty when missing"""
+    return str(job.get('time_commitment') or '').lower()
+
+
+def commitment_class(job: Dict[str, Any]) -> str:
+    """Canonical time-commitment class: the commitment keywords the job mentions"""
+    commitment = time_commitment_text(job)
+    return ' '.join(keyword for keyword in TIME_COMMITMENT_KEYWORDS if keyword in commitment)
+
+
+# Every possible commitment class, in canonical keyword order
+COMMITMENT_CLASSES = [
+    ' '.join(keywords)
+    for size in range(len(TIME_COMMITMENT_KEYWORDS) + 1)
+    for keywords in itertools.combinations(TIME_COMMITMENT_KEYWORDS, size)
+]
+COMMITMENT_COLUMNS = {cls: column for column, cls in enumerate(COMMITMENT_CLASSES)}
+
+
+def job_interest_text(job: Dict[str, Any]) -> str:
+    """Lowercased text that volunteer interests are matched against"""
+    return f"{job.get('title', '')} {job.get('description', '')} {job.get('organization', '')}".lower()
+
+
+def job_skill_ids(job: Dict[str, Any]) -> List[int]:
+    """Skill ids of a job's required skills; interned from the names for jobs stored without them"""
+    names = job.get('skills_required') or []
+    ids = job.get('skill_ids_required')
+    return ids if ids is not None and len(ids) == len(names) else skill_ids(names)
+
+
+def profile_skill_ids(skills: List[Dict[str, Any]]) -> List[int]:
+    """Skill ids of a profile's skills; interned from the names for skills stored without them"""
+    return [skill['skill_id'] if skill.get('skill_id') is not None else skill_id(skill.get('name', ''))
+            for skill in skills]
+
+
+def location_score_table(volunteer_locations: List[Any], job_locations: List[Any]) -> np.ndarray:
+    """Vectorized ``EventMatcherAgent._calculate_location_match`` for every pair of distinct locations"""
+    def tokens(location):
+        return set(location.lower().replace(',', ' ').split()) if location else set()
+
+    vocabulary: Dict[str, int] = {}
+    def token_matrix(locations):
+        rows, cols = [], []
+        for row, location in enumerate(locations):
+            for token in tokens(location):
+                rows.append(row)
+                cols.append(vocabulary.setdefault(token, len(vocabulary)))
+        return rows, cols
+
+    volunteer_tokens = token_matrix(volunteer_locations)
+    job_tokens = token_matrix(job_locations)
+    shape = lambda locations: (len(locations), len(vocabulary))
+    volunteer_matrix = sparse.csr_matrix((np.ones(len(volunteer_tokens[0])), volunteer_tokens), shape=shape(volunteer_locations))
+    job_matrix = sparse.csr_matrix((np.ones(len(job_tokens[0])), job_tokens), shape=shape(job_locations))
+    common_words = (volunteer_matrix @ job_matrix.T).toarray() > 0
+
+    lowered: Dict[str, int] = {}
+    volunteer_codes = np.array([lowered.setdefault(location.lower(), len(lowered)) if location else -1
+                                for location in volunteer_locations], dtype=np.int64)
+    job_codes = np.array([lowered.setdefault(location.lower(), len(lowered)) if location else -2
+                          for location in job_locations], dtype=np.int64)
+    volunteer_missing = (volunteer_codes == -1)[:, None]
+    job_missing = (job_codes == -2)[None, :]
+
+    table = np.where(common_words, 0.8, 0.4)
+    table[volunteer_codes[:, None] == job_codes[None, :]] = 1.0
+    table = np.where(volunteer_missing | job_missing, 0.6, table)
+    return np.where(volunteer_missing & job_missing, 0.8, table)
+
+
+def skill_text(skill_names: List[str]) -> str:
+    """Preprocessed text of a skill list, as vectorized for semantic skill matching"""
+    return preprocess_text(' '.join(skill_names))
+
+
+class JobSkillSnapshot:
+    """TF-IDF space of the skills required by a set of jobs.
+
+    Never modified after construction: a refit builds a new snapshot, so a
+    reader holding one always sees a vectorizer, matrix and row ids that
+    belong together.
+    """
+
+    def __init__(self, jobs: List[Dict[str, Any]]):
+        """Fit over job documents (only ``_id`` and ``skills_required`` are read)"""
+        vectorizer = TfidfVectorizer(stop_words='english')
+        try:
+            job_matrix = vectorizer.fit_transform([skill_text(job.get('skills_required') or []) for job in jobs]).tocsr()
+        except ValueError:
+            # Empty vocabulary (no jobs, or only stop words): semantic scores are all zero
+            vectorizer, job_matrix = None, None
+
+        self.vectorizer: Optional[TfidfVectorizer] = vectorizer
+        self.job_matrix = job_matrix     # n_jobs x n_terms, L2-normalised TF-IDF rows
+        self.job_ids = [str(job['_id']) for job in jobs]
+        self.row_by_id = {job_id: row for row, job_id in enumerate(self.job_ids)}
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+    def row(self, job_id) -> Optional[int]:
+        return self.row_by_id.get(str(job_id))
+
+
+class JobSkillIndex:
+    """In-memory TF-IDF index over the skills required by every stored job.
+
+    One vectorizer is fitted over the whole ``volunteer_jobs`` corpus and the
+    job vectors are kept as a sparse matrix, so scoring a volunteer against
+    every job is a single sparse matrix-vector product instead of one
+    vectorizer fit per (volunteer, job) pair. Readers take ``snapshot`` once
+    and use it throughout, since a rebuild replaces it.
+    """
+
+    def __init__(self):
+        self.snapshot = JobSkillSnapshot([])
+        self.signature = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def fit(self, jobs: List[Dict[str, Any]]):
+        """Build the index from job documents, publishing it with a single assignment"""
+        snapshot = JobSkillSnapshot(jobs)
+        self.snapshot = snapshot
+        terms = len(snapshot.vectorizer.vocabulary_) if snapshot.vectorizer is not None else 0
+        logger.info(f"Job skill index built: {len(snapshot)} jobs, {terms} skill terms")
+
+    def invalidate(self):
+        """Force a rebuild on the next ``ensure_fresh`` call"""
+        self.signature = None
+
+    async def _current_signature(self, db):
+        latest = await db.volunteer_jobs.find_one({}, {'updated_at': 1}, sort=[('updated_at', -1)])
+        count = await db.volunteer_jobs.estimated_document_count()
+        return count, latest.get('updated_at') if latest else None
+
+    async def ensure_fresh(self, db):
+        """Rebuild the index if the job collection changed since it was built"""
+        async with self._lock:
+            signature = await self._current_signature(db)
+            if signature == self.signature:
+                return
+
+            cursor = db.volunteer_jobs.find({}, {'skills_required': 1})
+            jobs = await cursor.to_list(length=None)
+            await asyncio.to_thread(self.fit, jobs)
+            self.signature = signature
+
+
+class JobCatalogue:
+    """Columnar job side of match scoring, picklable for scoring volunteer blocks in worker processes.
+
+    Skill texts are vectors in the TF-IDF space of ``index``: jobs the
+    snapshot holds are gathered from it and jobs stored since are projected
+    into it. Locations and time commitments are dictionary-encoded, since
+    their scores only depend on the distinct values.
+    """
+
+    def __init__(self, jobs: List[Dict[str, Any]], index: Optional[JobSkillSnapshot] = None):
+        # Without a snapshot the catalogue's own jobs define the TF-IDF space
+        if index is None:
+            index = JobSkillSnapshot(jobs)
+        self.index = index
+        self.job_ids = [job['_id'] for job in jobs]
+
+        self.job_matrix = None  # n_jobs x n_terms
+        if index.vectorizer is not None:
+            rows = [index.row(job['_id']) for job in jobs]
+            missing = [i for i, row in enumerate(rows) if row is None]
+            source = index.job_matrix
+            if missing:
+                projected = index.vectorizer.transform([skill_text(jobs[i].get('skills_required') or [])
+                                                        for i in missing])
+                source = sparse.vstack([source, projected]).tocsr()
+                for offset, i in enumerate(missing):
+                    rows[i] = len(index) + offset
+            self.job_matrix = source if rows == list(range(len(index))) else source[np.array(rows, dtype=np.int64)]
+
+        skill_vocabulary: Dict[int, int] = {}
+        skill_rows, skill_cols = [], []
+        self.skill_counts = np.zeros(len(jobs))
+        location_codes: Dict[Any, int] = {}
+        self.location_ids = np.empty(len(jobs), dtype=np.int64)
+        self.commitment_columns = np.empty(len(jobs), dtype=np.int64)
+
+        for row, job in enumerate(jobs):
+            self.skill_counts[row] = len(job.get('skills_required') or [])
+            for skill in set(job_skill_ids(job)):
+                skill_rows.append(row)
+                skill_cols.append(skill_vocabulary.setdefault(skill, len(skill_vocabulary)))
+            self.location_ids[row] = location_codes.setdefault(job.get('location'), len(location_codes))
+            self.commitment_columns[row] = COMMITMENT_COLUMNS[commitment_class(job)]
+
+        self.skill_vocabulary = skill_vocabulary  # skill id -> column of skill_matrix
+        self.skill_matrix = sparse.csr_matrix(    # n_jobs x n_skills, 1 where the job requires the skill
+            (np.ones(len(skill_rows)), (skill_rows, skill_cols)),
+            shape=(len(jobs), len(skill_vocabulary))
+        )
+        self.locations = list(location_codes)
+        # Plain strings: a fixed-width unicode array would pad every job to the longest description
+        self.interest_texts = [job_interest_text(job) for job in jobs]
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+    def subset(self, rows: List[int]) -> 'JobCatalogue':
+        """Catalogue restricted to some jobs, keeping the full corpus' TF-IDF space"""
+        catalogue = copy.copy(self)
+        catalogue.job_ids = [self.job_ids[row] for row in rows]
+        if self.job_matrix is not None:
+            catalogue.job_matrix = self.job_matrix[rows]
+        catalogue.skill_matrix = self.skill_matrix[rows]
+        catalogue.skill_counts = self.skill_counts[rows]
+        catalogue.location_ids = self.location_ids[rows]
+        catalogue.commitment_columns = self.commitment_columns[rows]
+        catalogue.interest_texts = [self.interest_texts[row] for row in rows]
+        return catalogue
+
+
+class VolunteerSnapshot:
+    """Columnar volunteer side of match scoring, never modified after construction.
+
+    Skill vectors are projected into the TF-IDF space of ``job_snapshot``,
+    so the volunteers can be scored against any ``JobCatalogue`` built on the
+    same snapshot. Availability is pre-scored for every time-commitment
+    class, and interests are kept as a sparse volunteer x interest matrix.
+    A profile that cannot be read is logged and kept as an empty, invalid row.
+    """
+
+    def __init__(self, profiles: List[Dict[str, Any]], availability_scorer, job_snapshot: JobSkillSnapshot):
+        """Fit over profiles; ``availability_scorer(availability, job)`` is the scalar availability rule"""
+        self.job_snapshot = job_snapshot
+        n_volunteers = len(profiles)
+        skill_texts = []
+        skill_vocabulary: Dict[int, int] = {}
+        skill_rows, skill_cols = [], []
+        has_skills = np.zeros(n_volunteers, dtype=bool)
+        location_codes: Dict[Any, int] = {}
+        location_ids = np.empty(n_volunteers, dtype=np.int64)
+        availability_codes: Dict[Optional[str], int] = {}
+        availability_rows = []
+        availability_ids = np.empty(n_volunteers, dtype=np.int64)
+        interest_vocabulary: Dict[str, int] = {}
+        interest_rows, interest_cols = [], []
+        interest_counts = np.zeros(n_volunteers)
+        valid = np.ones(n_volunteers, dtype=bool)
+
+        for row, profile in enumerate(profiles):
+            try:
+                skills = profile.get('skills') or []
+                text = skill_text([skill.get('name', '') for skill in skills])
+                ids = set(profile_skill_ids(skills))
+                location = profile.get('location')
+                if location is not None and not isinstance(location, str):
+                    raise TypeError(f"location {location!r} is not a string")
+                interests = [interest.lower() for interest in profile.get('interests') or []]
+
+                # Profiles often share an availability pattern; score each distinct one once
+                availability = profile.get('availability', [])
+                availability_key = json.dumps(availability, sort_keys=True, default=str)
+                if availability_key not in availability_codes:
+                    availability_row = [availability_scorer(availability, {'time_commitment': cls})
+                                        for cls in COMMITMENT_CLASSES]
+                    availability_codes[availability_key] = len(availability_rows)
+                    availability_rows.append(availability_row)
+            except Exception as e:
+                # One malformed profile scores zero instead of failing the whole batch
+                logger.warning(f"Volunteer profile {profile.get('_id')} skipped in matching: {e}")
+                valid[row] = False
+                skills, text, ids, location, interests = [], '', set(), None, []
+                availability_key = None
+                if availability_key not in availability_codes:
+                    availability_codes[availability_key] = len(availability_rows)
+                    availability_rows.append([0.0] * len(COMMITMENT_CLASSES))
+
+            has_skills[row] = bool(skills)
+            skill_texts.append(text)
+            for skill in ids:
+                skill_rows.append(row)
+                skill_cols.append(skill_vocabulary.setdefault(skill, len(skill_vocabulary)))
+            location_ids[row] = location_codes.setdefault(location, len(location_codes))
+            availability_ids[row] = availability_codes[availability_key]
+            interest_counts[row] = len(interests)
+            for interest in interests:
+                interest_rows.append(row)
+                interest_cols.append(interest_vocabulary.setdefault(interest, len(interest_vocabulary)))
+
+        self.profile_ids = [profile['_id'] for profile in profiles]
+        # n_volunteers x n_terms, in the job snapshot's TF-IDF space
+        self.skill_matrix = (job_snapshot.vectorizer.transform(skill_texts).tocsr()
+                             if job_snapshot.vectorizer is not None else None)
+        self.skill_vocabulary = skill_vocabulary  # skill id -> column of exact_matrix
+        self.exact_matrix = sparse.csr_matrix(    # n_volunteers x n_skills, 1 where the volunteer has the skill
+            (np.ones(len(skill_rows)), (skill_rows, skill_cols)),
+            shape=(n_volunteers, len(skill_vocabulary))
+        )
+        self.has_skills = has_skills
+        self.locations = list(location_codes)
+        self.location_ids = location_ids
+        self.availability_table = np.array(availability_rows).reshape(-1, len(COMMITMENT_CLASSES))
+        self.availability_ids = availability_ids
+        self.interest_vocabulary = interest_vocabulary
+        # n_volunteers x n_interests; duplicate (row, col) pairs are summed, matching per-item interest counting
+        self.interest_matrix = sparse.csr_matrix(
+            (np.ones(len(interest_rows)), (interest_rows, interest_cols)),
+            shape=(n_volunteers, len(interest_vocabulary))
+        )
+        self.interest_counts = interest_counts
+        self.valid = valid  # False for profiles that could not be read; they score zero
+
+    def __len__(self) -> int:
+        return len(self.profile_ids)
+
+
+class VolunteerIndex:
+    """In-memory columnar index over every volunteer profile for job-to-volunteer ranking.
+
+    Volunteer skill texts are projected into the job index's TF-IDF space so a
+    (volunteer, job) pair scores the same in both directions. As with the job
+    index, readers take ``snapshot`` once and use it throughout.
+    """
+
+    def __init__(self, job_index: JobSkillIndex):
+        self.job_index = job_index
+        self.snapshot = VolunteerSnapshot([], None, job_index.snapshot)
+        self.signature = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def fit(self, profiles: List[Dict[str, Any]], availability_scorer):
+        """Build the index; ``availability_scorer(availability, job)`` is the scalar availability rule"""
+        snapshot = VolunteerSnapshot(profiles, availability_scorer, self.job_index.snapshot)
+        self.snapshot = snapshot
+        logger.info(f"Volunteer index built: {len(snapshot)} profiles, {len(snapshot.skill_vocabulary)} distinct skills")
+
+    async def _current_signature(self, db):
+        latest = await db.volunteer_profiles.find_one({}, {'updated_at': 1}, sort=[('updated_at', -1)])
+        count = await db.volunteer_profiles.estimated_document_count()
+        # Skill vectors live in the job index's TF-IDF space, so a job refit invalidates them too
+        return count, latest.get('updated_at') if latest else None, self.job_index.signature
+
+    async def ensure_fresh(self, db, availability_scorer):
+        """Rebuild the index if the profiles (or the job index) changed since it was built"""
+        await self.job_index.ensure_fresh(db)
+        async with self._lock:
+            signature = await self._current_signature(db)
+            if signature == self.signature:
+                return
+
+            cursor = db.volunteer_profiles.find({}, {
+                'skills.name': 1, 'skills.skill_id': 1, 'location': 1, 'availability': 1, 'interests': 1
+            })
+            profiles = await cursor.to_list(length=None)
+            await asyncio.to_thread(self.fit, profiles, availability_scorer)
+            self.signature = signature
+
+    def invalidate(self):
+        """Force a rebuild on the next ``ensure_fresh`` call"""
+        self.signature = None
+
+
+# Shared index instances
+job_index = JobSkillIndex()
+volunteer_index = VolunteerIndex(job_index)
@@ -1,91 +1,136 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.base import clone
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
 import numpy as np
 import re
-from typing import List, Dict, Any
+from scipy import sparse
+import threading
+import time
+import tracemalloc
+from typing import List, Dict, Any, Callable, Optional
 import logging
+from skill_taxonomy import SkillTaxonomy, get_skill_taxonomy, skill_ids
 
 logger = logging.getLogger(__name__)
 
+# Smoothed TF-IDF weight of a term found in only one of two documents: ln(3/2) + 1
+SINGLE_DOCUMENT_IDF = float(np.log(1.5) + 1.0)
+
+
+def preprocess_text(text: str) -> str:
+    """Lowercase text with special characters removed and whitespace collapsed"""
+    if not text:
+        return ""
+    
+    # Convert to lowercase and remove special characters
+    text = re.sub(r'[^a-zA-Z0-9\s+#.]', ' ', text.lower())
+    # Remove extra whitespace
+    text = re.sub(r'\s+', ' ', text).strip()
+    
+    return text
+
+
 class MLTextClassifier:
     """Machine Learning text classifier for volunteer matching system"""
     
+    # Number of instances built in this process; should stay at 1 when using get_ml_classifier()
+    instances_created = 0
+    
     def __init__(self):
+        MLTextClassifier.instances_created += 1
         self.skill_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-        self.job_categories = {
-            'healthcare': ['medical', 'health', 'hospital', 'patient', 'care', 'nursing', 'doctor', 'clinic'],
-            'education': ['teach', 'school', 'student', 'education', 'tutor', 'learning', 'academic', 'classroom'],
-            'technology': ['software', 'programming', 'computer', 'web', 'development', 'coding', 'tech', 'digital'],
-            'environment': ['environment', 'green', 'sustainability', 'conservation', 'climate', 'nature', 'eco'],
-            'community': ['community', 'social', 'outreach', 'support', 'help', 'assistance', 'service', 'volunteer'],
-            'elderly': ['elderly', 'senior', 'aging', 'retirement', 'older', 'geriatric', 'care'],
-            'children': ['children', 'kids', 'youth', 'child', 'young', 'family', 'parenting', 'daycare']
+        # Skill vocabulary and job category keywords both come from the shared taxonomy
+        self._category_lock = threading.Lock()
+        self._category_model = self._fit_category_centroids(get_skill_taxonomy())
+    
+    def _fit_category_centroids(self, taxonomy: SkillTaxonomy) -> Dict[str, Any]:
+        """Precompute the category keyword term counts over a fixed vocabulary"""
+        analyzer = self.skill_vectorizer.build_analyzer()
+        vectorizer = CountVectorizer(analyzer=analyzer)
+        keyword_docs = [' '.join(keywords) for keywords in taxonomy.job_categories.values()]
+        centroids = vectorizer.fit_transform(keyword_docs).astype(float).T.tocsr()
+        centroids_squared = centroids.multiply(centroids).tocsr()
+        return {
+            'revision': taxonomy.revision,
+            'names': list(taxonomy.job_categories),
+            'analyzer': analyzer,
+            'vectorizer': vectorizer,
+            'centroids': centroids,
+            'centroids_squared': centroids_squared,
+            'centroids_binary': (centroids > 0).astype(float),
+            'norms_squared': np.asarray(centroids_squared.sum(axis=0)).ravel()
         }
-        
-    def extract_skills_ml(self, cv_text: str) -> List[Dict[str, Any]]:
-        """Extract skills using ML-based text analysis"""
-        try:
-            # Preprocess text
-            text = self._preprocess_text(cv_text)
-            
-            # Skill patterns with ML confidence scoring
-            skill_patterns = {
-                'programming': r'\b(python|java|javascript|c\+\+|c#|php|ruby|go|rust|swift)\b',
-                'web': r'\b(html|css|react|angular|vue|node|express|django|flask)\b',
-                'database': r'\b(sql|mysql|postgresql|mongodb|oracle|sqlite|redis)\b',
-                'cloud': r'\b(aws|azure|gcp|docker|kubernetes|terraform|jenkins)\b',
-                'data': r'\b(pandas|numpy|tensorflow|pytorch|scikit|tableau|powerbi)\b',
-                'soft_skills': r'\b(leadership|communication|teamwork|problem.solving|management)\b'
-            }
-            
-            skills = []
-            for category, pattern in skill_patterns.items():
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    # Calculate confidence based on context
-                    confidence = self._calculate_skill_confidence(match, text)
-                    level = self._classify_skill_level(match, text)
-                    
-                    skills.append({
-                        'name': match.title(),
-                        'level': level,
-                        'category': category,
-                        'confidence': confidence,
-                        'years_experience': self._extract_experience_years(match, text)
-                    })
-            
-            return skills
-            
-        except Exception as e:
-            logger.error(f"Error in ML skill extraction: {e}")
-            return []
     
+    def _current_category_model(self) -> Dict[str, Any]:
+        """Category centroids of the current taxonomy, refitted after a taxonomy reload"""
+        taxonomy = get_skill_taxonomy()
+        model = self._category_model
+        if model['revision'] != taxonomy.revision:
+            with self._category_lock:
+                if self._category_model['revision'] != taxonomy.revision:
+                    self._category_model = self._fit_category_centroids(taxonomy)
+                model = self._category_model
+        return model
+        
     def classify_job_category(self, job_text: str) -> Dict[str, float]:
         """Classify job into categories using ML"""
+        scores = self.classify_job_categories([job_text])
+        return scores[0] if scores else {}
+    
+    def classify_job_categories(self, job_texts: List[str]) -> List[Dict[str, float]]:
+        """Classify many job texts into categories in one vectorized pass"""
         try:
-            text = self._preprocess_text(job_text)
-            category_scores = {}
+            texts = [self._preprocess_text(text) for text in job_texts]
+            if not texts:
+                return []
+            model = self._current_category_model()
             
-            for category, keywords in self.job_categories.items():
-                # Calculate TF-IDF similarity
-                combined_text = [text, ' '.join(keywords)]
-                tfidf_matrix = self.skill_vectorizer.fit_transform(combined_text)
-                similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-                category_scores[category] = float(similarity)
+            # Term counts of every text; the full row norm is needed, not just the category terms
+            counter = CountVectorizer(analyzer=model['analyzer'])
+            try:
+                counts = counter.fit_transform(texts).astype(float)
+            except ValueError:
+                # No text has a single usable term
+                return [dict.fromkeys(model['names'], 0.0) for _ in texts]
             
-            return category_scores
+            # Project the batch vocabulary onto the fixed category vocabulary
+            vocabulary = model['vectorizer'].vocabulary_
+            shared = [(column, vocabulary[term]) for term, column in counter.vocabulary_.items() if term in vocabulary]
+            rows = [batch_column for batch_column, _ in shared]
+            columns = [category_column for _, category_column in shared]
+            projection = sparse.csr_matrix(
+                (np.ones(len(shared)), (rows, columns)), shape=(counts.shape[1], len(vocabulary))
+            )
+            category_counts = counts @ projection
+            
+            # Cosine of two-document TF-IDF vectors: shared terms weigh 1, all other terms SINGLE_DOCUMENT_IDF
+            idf_squared = SINGLE_DOCUMENT_IDF ** 2
+            dot = (category_counts @ model['centroids']).toarray()
+            text_squared = np.asarray(counts.multiply(counts).sum(axis=1))
+            shared_text_squared = (category_counts.multiply(category_counts) @ model['centroids_binary']).toarray()
+            shared_keyword_squared = ((category_counts > 0).astype(float) @ model['centroids_squared']).toarray()
+            text_norms = idf_squared * text_squared - (idf_squared - 1.0) * shared_text_squared
+            keyword_norms = idf_squared * model['norms_squared'] - (idf_squared - 1.0) * shared_keyword_squared
+            denominator = np.sqrt(text_norms * keyword_norms)
+            similarity = np.divide(dot, denominator, out=np.zeros_like(dot), where=denominator > 0)
+            
+            return [
+                {category: float(score) for category, score in zip(model['names'], row)}
+                for row in similarity
+            ]
             
         except Exception as e:
             logger.error(f"Error in job classification: {e}")
-            return {}
+            return []
     
     def calculate_semantic_similarity(self, text1: str, text2: str) -> float:
         """Calculate semantic similarity between two texts"""
         try:
             texts = [self._preprocess_text(text1), self._preprocess_text(text2)]
-            tfidf_matrix = self.skill_vectorizer.fit_transform(texts)
+            # Fit an unfitted copy so the shared instance stays safe across threads
+            tfidf_matrix = clone(self.skill_vectorizer).fit_transform(texts)
             similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
             return float(similarity)
             
@@ -93,8 +138,10 @@ class MLTextClassifier:
             logger.error(f"Error calculating similarity: {e}")
             return 0.0
     
-    def enhanced_skill_matching(self, volunteer_skills: List[str], job_skills: List[str]) -> float:
-        """Enhanced skill matching using semantic similarity"""
+    def enhanced_skill_matching(self, volunteer_skills: List[str], job_skills: List[str],
+                                volunteer_skill_ids: Optional[List[int]] = None,
+                                job_skill_ids: Optional[List[int]] = None) -> float:
+        """Enhanced skill matching using semantic similarity; exact matches compare skill ids, interned from the names if not given"""
         if not volunteer_skills or not job_skills:
             return 0.0
         
@@ -106,11 +153,13 @@ class MLTextClassifier:
             semantic_score = self.calculate_semantic_similarity(vol_text, job_text)
             
             # Calculate exact matches
-            vol_skills_lower = [skill.lower() for skill in volunteer_skills]
-            job_skills_lower = [skill.lower() for skill in job_skills]
+            if volunteer_skill_ids is None:
+                volunteer_skill_ids = skill_ids(volunteer_skills)
+            if job_skill_ids is None:
+                job_skill_ids = skill_ids(job_skills)
             
-            exact_matches = len(set(vol_skills_lower) & set(job_skills_lower))
-            exact_score = exact_matches / len(job_skills_lower)
+            exact_matches = len(set(volunteer_skill_ids) & set(job_skill_ids))
+            exact_score = exact_matches / len(job_skills)
             
             # Combine scores (70% semantic, 30% exact)
             final_score = (semantic_score * 0.7) + (exact_score * 0.3)
@@ -123,56 +172,62 @@ class MLTextClassifier:
     
     def _preprocess_text(self, text: str) -> str:
         """Preprocess text for ML analysis"""
-        if not text:
-            return ""
-        
-        # Convert to lowercase and remove special characters
-        text = re.sub(r'[^a-zA-Z0-9\s+#.]', ' ', text.lower())
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
-    
-    def _calculate_skill_confidence(self, skill: str, text: str) -> float:
-        """Calculate confidence score for extracted skill"""
-        # Count occurrences
-        occurrences = len(re.findall(rf'\b{re.escape(skill)}\b', text, re.IGNORECASE))
-        
-        # Check for context indicators
-        context_indicators = ['experience', 'years', 'proficient', 'expert', 'skilled']
-        context_score = sum(1 for indicator in context_indicators if indicator in text.lower())
-        
-        # Calculate confidence (0.0 to 1.0)
-        confidence = min((occurrences * 0.3) + (context_score * 0.2), 1.0)
-        return max(confidence, 0.1)  # Minimum confidence
-    
-    def _classify_skill_level(self, skill: str, text: str) -> str:
-        """Classify skill level using ML heuristics"""
-        text_lower = text.lower()
-        
-        # Expert indicators
-        if any(word in text_lower for word in ['expert', 'senior', 'lead', 'architect', '5+ years', '10+ years']):
-            return 'expert'
-        
-        # Advanced indicators
-        elif any(word in text_lower for word in ['advanced', 'proficient', '3+ years', '4+ years']):
-            return 'advanced'
-        
-        # Intermediate indicators
-        elif any(word in text_lower for word in ['intermediate', 'experienced', '2+ years', '1+ years']):
-            return 'intermediate'
-        
-        # Default to beginner
-        else:
-            return 'beginner'
-    
-    def _extract_experience_years(self, skill: str, text: str) -> int:
-        """Extract years of experience for a skill"""
-        # Look for patterns like "3 years", "5+ years"
-        pattern = rf'{re.escape(skill)}.*?(\d+)\+?\s*years?'
-        match = re.search(pattern, text, re.IGNORECASE)
-        
-        if match:
-            return int(match.group(1))
-        
-        return 0
\ No newline at end of file
+        return preprocess_text(text)
+
+
+# Process-wide shared classifier
+_classifier: Optional[MLTextClassifier] = None
+_classifier_lock = threading.Lock()
+_classifier_metrics: Dict[str, Any] = {}
+_metrics_hooks: List[Callable[[Dict[str, Any]], None]] = []
+
+
+def get_ml_classifier() -> MLTextClassifier:
+    """Return the shared classifier, building it on first use.
+
+    The instance holds no per-call state (vectorizers are fitted on copies),
+    so agents and request handlers can share it across threads.
+    """
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                started_tracing = not tracemalloc.is_tracing()
+                if started_tracing:
+                    tracemalloc.start()
+                memory_before = tracemalloc.get_traced_memory()[0]
+                start = time.perf_counter()
+
+                classifier = MLTextClassifier()
+
+                _classifier_metrics.update({
+                    'constructor_seconds': time.perf_counter() - start,
+                    'instance_memory_bytes': tracemalloc.get_traced_memory()[0] - memory_before,
+                })
+                if started_tracing:
+                    tracemalloc.stop()
+                _classifier = classifier
+                logger.info(f"ML classifier ready in {_classifier_metrics['constructor_seconds'] * 1000:.1f} ms")
+
+                for hook in _metrics_hooks:
+                    try:
+                        hook(get_classifier_metrics())
+                    except Exception as e:
+                        logger.warning(f"Classifier metrics hook failed: {e}")
+    return _classifier
+
+
+def get_classifier_metrics() -> Dict[str, Any]:
+    """Construction cost and memory of the shared classifier"""
+    return {
+        'loaded': _classifier is not None,
+        'instances_created': MLTextClassifier.instances_created,
+        **_classifier_metrics
+    }
+
+
+def register_metrics_hook(hook: Callable[[Dict[str, Any]], None]):
+    """Call ``hook`` with the classifier metrics once the shared instance is built"""
+    _metrics_hooks.append(hook)
+    if _classifier is not None:
+        hook(get_classifier_metrics())
@@ -42,6 +42,7 @@ class VolunteerJob(BaseModel):
     organization: Optional[str] = None
     location: Optional[str] = None
     skills_required: Optional[List[str]] = None
+    skill_ids_required: Optional[List[int]] = None  # skill ids of skills_required, in the same order
     time_commitment: Optional[str] = None
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
@@ -50,6 +51,9 @@ class VolunteerJob(BaseModel):
     website: Optional[str] = None
     external_id: Optional[str] = None
     source: str = "volunteerconnector.org"
+    categories: Optional[Dict[str, float]] = None
+    content_hash: Optional[str] = None
+    search_tokens: Optional[List[str]] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -60,6 +64,7 @@ class VolunteerJob(BaseModel):
 
 class Skill(BaseModel):
     name: str
+    skill_id: Optional[int] = None
     level: SkillLevel
     years_experience: Optional[int] = None
     verified: bool = False
@@ -108,6 +113,7 @@ class JobMatch(BaseModel):
     location_match_score: float
     interest_match_score: float
     reasons: List[str] = []
+    total_matches: Optional[int] = None  # the volunteer's matches above the threshold across all jobs
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -121,12 +127,10 @@ class CVUploadResponse(BaseModel):
     extracted_skills: Optional[List[str]] = None
     profile_id: Optional[str] = None
 
-class JobRetrievalResponse(BaseModel):
+class JobRetrievalAccepted(BaseModel):
     success: bool
     message: str
-    jobs_retrieved: int
-    jobs_stored: int
-    errors: Optional[List[str]] = None
+    status_url: str
 
 class MatchingResponse(BaseModel):
     success: bool
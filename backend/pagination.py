@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Listings are ordered newest first; _id breaks ties between equal timestamps
+KEYSET_SORT = [('created_at', -1), ('_id', -1)]
+
+
+def _encode(payload: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def _decode(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+    return payload
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just after ``doc`` in KEYSET_SORT order"""
+    created_at = doc.get('created_at')
+    return _encode({'t': created_at.isoformat() if created_at else None, 'id': str(doc['_id'])})
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Opaque cursor for orderings without a usable key, such as text relevance"""
+    return _encode({'o': offset})
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    """Offset stored in a relevance cursor, 0 without one"""
+    if not cursor:
+        return 0
+    offset = _decode(cursor).get('o')
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def keyset_query(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """Restrict ``query`` to documents after ``cursor`` in KEYSET_SORT order"""
+    if not cursor:
+        return query
+
+    payload = _decode(cursor)
+    try:
+        last_id = ObjectId(payload['id'])
+        created_at = datetime.fromisoformat(payload['t']) if payload.get('t') else None
+    except (KeyError, TypeError, ValueError, InvalidId) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+    after = {'$or': [
+        {'created_at': {'$lt': created_at}},
+        {'created_at': created_at, '_id': {'$lt': last_id}}
+    ]}
+    if created_at is not None:
+        # Documents without a timestamp sort last, but no date comparison matches them
+        after['$or'].append({'created_at': None})
+    return {'$and': [query, after]} if query else after
+
+
+async def fetch_page(collection, query: Dict[str, Any], limit: int, cursor: Optional[str] = None,
+                     projection: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of documents in KEYSET_SORT order and the cursor of the next page (None on the last)"""
+    limit = max(limit, 1)
+    page_cursor = collection.find(keyset_query(query, cursor), projection).sort(KEYSET_SORT).limit(limit + 1)
+    docs = await page_cursor.to_list(length=limit + 1)
+
+    # The extra document only tells whether another page exists
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+async def count_total(collection, query: Dict[str, Any]) -> int:
+    """Matching document count; unfiltered listings use the collection metadata estimate"""
+    if not query:
+        return await collection.estimated_document_count()
+    return await collection.count_documents(query)
@@ -0,0 +1,306 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import UploadFile
+from agents.availability_tracker import AvailabilityTrackerAgent
+from services.cv_cache import file_sha256
+from services.cv_extractor import CVExtractionPool
+from services.cv_processor import CVProcessorService
+from services.volunteer_service import VolunteerService
+from config import (
+    BULK_IMPORT_WORKERS, BULK_IMPORT_PROCESSES, BULK_IMPORT_BATCH_SIZE, BULK_IMPORT_MAX_ARCHIVE_BYTES,
+    CV_MAX_UPLOAD_BYTES, CV_UPLOAD_CHUNK_BYTES
+)
+
+logger = logging.getLogger(__name__)
+
+# Looked up in the archive or directory when no manifest is passed separately
+MANIFEST_NAME = 'manifest.csv'
+MANIFEST_COLUMNS = ('filename', 'name', 'email')
+
+# The CV processor of an analysis worker process, built once when the worker starts
+_worker_processor: Optional[CVProcessorService] = None
+
+
+def _start_analysis_worker():
+    global _worker_processor
+    # Workers have no database connection: the cache is consulted by the importing process
+    _worker_processor = CVProcessorService(extraction_pool=None, cache=None)
+
+
+def analyse_cv_file(path: str, filename: str) -> Dict[str, Any]:
+    """Parse, profile and ML-enhance one CV; runs on an analysis worker process"""
+    return asyncio.run(_worker_processor.process_file(path, filename))
+
+
+def read_manifest(text: str) -> List[Dict[str, str]]:
+    """Rows of a CSV manifest; raises ValueError when a required column is missing"""
+    reader = csv.DictReader(io.StringIO(text.lstrip('\ufeff')))
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    missing = [column for column in MANIFEST_COLUMNS if column not in reader.fieldnames]
+    if missing:
+        raise ValueError(f"Manifest is missing columns: {', '.join(missing)}")
+
+    return [{key: (value or '').strip() for key, value in row.items() if key} for row in reader]
+
+
+class DirectorySource:
+    """CV files in a local directory"""
+
+    def __init__(self, directory: str):
+        self.directory = os.path.realpath(directory)
+
+    def manifest_text(self) -> Optional[str]:
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        if not os.path.isfile(path):
+            return None
+        with open(path, encoding='utf-8-sig') as manifest:
+            return manifest.read()
+
+    def fetch(self, filename: str) -> str:
+        """Path of ``filename``; raises ValueError when it is missing, outside the directory or too large"""
+        path = os.path.realpath(os.path.join(self.directory, filename))
+        if os.path.commonpath([self.directory, path]) != self.directory or not os.path.isfile(path):
+            raise ValueError("File not found")
+        if os.path.getsize(path) > CV_MAX_UPLOAD_BYTES:
+            raise ValueError(f"File too large. Maximum size is {CV_MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+        return path
+
+    def release(self, path: str):
+        pass
+
+    def close(self):
+        pass
+
+
+class ZipSource:
+    """CV files in a zip archive, extracted one at a time as they are processed"""
+
+    def __init__(self, zip_path: str):
+        self.archive = zipfile.ZipFile(zip_path)
+        self.workdir = tempfile.mkdtemp(prefix='cv-import-')
+        # Manifests may name files with or without the archive's folder prefix
+        self.members: Dict[str, zipfile.ZipInfo] = {}
+        for info in self.archive.infolist():
+            if not info.is_dir():
+                self.members.setdefault(info.filename, info)
+                self.members.setdefault(os.path.basename(info.filename), info)
+
+    def manifest_text(self) -> Optional[str]:
+        info = self.members.get(MANIFEST_NAME)
+        if info is None:
+            return None
+        return self.archive.read(info).decode('utf-8-sig')
+
+    def fetch(self, filename: str) -> str:
+        """Extract ``filename`` to a temp file; raises ValueError when it is missing or too large"""
+        info = self.members.get(filename)
+        if info is None:
+            raise ValueError("File not found in archive")
+        if info.file_size > CV_MAX_UPLOAD_BYTES:
+            raise ValueError(f"File too large. Maximum size is {CV_MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+
+        # Temp names never come from the archive, so members cannot escape the work directory
+        fd, path = tempfile.mkstemp(dir=self.workdir, suffix=os.path.splitext(filename)[1].lower())
+        size = 0
+        try:
+            with self.archive.open(info) as member, os.fdopen(fd, 'wb') as out:
+                # The header size is not trusted: stop copying at the limit
+                while chunk := member.read(CV_UPLOAD_CHUNK_BYTES):
+                    size += len(chunk)
+                    if size > CV_MAX_UPLOAD_BYTES:
+                        raise ValueError(f"File too large. Maximum size is {CV_MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+                    out.write(chunk)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return path
+
+    def release(self, path: str):
+        os.unlink(path)
+
+    def close(self):
+        self.archive.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class BulkImportService:
+    """Imports many CVs at once: parsed and profiled on worker processes, inserted in batches"""
+
+    def __init__(self, cv_processor: Optional[CVProcessorService] = None,
+                 volunteer_service: Optional[VolunteerService] = None,
+                 workers: int = BULK_IMPORT_WORKERS, processes: int = BULK_IMPORT_PROCESSES,
+                 batch_size: int = BULK_IMPORT_BATCH_SIZE):
+        self.cv_processor = cv_processor or CVProcessorService()
+        self.volunteer_service = volunteer_service or VolunteerService()
+        self.availability_tracker = AvailabilityTrackerAgent()
+        # Same timeout and memory cap as upload parsing; workers load the skill profiler once at start-up
+        self.analysis_pool = CVExtractionPool(workers=max(processes, 1), warmup=_start_analysis_worker)
+        self.workers = max(workers, 1)
+        self.batch_size = max(batch_size, 1)
+
+    def close(self):
+        """Stop the analysis workers"""
+        self.analysis_pool.shutdown()
+
+    async def import_upload(self, archive: UploadFile, manifest: Optional[UploadFile],
+                            uploaded_by: str) -> Dict[str, Any]:
+        """Import an uploaded zip archive, with its manifest uploaded alongside or inside it"""
+        manifest_text = None
+        if manifest is not None:
+            content = await manifest.read(CV_MAX_UPLOAD_BYTES + 1)
+            if len(content) > CV_MAX_UPLOAD_BYTES:
+                return {"success": False, "message": "Manifest too large"}
+            manifest_text = content.decode('utf-8-sig')
+
+        spooled = await self.cv_processor.spool_upload(archive, BULK_IMPORT_MAX_ARCHIVE_BYTES)
+        if spooled is None:
+            return {
+                "success": False,
+                "message": f"Archive too large. Maximum size is {BULK_IMPORT_MAX_ARCHIVE_BYTES // (1024 * 1024)} MB"
+            }
+        path, _ = spooled
+        try:
+            return await self.import_zip(path, manifest_text, uploaded_by)
+        finally:
+            os.unlink(path)
+
+    async def import_zip(self, zip_path: str, manifest_text: Optional[str], uploaded_by: str) -> Dict[str, Any]:
+        """Import the CVs of a zip archive"""
+        try:
+            source = await asyncio.to_thread(ZipSource, zip_path)
+        except zipfile.BadZipFile as e:
+            return {"success": False, "message": f"Invalid zip archive: {str(e)}"}
+        return await self._import(source, manifest_text, uploaded_by)
+
+    async def import_directory(self, directory: str, manifest_text: Optional[str], uploaded_by: str) -> Dict[str, Any]:
+        """Import the CVs of a local directory"""
+        if not os.path.isdir(directory):
+            return {"success": False, "message": f"Not a directory: {directory}"}
+        return await self._import(DirectorySource(directory), manifest_text, uploaded_by)
+
+    async def _import(self, source, manifest_text: Optional[str], uploaded_by: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            if manifest_text is None:
+                manifest_text = await asyncio.to_thread(source.manifest_text)
+            if manifest_text is None:
+                return {"success": False, "message": f"No manifest given and no {MANIFEST_NAME} found"}
+            rows = read_manifest(manifest_text)
+            logger.info(f"Bulk importing {len(rows)} CVs for {uploaded_by}")
+
+            report: List[Dict[str, Any]] = [{} for _ in rows]
+            pending: List[Tuple[int, Dict[str, Any]]] = []
+            queue: asyncio.Queue = asyncio.Queue()
+            for index, row in enumerate(rows):
+                queue.put_nowait((index, row))
+
+            async def worker():
+                while not queue.empty():
+                    index, row = queue.get_nowait()
+                    report[index], profile_data = await self._prepare(source, row, uploaded_by)
+                    if profile_data is not None:
+                        pending.append((index, profile_data))
+                    if len(pending) >= self.batch_size:
+                        batch = pending[:]
+                        pending.clear()
+                        await self._insert(batch, report)
+
+            # Workers keep the analysis processes busy; profiles are inserted a batch at a time
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, len(rows)))))
+            if pending:
+                await self._insert(pending, report)
+
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+        finally:
+            await asyncio.to_thread(source.close)
+
+        imported = sum(1 for entry in report if entry.get('success'))
+        duration = time.perf_counter() - started
+        logger.info(f"Bulk import finished: {imported} of {len(rows)} CVs in {duration:.1f}s")
+        return {
+            "success": True,
+            "message": f"Imported {imported} of {len(rows)} CVs",
+            "total": len(rows),
+            "imported": imported,
+            "failed": len(rows) - imported,
+            "duration_seconds": round(duration, 3),
+            "results": report
+        }
+
+    async def _prepare(self, source, row: Dict[str, str],
+                       uploaded_by: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Report entry and profile data (None on failure) for one manifest row"""
+        filename = row.get('filename', '')
+        entry: Dict[str, Any] = {"filename": filename, "success": False}
+        if not filename or not row.get('name') or not row.get('email'):
+            entry['message'] = "Manifest row needs a filename, name and email"
+            return entry, None
+
+        try:
+            path = await asyncio.to_thread(source.fetch, filename)
+        except (ValueError, OSError, zipfile.BadZipFile) as e:
+            entry['message'] = str(e)
+            return entry, None
+        try:
+            cv_result = await self._analyse(path, filename)
+        except asyncio.TimeoutError:
+            cv_result = {"success": False, "message": f"Processing timed out after {self.analysis_pool.timeout_seconds}s"}
+        except Exception as e:
+            cv_result = {"success": False, "message": f"Error processing CV: {str(e)}"}
+        finally:
+            await asyncio.to_thread(source.release, path)
+
+        if not cv_result['success']:
+            entry['message'] = cv_result['message']
+            return entry, None
+
+        profile_data = {
+            'name': row['name'],
+            'email': row['email'],
+            'phone': row.get('phone') or cv_result['contact_info'].get('phone'),
+            'location': row.get('location') or None,
+            'skills': cv_result['skills'],
+            'cv_text': cv_result['cv_text'],
+            'cv_filename': filename,
+            'experience_summary': cv_result['experience_summary'],
+            'uploaded_by': uploaded_by
+        }
+        # Validated here rather than by the availability tracker, which would cost a write per profile
+        if row.get('availability'):
+            try:
+                slots = self.availability_tracker.validate_slots(json.loads(row['availability']))
+                profile_data['availability'] = [slot.dict() for slot in slots]
+            except Exception as e:
+                logger.warning(f"Failed to parse availability for {filename}: {e}")
+
+        entry['skill_count'] = len(cv_result['skills'])
+        return entry, profile_data
+
+    async def _analyse(self, path: str, filename: str) -> Dict[str, Any]:
+        """Processed CV from the cache, or from an analysis worker"""
+        cache = self.cv_processor.cache
+        cache_key = cache.key(await asyncio.to_thread(file_sha256, path), filename) if cache else None
+        if cache_key:
+            cached = await cache.get(cache_key)
+            if cached:
+                return {"success": True, "message": "CV processed successfully", **cached, "filename": filename}
+
+        cv_result = await self.analysis_pool.run(analyse_cv_file, path, filename)
+        if cache_key and cv_result['success']:
+            await cache.put(cache_key, cv_result)
+        return cv_result
+
+    async def _insert(self, batch: List[Tuple[int, Dict[str, Any]]], report: List[Dict[str, Any]]):
+        results = await self.volunteer_service.create_profiles([profile_data for _, profile_data in batch])
+        for (index, _), result in zip(batch, results):
+            report[index].update(result)
@@ -0,0 +1,117 @@
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Any, Optional
+from pymongo import ReturnDocument
+from database import get_database
+from models import Skill
+from services.cv_extractor import EXTRACTOR_VERSION
+from skill_taxonomy import get_skill_taxonomy
+from config import CV_CACHE_ENABLED, CV_CACHE_MAX_ENTRIES, CV_MAX_PAGES, CV_MAX_TEXT_CHARS, CV_UPLOAD_CHUNK_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Everything a processed CV yields that does not depend on the upload request
+CACHED_FIELDS = ('cv_text', 'skills', 'skill_count', 'categories_found', 'contact_info', 'experience_summary')
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(CV_UPLOAD_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CVCache:
+    """Processed CV results in Mongo, keyed by file content hash and extractor version, evicted LRU"""
+
+    def __init__(self, enabled: bool = CV_CACHE_ENABLED, max_entries: int = CV_CACHE_MAX_ENTRIES):
+        self.db = None
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+
+    async def _ensure_db_connection(self):
+        if self.db is None:
+            self.db = get_database()
+
+    def key(self, content_hash: str, filename: str) -> str:
+        """Cache key of a file; extraction limits, taxonomy revision and format are part of it because they change the result"""
+        extension = os.path.splitext(filename)[1].lower()
+        taxonomy = get_skill_taxonomy().revision
+        return f"v{EXTRACTOR_VERSION}:{taxonomy}:{CV_MAX_PAGES}:{CV_MAX_TEXT_CHARS}:{extension}:{content_hash}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for ``key``, marking it recently used; None on a miss"""
+        if not self.enabled:
+            return None
+        try:
+            await self._ensure_db_connection()
+            entry = await self.db.cv_cache.find_one_and_update(
+                {'_id': key},
+                {'$set': {'last_used_at': datetime.utcnow()}},
+                projection={field: 1 for field in CACHED_FIELDS},
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"CV cache lookup failed: {e}")
+            return None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        result = {field: entry.get(field) for field in CACHED_FIELDS}
+        result['skills'] = [Skill(**skill) for skill in result['skills'] or []]
+        return result
+
+    async def put(self, key: str, result: Dict[str, Any]):
+        """Store a processed CV, evicting the least recently used entries beyond ``max_entries``"""
+        if not self.enabled:
+            return
+        try:
+            await self._ensure_db_connection()
+            entry = {field: result.get(field) for field in CACHED_FIELDS}
+            entry['skills'] = [skill.dict() if hasattr(skill, 'dict') else skill for skill in entry['skills'] or []]
+            entry['last_used_at'] = datetime.utcnow()
+            await self.db.cv_cache.replace_one({'_id': key}, entry, upsert=True)
+            self.stores += 1
+
+            excess = await self.db.cv_cache.estimated_document_count() - self.max_entries
+            if excess > 0:
+                oldest = await self.db.cv_cache.find({}, {'_id': 1}).sort('last_used_at', 1).limit(excess).to_list(length=excess)
+                deleted = await self.db.cv_cache.delete_many({'_id': {'$in': [doc['_id'] for doc in oldest]}})
+                self.evictions += deleted.deleted_count
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"CV cache store failed: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Hit and miss counts of this process"""
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'extractor_version': EXTRACTOR_VERSION,
+            'taxonomy_revision': get_skill_taxonomy().revision,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'miss_rate': round(self.misses / lookups, 4) if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'errors': self.errors
+        }
+
+
+# Shared by every CV processor in the server process
+cv_cache = CVCache()
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, Optional
+import PyPDF2
+import docx
+from config import (
+    CV_EXTRACT_WORKERS, CV_EXTRACT_TIMEOUT_SECONDS, CV_EXTRACT_MEMORY_LIMIT_MB,
+    CV_MAX_PAGES, CV_MAX_TEXT_CHARS
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction or skill profiling changes, so cached CV results are recomputed
+EXTRACTOR_VERSION = 4
+
+
+def _address_space_bytes() -> int:
+    """Current virtual size of this process (Linux), 0 when unknown"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _limit_worker_memory(headroom_bytes: int):
+    """Cap the worker's address space so a pathological file fails with MemoryError instead of starving the host"""
+    try:
+        import resource
+        # Headroom above what the worker already maps after startup imports
+        limit_bytes = _address_space_bytes() + headroom_bytes
+        resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, limit_bytes))
+    except (ImportError, ValueError, OSError) as e:
+        # resource is POSIX only, and some hosts refuse the limit
+        logging.getLogger(__name__).warning(f"Could not cap CV extraction worker memory: {e}")
+
+
+def _start_worker(headroom_bytes: int, warmup: Optional[Callable[[], Any]]):
+    # Warm-up (imports, model loading) runs before the cap is measured, so it does not eat into the headroom
+    if warmup is not None:
+        warmup()
+    _limit_worker_memory(headroom_bytes)
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def _join_limited(pieces: Iterable[str], max_chars: int) -> str:
+    """Join text pieces, stopping as soon as ``max_chars`` characters are collected"""
+    parts = []
+    total = 0
+    for piece in pieces:
+        parts.append(piece)
+        total += len(piece) + 1
+        if total >= max_chars:
+            break
+
+    return "\n".join(parts)[:max_chars].strip()
+
+
+def extract_pdf_text(path: str, max_pages: int = CV_MAX_PAGES, max_chars: int = CV_MAX_TEXT_CHARS) -> str:
+    """Extract text from PDF file, page by page up to the page and character limits"""
+    # An open file rather than a path: PyPDF2 reads a path fully into memory, a file object by seeking
+    with open(path, 'rb') as pdf_file:
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        pages = (pdf_reader.pages[i].extract_text() for i in range(min(len(pdf_reader.pages), max_pages)))
+        return _join_limited(pages, max_chars)
+
+
+def extract_docx_text(path: str, max_chars: int = CV_MAX_TEXT_CHARS) -> str:
+    """Extract text from DOCX file up to the character limit"""
+    doc = docx.Document(path)
+    return _join_limited((paragraph.text for paragraph in doc.paragraphs), max_chars)
+
+
+def extract_txt_text(path: str, max_chars: int = CV_MAX_TEXT_CHARS) -> str:
+    """Read a plain-text CV up to the character limit"""
+    with open(path, encoding='utf-8') as txt_file:
+        return txt_file.read(max_chars)
+
+
+class CVExtractionPool:
+    """Bounded process pool that parses CV files off the event loop with a per-file timeout and memory cap"""
+
+    def __init__(self, workers: int = CV_EXTRACT_WORKERS, timeout_seconds: float = CV_EXTRACT_TIMEOUT_SECONDS,
+                 memory_limit_mb: int = CV_EXTRACT_MEMORY_LIMIT_MB, warmup: Optional[Callable[[], Any]] = None):
+        self.workers = workers
+        self.timeout_seconds = timeout_seconds
+        self.memory_headroom_bytes = memory_limit_mb * 1024 * 1024
+        self.warmup = warmup
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # One file per worker at a time, so the timeout only counts parsing, not queueing
+        self._slots = asyncio.Semaphore(workers)
+        self._starting = asyncio.Lock()
+
+    async def _get_pool(self) -> ProcessPoolExecutor:
+        async with self._starting:
+            if self._pool is None:
+                # Spawned rather than forked: workers must not inherit the server's event loop, threads or sockets
+                pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_start_worker,
+                    initargs=(self.memory_headroom_bytes, self.warmup)
+                )
+                # Start every worker up front so process start-up never counts against a file's timeout
+                loop = asyncio.get_running_loop()
+                await asyncio.gather(*(loop.run_in_executor(pool, _worker_ready) for _ in range(self.workers)))
+                self._pool = pool
+            return self._pool
+
+    def _restart(self):
+        """Kill the workers; a parse stuck on a pathological file cannot be cancelled any other way"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            for process in list(pool._processes.values()):
+                process.kill()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run ``func(*args)`` on a worker, raising TimeoutError after ``timeout_seconds``"""
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            for attempt in range(2):
+                pool = await self._get_pool()
+                try:
+                    return await asyncio.wait_for(loop.run_in_executor(pool, func, *args), self.timeout_seconds)
+                except asyncio.TimeoutError:
+                    if self._pool is pool:
+                        self._restart()
+                    raise
+                except BrokenProcessPool:
+                    # Another file's timeout killed this worker mid-parse: retry once on a fresh pool
+                    if self._pool is pool:
+                        self._restart()
+                    if attempt == 1:
+                        raise
+
+    def shutdown(self):
+        """Stop the workers"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Shared by every CV processor in the server process
+cv_extraction_pool = CVExtractionPool()
@@ -1,18 +1,28 @@
-import io
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+import os
+import tempfile
+from typing import Dict, Any, Optional, Tuple
 from fastapi import UploadFile
-import PyPDF2
-import docx
 from agents.skill_profiler import SkillProfilerAgent
+from services.cv_extractor import (
+    CVExtractionPool, cv_extraction_pool, extract_pdf_text, extract_docx_text, extract_txt_text
+)
+from services.cv_cache import CVCache, cv_cache
+from config import CV_MAX_UPLOAD_BYTES, CV_UPLOAD_CHUNK_BYTES
 
 logger = logging.getLogger(__name__)
 
 class CVProcessorService:
     """Service for processing uploaded CV files"""
     
-    def __init__(self):
+    def __init__(self, extraction_pool: Optional[CVExtractionPool] = cv_extraction_pool,
+                 cache: Optional[CVCache] = cv_cache):
         self.skill_profiler = SkillProfilerAgent()
+        # None parses in this process, for processors that already run on a worker
+        self.extraction_pool = extraction_pool
+        self.cache = cache
         self.supported_formats = ['.pdf', '.docx', '.txt']
     
     async def process_cv(self, file: UploadFile) -> Dict[str, Any]:
@@ -27,22 +37,59 @@ class CVProcessorService:
                     "message": f"Unsupported file format. Supported formats: {', '.join(self.supported_formats)}"
                 }
             
+            # Spool the upload to disk, then process the file
+            spooled = await self.spool_upload(file)
+            if spooled is None:
+                return {
+                    "success": False,
+                    "message": f"File too large. Maximum size is {CV_MAX_UPLOAD_BYTES // (1024 * 1024)} MB"
+                }
+            path, content_hash = spooled
+            try:
+                return await self.process_file(path, file.filename, content_hash)
+            finally:
+                os.unlink(path)
+            
+        except Exception as e:
+            logger.error(f"Error processing CV: {e}")
+            return {
+                "success": False,
+                "message": f"Error processing CV: {str(e)}"
+            }
+    
+    async def process_file(self, path: str, filename: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Process a CV file already on disk and extract information, reusing the cached result of identical files"""
+        try:
+            if not self._is_supported_format(filename):
+                return {
+                    "success": False,
+                    "message": f"Unsupported file format. Supported formats: {', '.join(self.supported_formats)}"
+                }
+            
+            # A re-upload of the same bytes skips parsing and all ML work
+            cache_key = self.cache.key(content_hash, filename) if self.cache and content_hash else None
+            if cache_key:
+                cached = await self.cache.get(cache_key)
+                if cached:
+                    logger.info(f"CV cache hit for {filename}")
+                    return {"success": True, "message": "CV processed successfully", **cached, "filename": filename}
+            
             # Extract text from file
-            text_content = await self._extract_text(file)
+            text_content = await self._extract_text(path, filename)
             if not text_content:
                 return {
                     "success": False,
                     "message": "Could not extract text from the file"
                 }
             
-            # Process with skill profiler agent
+            # Process with skill profiler agent: taxonomy and skills-section stages in one pass
             skill_analysis = await self.skill_profiler.process(text_content)
             
             # Extract additional information
             contact_info = self._extract_contact_info(text_content)
             experience_summary = self._extract_experience_summary(text_content)
             
-            return {
+            cv_result = {
                 "success": True,
                 "message": "CV processed successfully",
                 "cv_text": text_content,
@@ -51,9 +98,13 @@ class CVProcessorService:
                 "categories_found": skill_analysis.get('categories_found', []),
                 "contact_info": contact_info,
                 "experience_summary": experience_summary,
-                "filename": file.filename
+                "filename": filename
             }
             
+            if cache_key:
+                await self.cache.put(cache_key, cv_result)
+            return cv_result
+            
         except Exception as e:
             logger.error(f"Error processing CV: {e}")
             return {
@@ -68,18 +119,43 @@ class CVProcessorService:
         
         return any(filename.lower().endswith(fmt) for fmt in self.supported_formats)
     
-    async def _extract_text(self, file: UploadFile) -> Optional[str]:
-        """Extract text from uploaded file based on format"""
+    async def spool_upload(self, file: UploadFile, max_bytes: int = CV_MAX_UPLOAD_BYTES) -> Optional[Tuple[str, str]]:
+        """Copy the upload to a temp file chunk by chunk, returning its path and SHA-256;
+        None (and no file) when it exceeds ``max_bytes``"""
+        suffix = os.path.splitext(file.filename)[1].lower()
+        spool = tempfile.NamedTemporaryFile(prefix='cv-', suffix=suffix, delete=False)
+        digest = hashlib.sha256()
+        size = 0
+        complete = False
+        try:
+            while True:
+                chunk = await file.read(CV_UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    complete = True
+                    return spool.name, digest.hexdigest()
+                size += len(chunk)
+                if size > max_bytes:
+                    logger.warning(f"Rejected upload {file.filename}: larger than {max_bytes} bytes")
+                    return None
+                digest.update(chunk)
+                await asyncio.to_thread(spool.write, chunk)
+            
+        finally:
+            spool.close()
+            if not complete:
+                os.unlink(spool.name)
+    
+    async def _extract_text(self, path: str, filename: str) -> Optional[str]:
+        """Extract text from spooled upload based on format"""
         try:
-            content = await file.read()
-            filename = file.filename.lower()
+            filename = filename.lower()
             
             if filename.endswith('.pdf'):
-                return self._extract_from_pdf(content)
+                return await self._extract_from_pdf(path)
             elif filename.endswith('.docx'):
-                return self._extract_from_docx(content)
+                return await self._extract_from_docx(path)
             elif filename.endswith('.txt'):
-                return content.decode('utf-8')
+                return await asyncio.to_thread(extract_txt_text, path)
             
             return None
             
@@ -87,34 +163,30 @@ class CVProcessorService:
             logger.error(f"Error extracting text: {e}")
             return None
     
-    def _extract_from_pdf(self, content: bytes) -> Optional[str]:
-        """Extract text from PDF file"""
+    async def _extract_from_pdf(self, path: str) -> Optional[str]:
+        """Extract text from PDF file on the extraction pool"""
         try:
-            pdf_file = io.BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
+            if self.extraction_pool is None:
+                return extract_pdf_text(path)
+            return await self.extraction_pool.run(extract_pdf_text, path)
             
+        except asyncio.TimeoutError:
+            logger.error(f"PDF extraction timed out after {self.extraction_pool.timeout_seconds}s")
+            return None
         except Exception as e:
             logger.error(f"Error extracting from PDF: {e}")
             return None
     
-    def _extract_from_docx(self, content: bytes) -> Optional[str]:
-        """Extract text from DOCX file"""
+    async def _extract_from_docx(self, path: str) -> Optional[str]:
+        """Extract text from DOCX file on the extraction pool"""
         try:
-            doc_file = io.BytesIO(content)
-            doc = docx.Document(doc_file)
-            
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            return text.strip()
+            if self.extraction_pool is None:
+                return extract_docx_text(path)
+            return await self.extraction_pool.run(extract_docx_text, path)
             
+        except asyncio.TimeoutError:
+            logger.error(f"DOCX extraction timed out after {self.extraction_pool.timeout_seconds}s")
+            return None
         except Exception as e:
             logger.error(f"Error extracting from DOCX: {e}")
             return None
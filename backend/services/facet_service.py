@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Optional
+from database import get_database
+from config import FACET_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Facet name -> job field it groups on
+FACET_FIELDS = {
+    'locations': 'location',
+    'skills': 'skills_required',
+    'organizations': 'organization'
+}
+
+class FacetService:
+    """Distinct job filter values with job counts, computed by one aggregation and cached"""
+
+    def __init__(self, ttl_seconds: float = FACET_CACHE_TTL_SECONDS):
+        self.db = None
+        self.ttl_seconds = ttl_seconds
+        self._facets: Optional[Dict[str, Any]] = None
+        self._computed_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _ensure_db_connection(self):
+        if self.db is None:
+            self.db = get_database()
+
+    def invalidate(self):
+        """Drop the cached facets; the next read recomputes them"""
+        self._facets = None
+
+    def _is_fresh(self) -> bool:
+        return self._facets is not None and time.monotonic() - self._computed_at < self.ttl_seconds
+
+    async def get_facets(self) -> Dict[str, Any]:
+        """Cached facets, recomputed once per TTL or after ingestion invalidated them"""
+        if self._is_fresh():
+            return self._facets
+
+        async with self._lock:
+            # Another request may have recomputed while this one waited
+            if not self._is_fresh():
+                self._facets = await self._compute()
+                self._computed_at = time.monotonic()
+            return self._facets
+
+    def _facet_pipeline(self, field: str) -> List[Dict[str, Any]]:
+        stages = [{'$unwind': f'${field}'}] if field == 'skills_required' else []
+        return stages + [
+            {'$match': {field: {'$nin': [None, '']}}},
+            {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}},
+            {'$sort': {'_id': 1}}
+        ]
+
+    async def _compute(self) -> Dict[str, Any]:
+        await self._ensure_db_connection()
+        pipeline = [
+            {'$project': {field: 1 for field in FACET_FIELDS.values()}},
+            {'$facet': {name: self._facet_pipeline(field) for name, field in FACET_FIELDS.items()}}
+        ]
+        cursor = self.db.volunteer_jobs.aggregate(pipeline, allowDiskUse=True)
+        result = (await cursor.to_list(length=1) or [{}])[0]
+
+        facets: Dict[str, Any] = {}
+        counts: Dict[str, Dict[str, int]] = {}
+        for name in FACET_FIELDS:
+            groups = result.get(name, [])
+            facets[name] = [group['_id'] for group in groups]
+            counts[name] = {group['_id']: group['count'] for group in groups}
+        facets['counts'] = counts
+
+        logger.info(f"Computed job facets: { {name: len(facets[name]) for name in FACET_FIELDS} }")
+        return facets
+
+
+# Shared cache, invalidated by JobService.store_jobs
+facet_service = FacetService()
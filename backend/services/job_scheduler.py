@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from pymongo.errors import DuplicateKeyError
+from config import (JOB_REFRESH_ENABLED, JOB_REFRESH_INTERVAL_SECONDS, JOB_REFRESH_JITTER_SECONDS,
+                    JOB_REFRESH_LIMIT, JOB_REFRESH_LEASE_SECONDS)
+from database import get_database
+from services.job_service import JobService
+from services.rematch_service import RematchService
+
+logger = logging.getLogger(__name__)
+
+# pipeline_state document leasing job refreshes to one replica at a time
+REFRESH_LEASE_ID = 'job_refresh_lease'
+
+class JobRefreshScheduler:
+    """Background loop that refreshes the job catalogue on a jittered interval, one refresh at a time.
+
+    The asyncio lock keeps refreshes in this process from overlapping; a lease
+    in ``pipeline_state`` does the same across replicas, which all share the
+    ``job_ingest`` checkpoint. A refresh that stores or changes jobs is
+    followed by an incremental rematch, so materialized matches catch up.
+    """
+
+    def __init__(self, job_service: JobService, interval_seconds: float = JOB_REFRESH_INTERVAL_SECONDS,
+                 jitter_seconds: float = JOB_REFRESH_JITTER_SECONDS, limit: int = JOB_REFRESH_LIMIT,
+                 enabled: bool = JOB_REFRESH_ENABLED, lease_seconds: float = JOB_REFRESH_LEASE_SECONDS,
+                 rematch_service: Optional[RematchService] = None):
+        self.job_service = job_service
+        self.rematch_service = rematch_service
+        self.interval_seconds = interval_seconds
+        self.jitter_seconds = jitter_seconds
+        self.limit = limit
+        self.enabled = enabled
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._triggered: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {
+            'enabled': enabled,
+            'running': False,
+            'triggered': False,
+            'runs': 0,
+            'failures': 0,
+            'record_errors': 0,
+            'skipped_overlaps': 0,
+            'skipped_leased': 0,
+            'next_run_at': None,
+            'last_started_at': None,
+            'last_finished_at': None,
+            'last_duration_seconds': None,
+            'last_jobs_retrieved': None,
+            'last_jobs_per_second': None,
+            'last_success': None,
+            'last_message': None,
+            'last_result': None,
+            'last_rematch': None
+        }
+
+    def start(self):
+        """Start the refresh loop on the running event loop"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info(f"Job refresh scheduled every {self.interval_seconds}s (±{self.jitter_seconds}s)")
+
+    async def stop(self):
+        """Cancel the refresh loop and any triggered refresh, interrupting a refresh in progress"""
+        for task in (self._task, self._triggered):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._triggered = None
+
+    def trigger(self, limit: Optional[int] = None, resume: bool = True) -> bool:
+        """Start one refresh in the background, or return False when a refresh is already in flight here"""
+        if self._lock.locked() or (self._triggered is not None and not self._triggered.done()):
+            self.stats['skipped_overlaps'] += 1
+            logger.info("Job refresh already running, not triggering another")
+            return False
+
+        self.stats['triggered'] = True
+        self._triggered = asyncio.create_task(self._run_triggered(limit, resume))
+        return True
+
+    async def _run_triggered(self, limit: Optional[int], resume: bool):
+        try:
+            await self.run_once(limit, resume=resume)
+        except Exception as e:
+            logger.error(f"Error in triggered job refresh: {e}")
+        finally:
+            self.stats['triggered'] = False
+
+    async def _acquire_lease(self) -> bool:
+        """Take the refresh lease unless another replica holds an unexpired one"""
+        now = datetime.utcnow()
+        try:
+            # Upserting a held lease collides with its _id instead of matching it
+            await get_database().pipeline_state.update_one(
+                {'_id': REFRESH_LEASE_ID, '$or': [{'expires_at': {'$lte': now}}, {'owner': self.owner}]},
+                {'$set': {'owner': self.owner, 'acquired_at': now,
+                          'expires_at': now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _renew_lease(self):
+        """Extend the lease while a refresh runs, so a long crawl is not taken over mid-way"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            result = await get_database().pipeline_state.update_one(
+                {'_id': REFRESH_LEASE_ID, 'owner': self.owner},
+                {'$set': {'expires_at': datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+            )
+            if not result.matched_count:
+                logger.warning("Job refresh lease lost to another replica")
+
+    async def _release_lease(self):
+        await get_database().pipeline_state.update_one(
+            {'_id': REFRESH_LEASE_ID, 'owner': self.owner},
+            {'$set': {'expires_at': datetime.utcnow()}}
+        )
+
+    def _next_delay(self) -> float:
+        # Jitter spreads the replicas' attempts; the lease lets only one of them refresh at a time
+        return max(self.interval_seconds + random.uniform(-self.jitter_seconds, self.jitter_seconds), 0.0)
+
+    async def _run_forever(self):
+        # First refresh soon after startup, spread by the jitter alone
+        delay = random.uniform(0, self.jitter_seconds)
+        while True:
+            self.stats['next_run_at'] = datetime.utcnow() + timedelta(seconds=delay)
+            await asyncio.sleep(delay)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Error in scheduled job refresh: {e}")
+            delay = self._next_delay()
+
+    async def run_once(self, limit: Optional[int] = None, resume: bool = True) -> Optional[Dict[str, Any]]:
+        """Run one refresh, or return None when another refresh is already in flight here or on another replica"""
+        if self._lock.locked():
+            self.stats['skipped_overlaps'] += 1
+            logger.info("Job refresh already running, skipping")
+            return None
+
+        async with self._lock:
+            if not await self._acquire_lease():
+                self.stats['skipped_leased'] += 1
+                logger.info("Job refresh running on another replica, skipping")
+                return None
+            renewal = asyncio.create_task(self._renew_lease())
+            try:
+                return await self._refresh(limit, resume)
+            finally:
+                renewal.cancel()
+                await self._release_lease()
+
+    async def _refresh(self, limit: Optional[int], resume: bool) -> Dict[str, Any]:
+        """One refresh with its timing and counters, under the lock and the lease"""
+        self.stats['running'] = True
+        self.stats['last_started_at'] = datetime.utcnow()
+        started = time.perf_counter()
+        try:
+            result = await self.job_service.retrieve_and_store_jobs(limit or self.limit, resume=resume)
+        finally:
+            duration = time.perf_counter() - started
+            self.stats['running'] = False
+            self.stats['last_finished_at'] = datetime.utcnow()
+            self.stats['last_duration_seconds'] = round(duration, 3)
+            self.stats['runs'] += 1
+
+        self.stats['last_success'] = result['success']
+        self.stats['last_message'] = result['message']
+        self.stats['last_result'] = result
+        self.stats['last_jobs_retrieved'] = result['jobs_retrieved']
+        self.stats['last_jobs_per_second'] = round(result['jobs_retrieved'] / duration, 2) if duration > 0 else None
+        if not result['success']:
+            self.stats['failures'] += 1
+        self.stats['record_errors'] += len(result.get('errors') or [])
+
+        if self.rematch_service is not None and (result['jobs_stored'] or result['jobs_updated']):
+            rematch = await self.rematch_service.run()
+            self.stats['last_rematch'] = rematch['message'] if rematch else 'Rematch already running'
+        return result
+
+    def get_status(self) -> Dict[str, Any]:
+        """Refresh counters and last-run timings"""
+        return dict(self.stats)
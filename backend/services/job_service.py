@@ -1,18 +1,172 @@
-import requests
+import asyncio
+import hashlib
+import httpx
+import json
 import logging
-from typing import List, Dict, Any
+import math
+import multiprocessing
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pydantic import TypeAdapter, ValidationError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from datetime import datetime
 from models import VolunteerJob
 from database import get_database
-from config import VOLUNTEER_API_URL
+from config import (VOLUNTEER_API_URL, API_TIMEOUT_SECONDS, API_CONCURRENCY, API_MAX_RETRIES,
+                    API_BACKOFF_SECONDS, INGEST_QUEUE_PAGES, JOB_TRANSFORM_WORKERS,
+                    JOB_TRANSFORM_POOL_MIN_RECORDS, JOB_WRITE_BATCH_SIZE)
+from match_index import job_index
+from services.facet_service import facet_service
+from ml_classifier import get_ml_classifier
+from skill_taxonomy import skill_ids
 
 logger = logging.getLogger(__name__)
 
+# Responses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# pipeline_state document holding the ingestion checkpoint
+INGEST_STATE_ID = 'job_ingest'
+
+# Bump whenever the fingerprinted fields or the derived data stored with a job change,
+# so the next refresh rewrites every job once
+FINGERPRINT_VERSION = 3
+
+# Bookkeeping and derived fields left out of the content fingerprint
+FINGERPRINT_EXCLUDE = {'id', 'created_at', 'updated_at', 'categories', 'content_hash', 'search_tokens', 'skill_ids_required'}
+
+SEARCH_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Validates a whole page of normalised records in one call
+VOLUNTEER_JOB_LIST = TypeAdapter(List[VolunteerJob])
+
+
+def search_tokens(text: str) -> List[str]:
+    """Distinct lowercase word tokens, as stored on jobs for prefix search"""
+    return list(dict.fromkeys(SEARCH_TOKEN_PATTERN.findall(text.lower())))
+
+
+# Job document fields that make up its searchable text
+SEARCH_FIELDS = ('title', 'organization', 'location', 'skills_required', 'description')
+
+
+def job_search_text(job: Dict[str, Any]) -> str:
+    """Searchable text of a job document"""
+    return ' '.join([job.get('title') or '', job.get('organization') or '', job.get('location') or '',
+                     ' '.join(job.get('skills_required') or []), job.get('description') or ''])
+
+
+def job_fingerprint(job: VolunteerJob) -> str:
+    """Stable hash of a job's source content"""
+    content = job.dict(exclude=FINGERPRINT_EXCLUDE)
+    payload = json.dumps([FINGERPRINT_VERSION, content], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def normalise_job_record(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Clean one API job record into VolunteerJob fields (module level so worker processes can run it)
+    """
+    # Extract and clean the data
+    title = job_data.get('title', job_data.get('name', 'Untitled Position'))
+    description = job_data.get('description', job_data.get('summary', ''))
+    
+    # Handle organization - can be string or dict with 'name' field
+    org_data = job_data.get('organization', job_data.get('org_name', ''))
+    if isinstance(org_data, dict):
+        organization = org_data.get('name', '')
+    else:
+        organization = str(org_data) if org_data else ''
+    
+    # Handle location - extract from audience or use location field
+    location = job_data.get('location', job_data.get('city', ''))
+    if not location:
+        audience = job_data.get('audience', {})
+        if isinstance(audience, dict):
+            regions = audience.get('regions', [])
+            if regions:
+                location = ', '.join(regions)
+    
+    # Handle skills - extract from activities or skills field
+    skills_required = []
+    
+    # First try to get from activities field
+    activities = job_data.get('activities', [])
+    if isinstance(activities, list):
+        for activity in activities:
+            if isinstance(activity, dict):
+                activity_name = activity.get('name', '')
+                if activity_name:
+                    skills_required.append(activity_name)
+    
+    # If no activities, try skills field
+    if not skills_required:
+        skills_raw = job_data.get('skills', job_data.get('skills_required', ''))
+        if isinstance(skills_raw, str):
+            skills_required = [skill.strip() for skill in skills_raw.split(',') if skill.strip()]
+        elif isinstance(skills_raw, list):
+            skills_required = [str(skill).strip() for skill in skills_raw if skill]
+    
+    # Handle dates
+    start_date = None
+    end_date = None
+    if job_data.get('start_date'):
+        try:
+            start_date = datetime.fromisoformat(job_data['start_date'].replace('Z', '+00:00'))
+        except:
+            pass
+    
+    if job_data.get('end_date'):
+        try:
+            end_date = datetime.fromisoformat(job_data['end_date'].replace('Z', '+00:00'))
+        except:
+            pass
+    
+    return dict(
+        title=title,
+        description=description,
+        organization=organization,
+        location=location,
+        skills_required=skills_required,
+        time_commitment=job_data.get('duration', job_data.get('time_commitment', job_data.get('hours_per_week', ''))),
+        start_date=start_date,
+        end_date=end_date,
+        contact_email=job_data.get('contact_email', job_data.get('email', '')),
+        contact_phone=job_data.get('contact_phone', job_data.get('phone', '')),
+        website=job_data.get('website', job_data.get('url', '')),
+        external_id=str(job_data.get('id', job_data.get('_id', ''))),
+        source="volunteerconnector.org"
+    )
+
+
+def normalise_job_records(records: List[Dict[str, Any]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Normalise a chunk of records, pairing each with its cleaned fields or its error message"""
+    results = []
+    for job_data in records:
+        try:
+            results.append((normalise_job_record(job_data), None))
+        except Exception as e:
+            results.append((None, f"Error transforming job {job_data.get('id', 'unknown')}: {str(e)}"))
+    return results
+
+
 class JobService:
-    def __init__(self):
-        self.api_url = VOLUNTEER_API_URL
+    def __init__(self, api_url: str = VOLUNTEER_API_URL, concurrency: int = API_CONCURRENCY,
+                 max_retries: int = API_MAX_RETRIES, backoff_seconds: float = API_BACKOFF_SECONDS,
+                 transform_workers: int = JOB_TRANSFORM_WORKERS):
+        self.api_url = api_url
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.transform_workers = transform_workers
+        self._transform_pool: Optional[ProcessPoolExecutor] = None
         self.db = None
         self.jobs_collection = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._request_slots = asyncio.Semaphore(concurrency)
 
     async def _ensure_db_connection(self):
         """Ensure database connection is established"""
@@ -20,6 +174,105 @@ class JobService:
             self.db = get_database()
             self.jobs_collection = self.db.volunteer_jobs
 
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=API_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            headers={
+                'User-Agent': 'VolunteerMatchingSystem/1.0',
+                'Accept': 'application/json'
+            }
+        )
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive client shared by every API request"""
+        if self._client is None:
+            # Building the client loads the TLS trust store; keep that off the event loop
+            client = await asyncio.to_thread(self._build_client)
+            if self._client is None:
+                self._client = client
+            else:
+                await client.aclose()
+        return self._client
+
+    async def close(self):
+        """Close the pooled HTTP client and the transform worker pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._transform_pool is not None:
+            self._transform_pool.shutdown(wait=False, cancel_futures=True)
+            self._transform_pool = None
+
+    async def _fetch_page(self, params: Dict[str, Any]) -> Any:
+        """
+        GET one API page, retrying transient failures with exponential backoff
+        """
+        client = await self._get_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._request_slots:
+                    response = await client.get(self.api_url, params=params)
+                response.raise_for_status()
+                return response.json()
+                
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    raise
+                error = e
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise
+                error = e
+            
+            delay = self.backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.5)
+            logger.warning(f"API request {params} failed ({error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _extract_jobs(self, data: Any) -> List[Dict[str, Any]]:
+        """
+        Pull the job list out of an API response
+        """
+        # Handle different response formats
+        if isinstance(data, dict):
+            if 'results' in data:
+                return data['results']
+            elif 'data' in data:
+                return data['data']
+            elif 'jobs' in data:
+                return data['jobs']
+            else:
+                return [data]  # Single job object
+        elif isinstance(data, list):
+            return data
+        else:
+            logger.warning(f"Unexpected API response format: {type(data)}")
+            return []
+
+    def _page_params(self, page: int, limit: int) -> Dict[str, Any]:
+        return {'limit': limit} if page == 1 else {'limit': limit, 'page': page}
+
+    async def iter_job_pages(self, limit: int = 100, start_page: int = 1) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Yield (page, jobs) in page order, fetching up to ``concurrency`` pages at a time
+        """
+        first_page = await self._fetch_page(self._page_params(start_page, limit))
+        jobs = self._extract_jobs(first_page)
+        yield start_page, jobs
+        
+        # Only paginated responses that report a total count have further pages
+        if not (isinstance(first_page, dict) and first_page.get('next') and first_page.get('count') and jobs):
+            return
+        
+        last_page = math.ceil(min(limit, first_page['count']) / len(jobs))
+        page = start_page + 1
+        while page <= last_page:
+            window = range(page, min(page + self.concurrency, last_page + 1))
+            pages = await asyncio.gather(*(self._fetch_page(self._page_params(p, limit)) for p in window))
+            for window_page, page_data in zip(window, pages):
+                yield window_page, self._extract_jobs(page_data)
+            page = window.stop
+
     async def fetch_jobs_from_api(self, limit: int = 100) -> List[Dict[str, Any]]:
         """
         Fetch volunteer jobs from the external API
@@ -27,40 +280,15 @@ class JobService:
         try:
             logger.info(f"Fetching jobs from {self.api_url}")
             
-            # Make request to the API
-            response = requests.get(
-                self.api_url,
-                params={'limit': limit},
-                timeout=30,
-                headers={
-                    'User-Agent': 'VolunteerMatchingSystem/1.0',
-                    'Accept': 'application/json'
-                }
-            )
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            # Handle different response formats
-            if isinstance(data, dict):
-                if 'results' in data:
-                    jobs = data['results']
-                elif 'data' in data:
-                    jobs = data['data']
-                elif 'jobs' in data:
-                    jobs = data['jobs']
-                else:
-                    jobs = [data]  # Single job object
-            elif isinstance(data, list):
-                jobs = data
-            else:
-                logger.warning(f"Unexpected API response format: {type(data)}")
-                jobs = []
+            jobs = []
+            async for _, page_jobs in self.iter_job_pages(limit):
+                jobs.extend(page_jobs)
+            jobs = jobs[:limit]
             
             logger.info(f"Successfully fetched {len(jobs)} jobs from API")
             return jobs
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching jobs from API: {e}")
             raise Exception(f"Failed to fetch jobs from API: {str(e)}")
         except Exception as e:
@@ -72,183 +300,345 @@ class JobService:
         Transform API job data to our VolunteerJob model
         """
         try:
-            # Extract and clean the data
-            title = job_data.get('title', job_data.get('name', 'Untitled Position'))
-            description = job_data.get('description', job_data.get('summary', ''))
-            
-            # Handle organization - can be string or dict with 'name' field
-            org_data = job_data.get('organization', job_data.get('org_name', ''))
-            if isinstance(org_data, dict):
-                organization = org_data.get('name', '')
-            else:
-                organization = str(org_data) if org_data else ''
-            
-            # Handle location - extract from audience or use location field
-            location = job_data.get('location', job_data.get('city', ''))
-            if not location:
-                audience = job_data.get('audience', {})
-                if isinstance(audience, dict):
-                    regions = audience.get('regions', [])
-                    if regions:
-                        location = ', '.join(regions)
-            
-            # Handle skills - extract from activities or skills field
-            skills_required = []
-            
-            # First try to get from activities field
-            activities = job_data.get('activities', [])
-            if isinstance(activities, list):
-                for activity in activities:
-                    if isinstance(activity, dict):
-                        activity_name = activity.get('name', '')
-                        if activity_name:
-                            skills_required.append(activity_name)
-            
-            # If no activities, try skills field
-            if not skills_required:
-                skills_raw = job_data.get('skills', job_data.get('skills_required', ''))
-                if isinstance(skills_raw, str):
-                    skills_required = [skill.strip() for skill in skills_raw.split(',') if skill.strip()]
-                elif isinstance(skills_raw, list):
-                    skills_required = [str(skill).strip() for skill in skills_raw if skill]
-            
-            # Handle dates
-            start_date = None
-            end_date = None
-            if job_data.get('start_date'):
-                try:
-                    start_date = datetime.fromisoformat(job_data['start_date'].replace('Z', '+00:00'))
-                except:
-                    pass
-            
-            if job_data.get('end_date'):
-                try:
-                    end_date = datetime.fromisoformat(job_data['end_date'].replace('Z', '+00:00'))
-                except:
-                    pass
-            
-            # Create VolunteerJob instance
-            volunteer_job = VolunteerJob(
-                title=title,
-                description=description,
-                organization=organization,
-                location=location,
-                skills_required=skills_required,
-                time_commitment=job_data.get('duration', job_data.get('time_commitment', job_data.get('hours_per_week', ''))),
-                start_date=start_date,
-                end_date=end_date,
-                contact_email=job_data.get('contact_email', job_data.get('email', '')),
-                contact_phone=job_data.get('contact_phone', job_data.get('phone', '')),
-                website=job_data.get('website', job_data.get('url', '')),
-                external_id=str(job_data.get('id', job_data.get('_id', ''))),
-                source="volunteerconnector.org"
-            )
-            
-            return volunteer_job
-            
+            return VolunteerJob(**normalise_job_record(job_data))
         except Exception as e:
             logger.error(f"Error transforming job data: {e}")
             raise
 
-    async def store_jobs(self, jobs: List[VolunteerJob]) -> int:
+    async def transform_jobs(self, records: List[Dict[str, Any]]) -> Tuple[List[VolunteerJob], List[str]]:
+        """
+        Transform a page of API records in bulk, returning the jobs and per-record error messages
+        """
+        # Normalise records, spread over the worker pool for large pages
+        if self.transform_workers > 0 and len(records) >= JOB_TRANSFORM_POOL_MIN_RECORDS:
+            if self._transform_pool is None:
+                # Spawned rather than forked: workers must not inherit the server's event loop, threads or sockets
+                self._transform_pool = ProcessPoolExecutor(max_workers=self.transform_workers,
+                                                           mp_context=multiprocessing.get_context('spawn'))
+            loop = asyncio.get_running_loop()
+            chunk_size = math.ceil(len(records) / self.transform_workers)
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(self._transform_pool, normalise_job_records, records[start:start + chunk_size])
+                for start in range(0, len(records), chunk_size)
+            ))
+            normalised = [result for chunk in chunks for result in chunk]
+        else:
+            normalised = await asyncio.to_thread(normalise_job_records, records)
+        
+        errors = [error for _, error in normalised if error]
+        for error_msg in errors:
+            logger.error(error_msg)
+        fields = [job_fields for job_fields, _ in normalised if job_fields is not None]
+        
+        # Validate the whole page at once; on failure drop the invalid records and validate the rest
+        try:
+            return await asyncio.to_thread(VOLUNTEER_JOB_LIST.validate_python, fields), errors
+        except ValidationError as e:
+            invalid = {}
+            for error in e.errors():
+                index = error['loc'][0]
+                field = '.'.join(str(part) for part in error['loc'][1:])
+                invalid.setdefault(index, []).append(f"{field}: {error['msg']}")
+            
+            for index, messages in invalid.items():
+                error_msg = f"Error transforming job {fields[index].get('external_id') or 'unknown'}: {'; '.join(messages)}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+            
+            valid = [job_fields for index, job_fields in enumerate(fields) if index not in invalid]
+            return await asyncio.to_thread(VOLUNTEER_JOB_LIST.validate_python, valid), errors
+
+    def _job_write(self, job_dict: Dict[str, Any]):
+        """
+        Bulk operation storing one job: an upsert keyed on (external_id, source), or a plain insert
+        """
+        if not job_dict.get('external_id'):
+            return InsertOne(job_dict)
+        
+        # _id and created_at belong to the first insert only
+        on_insert = {'_id': job_dict.pop('_id'), 'created_at': job_dict.pop('created_at')}
+        return UpdateOne(
+            {'external_id': job_dict['external_id'], 'source': job_dict['source']},
+            {'$set': job_dict, '$setOnInsert': on_insert},
+            upsert=True
+        )
+
+    def _drop_duplicates(self, jobs: List[VolunteerJob], counts: Dict[str, int]) -> List[VolunteerJob]:
+        """
+        Keep the last copy of each (external_id, source); one unordered bulk write cannot upsert a key twice
+        """
+        latest: Dict[Tuple[str, str], int] = {}
+        for index, job in enumerate(jobs):
+            if job.external_id:
+                latest[(job.external_id, job.source)] = index
+        
+        unique = [job for index, job in enumerate(jobs)
+                  if not job.external_id or latest[(job.external_id, job.source)] == index]
+        counts['duplicates'] += len(jobs) - len(unique)
+        return unique
+
+    async def _drop_unchanged(self, jobs: List[VolunteerJob], counts: Dict[str, int]) -> List[VolunteerJob]:
+        """
+        Fingerprint jobs and keep those that are new or whose stored fingerprint differs
+        """
+        for job in jobs:
+            job.content_hash = job_fingerprint(job)
+        
+        # One read per source for the stored fingerprints of the whole batch
+        external_ids_by_source: Dict[str, List[str]] = {}
+        for job in jobs:
+            if job.external_id:
+                external_ids_by_source.setdefault(job.source, []).append(job.external_id)
+        
+        stored_hashes = {}
+        for source, external_ids in external_ids_by_source.items():
+            cursor = self.jobs_collection.find(
+                {'source': source, 'external_id': {'$in': external_ids}},
+                {'external_id': 1, 'source': 1, 'content_hash': 1}
+            )
+            async for existing in cursor:
+                stored_hashes[(existing['external_id'], existing['source'])] = existing.get('content_hash')
+        
+        changed = []
+        for job in jobs:
+            if job.external_id and stored_hashes.get((job.external_id, job.source)) == job.content_hash:
+                counts['unchanged'] += 1
+            else:
+                changed.append(job)
+        return changed
+
+    async def store_jobs(self, jobs: List[VolunteerJob]) -> Dict[str, int]:
         """
-        Store jobs in MongoDB
+        Store jobs in MongoDB, returning how many were new, updated and unchanged
         """
         try:
             await self._ensure_db_connection()
+            counts = {'stored': 0, 'updated': 0, 'unchanged': 0, 'duplicates': 0}
+            if not jobs:
+                return counts
+            
+            jobs = self._drop_duplicates(jobs, counts)
+            if counts['duplicates']:
+                logger.warning(f"Dropped {counts['duplicates']} duplicate jobs from the batch")
+            
+            # Skip jobs whose stored fingerprint matches: no write, no updated_at bump
+            jobs = await self._drop_unchanged(jobs, counts)
             if not jobs:
-                return 0
+                logger.info(f"All {counts['unchanged']} jobs unchanged")
+                return counts
+            
+            # Classify all jobs in one vectorized call and keep the scores on the documents
+            job_texts = [f"{job.title} {job.description or ''}" for job in jobs]
+            job_categories = await asyncio.to_thread(get_ml_classifier().classify_job_categories, job_texts)
+            for job, categories in zip(jobs, job_categories):
+                job.categories = categories
+                job.skill_ids_required = skill_ids(job.skills_required or [])
             
             # Convert to dict for MongoDB insertion
+            now = datetime.utcnow()
             jobs_dict = [job.dict(by_alias=True) for job in jobs]
-            
-            # Insert jobs, handling duplicates by external_id
-            stored_count = 0
             for job_dict in jobs_dict:
+                job_dict['updated_at'] = now
+                job_dict['search_tokens'] = search_tokens(job_search_text(job_dict))
+            
+            # One bulk write per batch instead of a lookup and a write per job
+            for start in range(0, len(jobs_dict), JOB_WRITE_BATCH_SIZE):
+                operations = [self._job_write(job_dict) for job_dict in jobs_dict[start:start + JOB_WRITE_BATCH_SIZE]]
                 try:
-                    # Check if job already exists by external_id
-                    if job_dict.get('external_id'):
-                        existing = await self.jobs_collection.find_one({
-                            'external_id': job_dict['external_id'],
-                            'source': job_dict['source']
-                        })
-                        
-                        if existing:
-                            # Update existing job
-                            job_dict['updated_at'] = datetime.utcnow()
-                            await self.jobs_collection.update_one(
-                                {'_id': existing['_id']},
-                                {'$set': job_dict}
-                            )
-                            logger.info(f"Updated existing job: {job_dict['title']}")
-                        else:
-                            # Insert new job
-                            await self.jobs_collection.insert_one(job_dict)
-                            stored_count += 1
-                            logger.info(f"Stored new job: {job_dict['title']}")
-                    else:
-                        # Insert without external_id check
-                        await self.jobs_collection.insert_one(job_dict)
-                        stored_count += 1
-                        logger.info(f"Stored new job: {job_dict['title']}")
-                        
-                except Exception as e:
-                    logger.error(f"Error storing individual job: {e}")
-                    continue
+                    result = await self.jobs_collection.bulk_write(operations, ordered=False)
+                    counts['stored'] += result.inserted_count + result.upserted_count
+                    counts['updated'] += result.matched_count
+                except BulkWriteError as e:
+                    # Unordered: every other operation in the batch was still applied
+                    details = e.details
+                    counts['stored'] += details.get('nInserted', 0) + details.get('nUpserted', 0)
+                    counts['updated'] += details.get('nMatched', 0)
+                    for error in details.get('writeErrors', []):
+                        logger.error(f"Error storing individual job: {error.get('errmsg')}")
+            
+            # Stored jobs changed the matching corpus and the filter facets
+            job_index.invalidate()
+            facet_service.invalidate()
             
-            logger.info(f"Successfully stored {stored_count} new jobs")
-            return stored_count
+            logger.info(f"Successfully stored {counts['stored']} new jobs, updated {counts['updated']}, "
+                        f"{counts['unchanged']} unchanged")
+            return counts
             
         except Exception as e:
             logger.error(f"Error storing jobs: {e}")
             raise
 
-    async def retrieve_and_store_jobs(self, limit: int = 100) -> Dict[str, Any]:
+    async def backfill_search_tokens(self, batch_size: int = JOB_WRITE_BATCH_SIZE) -> int:
+        """
+        Add search tokens to stored jobs written before they existed, returning how many jobs were updated
+        
+        Jobs the API no longer returns are never re-ingested, and without tokens the default
+        prefix search cannot find them. updated_at is left alone: the tokens are derived data.
+        """
+        updated = 0
+        try:
+            await self._ensure_db_connection()
+            projection = {field: 1 for field in SEARCH_FIELDS}
+            while True:
+                # Re-query each round: updated jobs drop out of the filter
+                cursor = self.jobs_collection.find({'search_tokens': {'$exists': False}}, projection).limit(batch_size)
+                jobs = await cursor.to_list(length=batch_size)
+                if not jobs:
+                    break
+                operations = [
+                    UpdateOne({'_id': job['_id']}, {'$set': {'search_tokens': search_tokens(job_search_text(job))}})
+                    for job in jobs
+                ]
+                result = await self.jobs_collection.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+            
+            if updated:
+                logger.info(f"Backfilled search tokens of {updated} jobs")
+            return updated
+            
+        except Exception as e:
+            logger.error(f"Error backfilling search tokens: {e}")
+            return updated
+
+    async def _save_checkpoint(self, state: Dict[str, Any]):
+        """Persist ingestion progress so an interrupted crawl can resume"""
+        state['updated_at'] = datetime.utcnow()
+        await self.db.pipeline_state.update_one({'_id': INGEST_STATE_ID}, {'$set': state}, upsert=True)
+
+    async def get_ingestion_status(self) -> Optional[Dict[str, Any]]:
+        """
+        Current (or last) ingestion run's checkpoint and progress counters
+        """
+        await self._ensure_db_connection()
+        return await self.db.pipeline_state.find_one({'_id': INGEST_STATE_ID}, {'_id': 0})
+
+    async def retrieve_and_store_jobs(self, limit: int = 100, resume: bool = True) -> Dict[str, Any]:
         """
         Main method to retrieve jobs from API and store in database
+        
+        Pages stream through a bounded queue into transform and batched store; the checkpoint
+        advances after each stored page, and an unfinished run with the same limit resumes from it.
+        A run with another limit leaves an unfinished run's checkpoint alone and keeps none of its own.
         """
+        state = {
+            'status': 'running',
+            'limit': limit,
+            'next_page': 1,
+            'pages_processed': 0,
+            'jobs_retrieved': 0,
+            'jobs_stored': 0,
+            'jobs_updated': 0,
+            'jobs_unchanged': 0,
+            'errors': 0,
+            'started_at': datetime.utcnow()
+        }
+        resumed_from_page = None
+        errors = []
+        checkpointed = True
+        
+        async def save_checkpoint():
+            if checkpointed:
+                await self._save_checkpoint(state)
+        
         try:
-            # Fetch jobs from API
-            api_jobs = await self.fetch_jobs_from_api(limit)
-            
-            if not api_jobs:
-                return {
-                    'success': True,
-                    'message': 'No jobs found in API response',
-                    'jobs_retrieved': 0,
-                    'jobs_stored': 0
-                }
-            
-            # Transform jobs
-            transformed_jobs = []
-            errors = []
-            
-            for job_data in api_jobs:
+            await self._ensure_db_connection()
+            
+            checkpoint = await self.db.pipeline_state.find_one({'_id': INGEST_STATE_ID})
+            unfinished = checkpoint is not None and checkpoint.get('status') in ('running', 'failed')
+            if unfinished and checkpoint.get('limit') != limit:
+                # Its pages and counters only mean something for its own limit
+                checkpointed = False
+                logger.info(f"Unfinished job ingestion with limit {checkpoint.get('limit')} left to resume; "
+                            f"running limit {limit} without a checkpoint")
+            elif resume and unfinished:
+                for key in ('next_page', 'pages_processed', 'jobs_retrieved', 'jobs_stored', 'jobs_updated',
+                            'jobs_unchanged', 'errors', 'started_at'):
+                    state[key] = checkpoint.get(key, state[key])
+                resumed_from_page = state['next_page']
+                logger.info(f"Resuming job ingestion from page {resumed_from_page}")
+            await save_checkpoint()
+            
+            # Producer fetches ahead of storage, bounded by the queue size (back-pressure)
+            queue: asyncio.Queue = asyncio.Queue(maxsize=INGEST_QUEUE_PAGES)
+            
+            async def produce():
                 try:
-                    volunteer_job = self.transform_job_data(job_data)
-                    transformed_jobs.append(volunteer_job)
+                    async for page in self.iter_job_pages(limit, state['next_page']):
+                        await queue.put(page)
+                    await queue.put(None)
                 except Exception as e:
-                    error_msg = f"Error transforming job {job_data.get('id', 'unknown')}: {str(e)}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
+                    # Hand fetch errors to the consumer
+                    await queue.put(e)
+            
+            producer = asyncio.create_task(produce())
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    
+                    page, api_jobs = item
+                    api_jobs = api_jobs[:max(limit - state['jobs_retrieved'], 0)]
+                    
+                    # Transform jobs
+                    transformed_jobs, page_errors = await self.transform_jobs(api_jobs)
+                    errors.extend(page_errors)
+                    state['errors'] += len(page_errors)
+                    
+                    # Store jobs
+                    counts = await self.store_jobs(transformed_jobs)
+                    state['jobs_stored'] += counts['stored']
+                    state['jobs_updated'] += counts['updated']
+                    state['jobs_unchanged'] += counts['unchanged']
+                    state['jobs_retrieved'] += len(api_jobs)
+                    state['pages_processed'] += 1
+                    state['next_page'] = page + 1
+                    await save_checkpoint()
+                    
+                    if state['jobs_retrieved'] >= limit:
+                        break
+            finally:
+                producer.cancel()
             
-            # Store jobs
-            stored_count = await self.store_jobs(transformed_jobs)
+            state['status'] = 'completed'
+            await save_checkpoint()
+            
+            if not state['jobs_retrieved']:
+                message = 'No jobs found in API response'
+            else:
+                message = f"Successfully processed {state['jobs_retrieved']} jobs"
             
             return {
                 'success': True,
-                'message': f'Successfully processed {len(api_jobs)} jobs',
-                'jobs_retrieved': len(api_jobs),
-                'jobs_stored': stored_count,
+                'message': message,
+                'jobs_retrieved': state['jobs_retrieved'],
+                'jobs_stored': state['jobs_stored'],
+                'jobs_updated': state['jobs_updated'],
+                'jobs_unchanged': state['jobs_unchanged'],
+                'pages_processed': state['pages_processed'],
+                'resumed_from_page': resumed_from_page,
                 'errors': errors if errors else None
             }
             
         except Exception as e:
             logger.error(f"Error in retrieve_and_store_jobs: {e}")
+            if self.db is not None:
+                try:
+                    state['status'] = 'failed'
+                    state['last_error'] = str(e)
+                    await save_checkpoint()
+                except Exception as checkpoint_error:
+                    logger.error(f"Error saving ingestion checkpoint: {checkpoint_error}")
             return {
                 'success': False,
                 'message': f'Failed to retrieve and store jobs: {str(e)}',
-                'jobs_retrieved': 0,
-                'jobs_stored': 0,
-                'errors': [str(e)]
+                'jobs_retrieved': state['jobs_retrieved'],
+                'jobs_stored': state['jobs_stored'],
+                'jobs_updated': state['jobs_updated'],
+                'jobs_unchanged': state['jobs_unchanged'],
+                'pages_processed': state['pages_processed'],
+                'resumed_from_page': resumed_from_page,
+                'errors': errors + [str(e)]
             }
@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from pymongo import DeleteMany, InsertOne
+from models import JobMatch
+from database import get_database
+from config import REMATCH_TOP_N, REMATCH_CHUNK_SIZE, REMATCH_WORKERS
+from match_index import JobCatalogue
+from agents.event_matcher import EventMatcherAgent, MATCH_PROJECTION
+
+logger = logging.getLogger(__name__)
+
+# Profile fields the match scoring reads
+PROFILE_PROJECTION = {'skills.name': 1, 'skills.skill_id': 1, 'location': 1, 'availability': 1, 'interests': 1}
+
+# Worker process state, set once per worker by _init_worker
+_worker_catalogue: Optional[JobCatalogue] = None
+_worker_matcher: Optional[EventMatcherAgent] = None
+
+
+def _init_worker(catalogue: JobCatalogue):
+    """Receive the job catalogue once per worker instead of once per block"""
+    global _worker_catalogue, _worker_matcher
+    _worker_catalogue = catalogue
+    _worker_matcher = EventMatcherAgent()
+
+
+def _score_block(volunteers: List[Dict], rows: Optional[List[int]], top_n: int) -> List[Dict[str, Any]]:
+    """Top matches of a volunteer block against the worker's catalogue (or a subset of its rows)"""
+    catalogue = _worker_catalogue if rows is None else _worker_catalogue.subset(rows)
+    try:
+        return _worker_matcher.top_matches_block(volunteers, catalogue, top_n)
+    except Exception as e:
+        # Retry one by one so a single profile cannot fail the block, and with it the run
+        logger.warning(f"Scoring a block of {len(volunteers)} volunteers failed ({e}), retrying one by one")
+
+    results = []
+    for volunteer in volunteers:
+        try:
+            results.extend(_worker_matcher.top_matches_block([volunteer], catalogue, top_n))
+        except Exception as e:
+            # Skipped volunteers keep their stored matches until their profile changes
+            logger.error(f"Volunteer profile {volunteer.get('_id')} skipped in rematch: {e}")
+    return results
+
+
+class RematchService:
+    """Batch pipeline that materializes the top job matches of every volunteer into ``job_matches``"""
+
+    def __init__(self, top_n: int = REMATCH_TOP_N, chunk_size: int = REMATCH_CHUNK_SIZE,
+                 workers: int = REMATCH_WORKERS):
+        self.db = None
+        self.top_n = top_n
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self._lock = asyncio.Lock()
+
+    async def _ensure_db_connection(self):
+        if self.db is None:
+            self.db = get_database()
+
+    async def run(self, full: bool = False) -> Optional[Dict[str, Any]]:
+        """Rescore volunteers and jobs changed since the last run (or everything when ``full``).
+
+        Returns None when another rematch is already in flight: overlapping runs
+        would interleave their delete-and-insert rewrites of the same volunteers.
+        """
+        if self._lock.locked():
+            logger.info("Rematch already running, skipping")
+            return None
+
+        async with self._lock:
+            return await self._run(full)
+
+    async def _run(self, full: bool) -> Dict[str, Any]:
+        """One rematch run, under the single-flight lock"""
+        try:
+            await self._ensure_db_connection()
+            started_at = datetime.utcnow()
+            state = await self.db.pipeline_state.find_one({'_id': 'rematch'})
+            last_run_at = None if full or not state else state.get('last_run_at')
+            logger.info(f"Starting {'incremental' if last_run_at else 'full'} rematch")
+
+            # Snapshot the job side once; every worker receives it a single time
+            jobs_cursor = self.db.volunteer_jobs.find({}, {**MATCH_PROJECTION, 'created_at': 1, 'updated_at': 1})
+            jobs = await jobs_cursor.to_list(length=None)
+            catalogue = await asyncio.to_thread(JobCatalogue, jobs)
+
+            if last_run_at is None:
+                changed_job_rows = list(range(len(jobs)))
+                profile_query = {}
+            else:
+                changed_job_rows = [row for row, job in enumerate(jobs)
+                                    if job.get('updated_at') and job['updated_at'] > last_run_at]
+                new_job_ids = {job['_id'] for job in jobs if job.get('created_at') and job['created_at'] > last_run_at}
+                profile_query = {'updated_at': {'$gt': last_run_at}}
+
+            stats = {'volunteers_rescored': 0, 'volunteers_merged': 0, 'matches_written': 0}
+            loop = asyncio.get_running_loop()
+            # Spawned rather than forked: workers must not inherit the server's event loop, threads or sockets
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker, initargs=(catalogue,))
+            try:
+                async def score(volunteers, rows=None):
+                    return await loop.run_in_executor(pool, _score_block, volunteers, rows, self.top_n)
+
+                # Changed (or, on a full run, all) volunteers against every job
+                await self._rescore(score, profile_query, stats)
+
+                # Unchanged volunteers against changed jobs only, merged into their stored matches
+                if last_run_at is not None and changed_job_rows:
+                    changed_job_ids = [catalogue.job_ids[row] for row in changed_job_rows]
+                    stale = await self._merge_changed_jobs(
+                        score, {'updated_at': {'$lte': last_run_at}}, changed_job_rows, changed_job_ids, new_job_ids, stats)
+                    if stale:
+                        await self._rescore(score, {'_id': {'$in': stale}}, stats)
+            finally:
+                # Joining the workers blocks, so it happens off the event loop
+                await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+            finished_at = datetime.utcnow()
+            await self.db.pipeline_state.update_one(
+                {'_id': 'rematch'},
+                {'$set': {
+                    'last_run_at': started_at,
+                    'jobs_total': len(jobs),
+                    'duration_seconds': (finished_at - started_at).total_seconds(),
+                    'jobs_rescored': len(changed_job_rows),
+                    **stats
+                }},
+                upsert=True
+            )
+
+            logger.info(f"Rematch finished: {stats}")
+            return {
+                'success': True,
+                'message': 'Rematch completed',
+                'full': last_run_at is None,
+                'jobs_rescored': len(changed_job_rows),
+                **stats
+            }
+
+        except Exception as e:
+            logger.error(f"Error in rematch: {e}")
+            return {'success': False, 'message': f'Rematch failed: {str(e)}'}
+
+    async def _iter_profile_chunks(self, query: Dict[str, Any]):
+        """Yield volunteer profiles in chunks of ``chunk_size``"""
+        chunk = []
+        cursor = self.db.volunteer_profiles.find(query, PROFILE_PROJECTION).batch_size(self.chunk_size)
+        async for profile in cursor:
+            chunk.append(profile)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def _score_chunks(self, score, query: Dict[str, Any], rows: Optional[List[int]] = None):
+        """Score profile chunks on the pool, keeping at most two blocks per worker in flight"""
+        pending = set()
+        async for chunk in self._iter_profile_chunks(query):
+            pending.add(asyncio.ensure_future(score(chunk, rows)))
+            if len(pending) >= self.workers * 2:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        for task in asyncio.as_completed(pending):
+            yield await task
+
+    async def _rescore(self, score, query: Dict[str, Any], stats: Dict[str, int]):
+        """Replace the stored matches of the matching volunteers with a full rescore"""
+        async for results in self._score_chunks(score, query):
+            await self._write_matches(results)
+            stats['volunteers_rescored'] += len(results)
+            stats['matches_written'] += sum(len(result['matches']) for result in results)
+
+    async def _merge_changed_jobs(self, score, query: Dict[str, Any], changed_job_rows: List[int],
+                                  changed_job_ids: List[Any], new_job_ids: set, stats: Dict[str, int]) -> List[Any]:
+        """Merge changed-job scores into stored matches, returning volunteers that need a full rescore"""
+        changed = set(changed_job_ids)
+        # Changed jobs that existed at the last run; whether they passed then is only known if stored
+        updated = changed - new_job_ids
+        stale = []
+
+        async for results in self._score_chunks(score, query, changed_job_rows):
+            volunteer_ids = [result['volunteer_id'] for result in results]
+            stored_cursor = self.db.job_matches.find({'volunteer_id': {'$in': volunteer_ids}})
+            stored: Dict[Any, List[Dict]] = {}
+            for match in await stored_cursor.to_list(length=None):
+                stored.setdefault(match['volunteer_id'], []).append(match)
+
+            merged_results = []
+            for result in results:
+                previous = stored.get(result['volunteer_id'], [])
+                new_scores = {match['job_id']: match['match_score'] for match in result['matches']}
+                previous_changed = [match for match in previous if match['job_id'] in changed]
+                if len(previous) >= self.top_n and (
+                        # A stored job whose score dropped may hide a better unstored job
+                        any(new_scores.get(match['job_id'], 0.0) < match['match_score'] for match in previous_changed)
+                        # The total cannot be corrected for an unstored job that may have passed before
+                        or updated - {match['job_id'] for match in previous_changed}):
+                    stale.append(result['volunteer_id'])
+                    continue
+                if previous and previous[0].get('total_matches') is None:
+                    stale.append(result['volunteer_id'])  # Stored before totals were kept
+                    continue
+                if not result['matches'] and not previous_changed:
+                    continue  # Nothing to change
+
+                # Changed jobs that passed at the last run are all among the stored ones by now
+                total = (previous[0]['total_matches'] if previous else 0) - len(previous_changed) + result['total']
+                kept = [self._stored_to_match(match) for match in previous if match['job_id'] not in changed]
+                merged = sorted(kept + result['matches'], key=lambda match: -match['match_score'])[:self.top_n]
+                merged_results.append({'volunteer_id': result['volunteer_id'], 'matches': merged, 'total': total})
+
+            await self._write_matches(merged_results)
+            stats['volunteers_merged'] += len(merged_results)
+            stats['matches_written'] += sum(len(result['matches']) for result in merged_results)
+
+        return stale
+
+    def _stored_to_match(self, match: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'job_id': match['job_id'],
+            'match_score': match['match_score'],
+            'skill_match': match['skill_match_score'],
+            'location_match': match['location_match_score'],
+            'availability_match': match['availability_match_score'],
+            'interest_match': match['interest_match_score'],
+            'reasons': match.get('reasons', [])
+        }
+
+    async def _write_matches(self, results: List[Dict[str, Any]]):
+        """Replace the stored matches of each volunteer in one bulk write"""
+        if not results:
+            return
+
+        operations = [DeleteMany({'volunteer_id': {'$in': [result['volunteer_id'] for result in results]}})]
+        for result in results:
+            for match in result['matches']:
+                job_match = JobMatch(
+                    volunteer_id=result['volunteer_id'],
+                    job_id=match['job_id'],
+                    match_score=match['match_score'],
+                    skill_match_score=match['skill_match'],
+                    availability_match_score=match['availability_match'],
+                    location_match_score=match['location_match'],
+                    interest_match_score=match['interest_match'],
+                    reasons=match['reasons'],
+                    total_matches=result['total']
+                )
+                operations.append(InsertOne(job_match.dict(by_alias=True)))
+
+        await self.db.job_matches.bulk_write(operations, ordered=True)
+
+    async def get_materialized_matches(self, volunteer_id: str, limit: int = 20) -> Optional[Dict[str, Any]]:
+        """Read stored matches for a volunteer, or None when they are missing or older than the profile or the jobs"""
+        await self._ensure_db_connection()
+
+        state = await self.db.pipeline_state.find_one({'_id': 'rematch'}, {'last_run_at': 1, 'jobs_total': 1})
+        if not state:
+            return None
+
+        # Jobs stored, changed or deleted since the last run are not reflected in the stored matches
+        latest_job = await self.db.volunteer_jobs.find_one({}, {'updated_at': 1}, sort=[('updated_at', -1)])
+        if latest_job and latest_job.get('updated_at') and latest_job['updated_at'] > state['last_run_at']:
+            return None
+        if await self.db.volunteer_jobs.estimated_document_count() != state.get('jobs_total'):
+            return None
+
+        profile = await self.db.volunteer_profiles.find_one({'volunteer_id': volunteer_id}, {'updated_at': 1})
+        if not profile or (profile.get('updated_at') and profile['updated_at'] > state['last_run_at']):
+            return None
+
+        matches_cursor = self.db.job_matches.find({'volunteer_id': profile['_id']}).sort('match_score', -1).limit(limit)
+        stored = await matches_cursor.to_list(length=limit)
+        if not stored or stored[0].get('total_matches') is None:
+            return None
+
+        job_ids = [match['job_id'] for match in stored]
+        jobs_cursor = self.db.volunteer_jobs.find({'_id': {'$in': job_ids}}, {'search_tokens': 0})
+        jobs_by_id = {job['_id']: job for job in await jobs_cursor.to_list(length=len(job_ids))}
+
+        matches = []
+        for match in stored:
+            job = jobs_by_id.get(match['job_id'])
+            if job is None:
+                continue  # Job deleted since the last run
+            job['_id'] = str(job['_id'])
+            entry = self._stored_to_match(match)
+            del entry['job_id']
+            matches.append({'job': job, **entry})
+
+        # Matches above the threshold across all jobs, as live matching counts them
+        return {'matches': matches, 'total': stored[0]['total_matches']}
@@ -2,10 +2,14 @@ from typing import Dict, Any, List, Optional
 import logging
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 from models import VolunteerProfile, Skill, Availability
+from skill_taxonomy import skill_id
 from database import get_database
 from agents.event_matcher import EventMatcherAgent
 from agents.availability_tracker import AvailabilityTrackerAgent
+from services.rematch_service import RematchService
+from pagination import fetch_page, count_total
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +20,7 @@ class VolunteerService:
         self.db = None
         self.event_matcher = EventMatcherAgent()
         self.availability_tracker = AvailabilityTrackerAgent()
+        self.rematch_service = RematchService()
     
     async def _ensure_db_connection(self):
         if self.db is None:
@@ -27,18 +32,7 @@ class VolunteerService:
             await self._ensure_db_connection()
             logger.info(f"Creating profile for {profile_data.get('name')}")
             
-            # Convert skills to dict format if they are Skill objects
-            if 'skills' in profile_data and profile_data['skills']:
-                skills_data = []
-                for skill in profile_data['skills']:
-                    if hasattr(skill, 'dict'):
-                        skills_data.append(skill.dict())
-                    else:
-                        skills_data.append(skill)
-                profile_data['skills'] = skills_data
-            
-            # Create VolunteerProfile object
-            profile = VolunteerProfile(**profile_data)
+            profile = self._build_profile(profile_data)
             
             # Insert into database
             result = await self.db.volunteer_profiles.insert_one(profile.dict(by_alias=True))
@@ -66,6 +60,59 @@ class VolunteerService:
                 "message": f"Error: {str(e)}"
             }
     
+    async def create_profiles(self, profiles_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create many volunteer profiles with one insert_many; one result per input, in order"""
+        results: List[Dict[str, Any]] = []
+        documents = []
+        positions = []
+        for profile_data in profiles_data:
+            try:
+                profile = self._build_profile(profile_data)
+            except Exception as e:
+                results.append({"success": False, "message": f"Error: {str(e)}"})
+                continue
+            positions.append(len(results))
+            documents.append(profile.dict(by_alias=True))
+            # volunteer_id is generated client side, so no read-back is needed
+            results.append({"success": True, "message": "Profile created successfully", "profile_id": profile.volunteer_id})
+        
+        if not documents:
+            return results
+        
+        try:
+            await self._ensure_db_connection()
+            await self.db.volunteer_profiles.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: every other profile in the batch was still inserted
+            for error in e.details.get('writeErrors', []):
+                results[positions[error['index']]] = {"success": False, "message": f"Error: {error.get('errmsg')}"}
+        except Exception as e:
+            logger.error(f"Error creating profiles: {e}")
+            for position in positions:
+                results[position] = {"success": False, "message": f"Error: {str(e)}"}
+        
+        created = sum(1 for result in results if result['success'])
+        logger.info(f"Created {created} of {len(profiles_data)} profiles")
+        return results
+    
+    def _build_profile(self, profile_data: Dict[str, Any]) -> VolunteerProfile:
+        """Validate profile data into a VolunteerProfile"""
+        # Convert skills to dict format if they are Skill objects
+        if 'skills' in profile_data and profile_data['skills']:
+            skills_data = []
+            for skill in profile_data['skills']:
+                if hasattr(skill, 'dict'):
+                    skills_data.append(skill.dict())
+                else:
+                    skills_data.append(skill)
+            profile_data['skills'] = self._intern_skills(skills_data)
+        
+        return VolunteerProfile(**profile_data)
+    
+    def _intern_skills(self, skills: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Store each skill's integer id next to its name, so matching and search compare ids"""
+        return [{**skill, 'skill_id': skill_id(skill.get('name', ''))} for skill in skills]
+    
     async def update_profile(self, profile_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing volunteer profile"""
         try:
@@ -73,6 +120,9 @@ class VolunteerService:
             
             # Remove None values and prepare update
             update_data = {k: v for k, v in update_data.items() if v is not None}
+            if update_data.get('skills'):
+                update_data['skills'] = self._intern_skills([skill.dict() if hasattr(skill, 'dict') else skill
+                                                             for skill in update_data['skills']])
             update_data['updated_at'] = datetime.utcnow()
             
             result = await self.db.volunteer_profiles.update_one(
@@ -120,8 +170,10 @@ class VolunteerService:
         try:
             logger.info(f"Finding matches for volunteer {profile_id}")
             
-            # Use event matcher agent  
-            matches = await self.event_matcher.process(profile_id)
+            # Prefer matches materialized by the rematch pipeline, fall back to the event matcher agent
+            matches = await self.rematch_service.get_materialized_matches(profile_id)
+            if matches is None:
+                matches = await self.event_matcher.process(profile_id)
             
             return {
                 "success": True,
@@ -137,6 +189,28 @@ class VolunteerService:
                 "total_matches": 0
             }
     
+    async def find_volunteers_for_job(self, job_id: str, top_k: int = 50) -> Dict[str, Any]:
+        """Find the best matching volunteers for a job"""
+        try:
+            logger.info(f"Finding volunteers for job {job_id}")
+            
+            # Use event matcher agent in the job -> volunteers direction
+            matches = await self.event_matcher.rank_volunteers(job_id, top_k)
+            
+            return {
+                "success": True,
+                "matches": matches.get('matches', []),
+                "total_matches": matches.get('total', 0)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error finding volunteers: {e}")
+            return {
+                "success": False,
+                "matches": [],
+                "total_matches": 0
+            }
+    
     async def update_availability(self, profile_id: str, availability_data: List[Dict]) -> Dict[str, Any]:
         """Update volunteer availability"""
         try:
@@ -196,8 +270,9 @@ class VolunteerService:
                 "message": f"Error: {str(e)}"
             }
     
-    async def search_profiles(self, filters: Dict[str, Any]) -> Dict[str, Any]:
-        """Search volunteer profiles with filters"""
+    async def search_profiles(self, filters: Dict[str, Any], limit: int = 100, cursor: Optional[str] = None,
+                              include_total: bool = True) -> Dict[str, Any]:
+        """Search volunteer profiles with filters, one cursor page at a time"""
         try:
             await self._ensure_db_connection()
             
@@ -205,7 +280,8 @@ class VolunteerService:
             query = {}
             
             if filters.get('skills'):
-                query['skills.name'] = {"$in": filters['skills']}
+                # Names and synonyms of one skill share its id
+                query['skills.skill_id'] = {"$in": [skill_id(name) for name in filters['skills']]}
             
             if filters.get('location'):
                 query['location'] = {"$regex": filters['location'], "$options": "i"}
@@ -219,8 +295,8 @@ class VolunteerService:
                 }
             
             # Execute query
-            cursor = self.db.volunteer_profiles.find(query)
-            profiles = await cursor.to_list(length=100)  # Limit to 100 results
+            profiles, next_cursor = await fetch_page(self.db.volunteer_profiles, query, limit, cursor)
+            total = await count_total(self.db.volunteer_profiles, query) if include_total else None
             
             # Convert ObjectIds to strings
             for profile in profiles:
@@ -229,9 +305,14 @@ class VolunteerService:
             return {
                 "success": True,
                 "profiles": profiles,
-                "total": len(profiles)
+                "total": total,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None
             }
             
+        except ValueError:
+            # Invalid cursor: reported to the caller as a bad request
+            raise
         except Exception as e:
             logger.error(f"Error searching profiles: {e}")
             return {
@@ -0,0 +1,153 @@
+import logging
+import re
+from abc import ABC, abstractmethod
+import time
+from functools import cached_property
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from models import Skill, SkillLevel
+from skill_taxonomy import SkillTaxonomy, get_skill_taxonomy, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Experience indicators near a skill mention, checked from the highest level down
+CONTEXT_LEVELS = [
+    (SkillLevel.EXPERT, ['expert', 'senior', 'lead', 'architect', 'advanced']),
+    (SkillLevel.ADVANCED, ['advanced', 'proficient', 'experienced']),
+    (SkillLevel.INTERMEDIATE, ['intermediate', 'familiar', 'working knowledge'])
+]
+
+# Characters either side of a skill mention that count as its context
+CONTEXT_WINDOW = 100
+
+YEAR_PATTERNS = [re.compile(pattern) for pattern in (
+    r'(\d+)\+?\s*years?',
+    r'(\d+)\+?\s*yrs?',
+    r'over\s+(\d+)\s*years?'
+)]
+
+# "Skills:" sections, split into items on common delimiters; a section runs to a blank line,
+# an unindented capitalised line or the end of the CV, so indented lists are read whole
+SKILLS_SECTION_PATTERN = re.compile(r'skills?:?\s*([^\n]+(?:\n[^\n]+)*?)(?:\n\s*\n|\n[A-Z]|$)', re.IGNORECASE)
+SKILL_ITEM_DELIMITERS = re.compile(r'[,;•\-\n]')
+
+
+def normalise_skill_name(name: str) -> str:
+    """Key under which differently written names of one skill are deduplicated"""
+    return ' '.join(name.lower().split())
+
+
+class CVDocument:
+    """One CV's text in the forms the stages share; each form is computed once, on first use"""
+
+    def __init__(self, text: str):
+        self.text = text or ""
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self) -> List[Tuple[str, int, int]]:
+        """Word tokens of the lowercase text with their offsets"""
+        return tokenize(self.lower)
+
+    def context(self, start: int, end: int) -> str:
+        """Lowercase text around the mention at ``start:end``"""
+        return self.lower[max(0, start - CONTEXT_WINDOW):end + CONTEXT_WINDOW]
+
+
+class SkillStage(ABC):
+    """One step of the skill extraction pipeline"""
+
+    name = 'stage'
+
+    @abstractmethod
+    def extract(self, document: CVDocument) -> Iterable[Skill]:
+        """Skills the stage finds in the document"""
+        pass
+
+
+class TaxonomyStage(SkillStage):
+    """Taxonomy skills mentioned anywhere in the CV, by name or synonym, levelled by their first mention's context"""
+
+    name = 'taxonomy'
+
+    def __init__(self, taxonomy: Optional[SkillTaxonomy] = None):
+        # Without a fixed taxonomy the shared one is used, following its reloads
+        self.taxonomy = taxonomy
+
+    def extract(self, document: CVDocument) -> Iterable[Skill]:
+        taxonomy = self.taxonomy if self.taxonomy is not None else get_skill_taxonomy()
+        seen = set()
+        for skill_id, start, end in taxonomy.match(document.tokens):
+            if skill_id not in seen:
+                seen.add(skill_id)
+                context = document.context(start, end)
+                yield Skill(
+                    name=taxonomy.name(skill_id),
+                    level=self._level(context),
+                    years_experience=self._years(context),
+                    verified=False
+                )
+
+    def _level(self, context: str) -> SkillLevel:
+        for level, indicators in CONTEXT_LEVELS:
+            if any(indicator in context for indicator in indicators):
+                return level
+        return SkillLevel.BEGINNER
+
+    def _years(self, context: str) -> Optional[int]:
+        for pattern in YEAR_PATTERNS:
+            match = pattern.search(context)
+            if match:
+                return int(match.group(1))
+        return None
+
+
+class SkillsSectionStage(SkillStage):
+    """Items listed in the CV's "Skills:" sections, as the taxonomy skills they name or else as written"""
+
+    name = 'skills_section'
+
+    def __init__(self, taxonomy: Optional[SkillTaxonomy] = None):
+        self.taxonomy = taxonomy
+
+    def extract(self, document: CVDocument) -> Iterable[Skill]:
+        taxonomy = self.taxonomy if self.taxonomy is not None else get_skill_taxonomy()
+        for section in SKILLS_SECTION_PATTERN.findall(document.text):
+            for item in SKILL_ITEM_DELIMITERS.split(section):
+                item = item.strip()
+                if len(item) >= 30:  # Reasonable skill name length
+                    continue
+                # A listed item names skills, so ambiguous names such as Go count here
+                skill_ids = [skill_id for skill_id, _, _ in taxonomy.match(tokenize(item.lower()), ambiguous=True)]
+                if skill_ids:
+                    for skill_id in skill_ids:
+                        yield Skill(name=taxonomy.name(skill_id), level=SkillLevel.INTERMEDIATE, verified=False)
+                elif len(item) > 2 and item[0].isalpha():  # Not a stray "5 years)" fragment
+                    yield Skill(name=item.title(), level=SkillLevel.INTERMEDIATE, verified=False)
+
+
+class SkillExtractionPipeline:
+    """Ordered skill stages over one shared CVDocument; the first stage to find a skill wins"""
+
+    def __init__(self, stages: List[SkillStage]):
+        self.stages = list(stages)
+
+    def run(self, cv_text: str) -> Dict[str, Any]:
+        """Deduplicated skills and each stage's run time in milliseconds"""
+        document = CVDocument(cv_text)
+        skills: Dict[str, Skill] = {}
+        timings: Dict[str, float] = {}
+
+        for stage in self.stages:
+            started = time.perf_counter()
+            try:
+                for skill in stage.extract(document):
+                    skills.setdefault(normalise_skill_name(skill.name), skill)
+            except Exception as e:
+                # A failing stage costs its own skills, not the whole extraction
+                logger.warning(f"Skill stage {stage.name} failed: {e}")
+            timings[stage.name] = round((time.perf_counter() - started) * 1000, 3)
+
+        return {'skills': list(skills.values()), 'timings_ms': timings}
@@ -0,0 +1,439 @@
+"""Skill taxonomy compiled into a memory-mapped binary artefact.
+
+The source file (SKILL_TAXONOMY_PATH) is JSON::
+
+    {"version": 2,
+     "job_categories": {"healthcare": ["medical", ...], ...},
+     "skills": [{"id": 1, "name": "Python", "category": "programming", "synonyms": [...]},
+                {"id": 9, "name": "Go", "category": "programming", "synonyms": ["golang", ...], "ambiguous": true}, ...]}
+
+A skill marked ``ambiguous`` has a name that is also an everyday word ("go",
+"swift", "express"). Its name is still resolved by lookups, such as the items
+of a CV skills section, but a free-text scan only finds it by its synonyms.
+
+It is compiled into SKILL_TAXONOMY_ARTEFACT_PATH. That file has a header, a
+skill table sorted by id, a category table, an open-addressing hash table and
+a string blob. The hash table holds every name and synonym as its word tokens,
+plus every token prefix of them, so it works as a trie whose nodes are found
+by hashing. Every process maps the file read-only, so the page cache holds a
+single copy however many workers read it.
+
+    python skill_taxonomy.py    # recompile after editing the source
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from config import SKILL_TAXONOMY_PATH, SKILL_TAXONOMY_ARTEFACT_PATH, SKILL_TAXONOMY_RELOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Lowercase words, keeping the symbols and inner dots of names like c++, c#, node.js and asp.net
+TOKEN_PATTERN = re.compile(r'[a-z0-9#+]+(?:\.[a-z0-9#+]+)*')
+
+MAGIC = b'SKTX'
+FORMAT_VERSION = 2
+
+# magic, format version, longest phrase in tokens, taxonomy version, source digest,
+# skill/category/slot counts, then offsets of the skill, category and slot tables,
+# the string blob, and the job categories JSON inside that blob
+HEADER = struct.Struct('<4sHHI16sIIIQQQQII')
+# id, name offset and length in the blob, category index
+SKILL_RECORD = struct.Struct('<IIII')
+# name offset and length in the blob
+CATEGORY_RECORD = struct.Struct('<II')
+# crc32 of the key, key offset and length in the blob (length 0 = empty slot), skill record index,
+# PREFIX_ONLY, or LOOKUP_ONLY - record index for the name of an ambiguous skill
+SLOT_RECORD = struct.Struct('<IIIi')
+PREFIX_ONLY = -1
+LOOKUP_ONLY = -2
+
+# Skills outside the taxonomy get a hash of their normalised name, above every possible taxonomy id
+HASHED_SKILL_ID_BASE = 1 << 48
+
+# Probe results kept per process; bounded by the words CVs use, not by the taxonomy size
+PROBE_CACHE_SIZE = 16384
+_UNSEEN = object()
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """Word tokens of lowercase ``text`` with their start and end offsets"""
+    return [(match.group(), match.start(), match.end()) for match in TOKEN_PATTERN.finditer(text)]
+
+
+def phrase_key(phrase: str) -> str:
+    """A name or synonym as the space-joined tokens it is stored under"""
+    return ' '.join(token for token, _, _ in tokenize(phrase.lower()))
+
+
+def compile_taxonomy(source_path: str = SKILL_TAXONOMY_PATH, artefact_path: str = SKILL_TAXONOMY_ARTEFACT_PATH) -> Dict[str, Any]:
+    """Compile a taxonomy source file into its binary artefact, replacing any previous one atomically"""
+    with open(source_path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).digest()[:16]
+    data = json.loads(raw)
+    version = int(data['version'])
+
+    blob = bytearray()
+    strings: Dict[str, Tuple[int, int]] = {}
+
+    def intern(text: str) -> Tuple[int, int]:
+        if text not in strings:
+            encoded = text.encode('utf-8')
+            strings[text] = (len(blob), len(encoded))
+            blob.extend(encoded)
+        return strings[text]
+
+    categories: List[str] = []
+    category_index: Dict[str, int] = {}
+    skills: List[Tuple[int, str, int]] = []
+    names: Dict[int, str] = {}
+    phrases: Dict[str, int] = {}
+    lookup_only = set()
+
+    for entry in sorted(data['skills'], key=lambda entry: entry['id']):
+        skill_id = int(entry['id'])
+        name = entry['name'].strip()
+        if not 0 < skill_id < 1 << 32:
+            raise ValueError(f"Skill taxonomy id {skill_id} of {name!r} is outside 1..2**32-1")
+        if skill_id in names:
+            raise ValueError(f"Skill taxonomy id {skill_id} is used by both {names[skill_id]!r} and {name!r}")
+        if phrase_key(name) in phrases:
+            logger.warning(f"Skill taxonomy lists {name!r} twice; keeping the first entry")
+            continue
+
+        category = entry.get('category') or 'other'
+        if category not in category_index:
+            category_index[category] = len(categories)
+            categories.append(category)
+
+        record = len(skills)
+        names[skill_id] = name
+        skills.append((skill_id, name, category_index[category]))
+        for phrase in [name] + list(entry.get('synonyms') or []):
+            key = phrase_key(phrase)
+            if not key:
+                continue
+            existing = phrases.setdefault(key, record)
+            if existing != record:
+                logger.warning(f"Skill taxonomy phrase {phrase!r} already names {skills[existing][1]!r}; ignored for {name!r}")
+        if entry.get('ambiguous'):
+            lookup_only.add(phrase_key(name))
+
+    # Every token prefix becomes a key too, so a scan can stop as soon as no phrase continues
+    keys: Dict[str, int] = {}
+    max_phrase_tokens = 0
+    for key, record in phrases.items():
+        tokens = key.split(' ')
+        max_phrase_tokens = max(max_phrase_tokens, len(tokens))
+        for length in range(1, len(tokens)):
+            keys.setdefault(' '.join(tokens[:length]), PREFIX_ONLY)
+        keys[key] = LOOKUP_ONLY - record if key in lookup_only else record
+
+    slot_count = 1
+    while slot_count < len(keys) * 2:
+        slot_count *= 2
+    slots = [(0, 0, 0, PREFIX_ONLY)] * slot_count
+    for key, record in keys.items():
+        encoded = key.encode('utf-8')
+        key_hash = zlib.crc32(encoded)
+        slot = key_hash & (slot_count - 1)
+        while slots[slot][2]:
+            slot = (slot + 1) & (slot_count - 1)
+        offset, length = intern(key)
+        slots[slot] = (key_hash, offset, length, record)
+
+    skill_table = b''.join(SKILL_RECORD.pack(skill_id, *intern(name), category) for skill_id, name, category in skills)
+    category_table = b''.join(CATEGORY_RECORD.pack(*intern(category)) for category in categories)
+    slot_table = b''.join(SLOT_RECORD.pack(*slot) for slot in slots)
+    job_categories_offset, job_categories_length = intern(json.dumps(data.get('job_categories') or {}))
+
+    skills_offset = HEADER.size
+    categories_offset = skills_offset + len(skill_table)
+    slots_offset = categories_offset + len(category_table)
+    blob_offset = slots_offset + len(slot_table)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, max_phrase_tokens, version, digest,
+        len(skills), len(categories), slot_count,
+        skills_offset, categories_offset, slots_offset, blob_offset,
+        job_categories_offset, job_categories_length
+    )
+
+    temporary_path = f"{artefact_path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as f:
+        f.write(header + skill_table + category_table + slot_table + bytes(blob))
+    # Processes that mapped the old artefact keep reading its inode until they reload
+    os.replace(temporary_path, artefact_path)
+
+    return {
+        'version': version,
+        'skills': len(skills),
+        'phrases': len(phrases),
+        'bytes': blob_offset + len(blob),
+        'path': artefact_path
+    }
+
+
+class SkillTaxonomy:
+    """Read-only view of a compiled taxonomy artefact, shared between processes through the page cache.
+
+    Matching walks the token prefixes of the CV through the hash table, so its
+    cost depends on the CV length and the longest phrase, not on how many
+    skills the taxonomy holds. Matches respect word boundaries and the longest
+    phrase starting at a position wins.
+    """
+
+    def __init__(self, path: str = SKILL_TAXONOMY_ARTEFACT_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        (magic, format_version, self.max_phrase_tokens, self.version, digest,
+         self.skill_count, self.category_count, self.slot_count,
+         self._skills_offset, self._categories_offset, self._slots_offset, self._blob_offset,
+         job_categories_offset, job_categories_length) = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a skill taxonomy artefact of format {FORMAT_VERSION}")
+
+        self.source_digest = digest.hex()
+        # Version and source digest together, so an edit that forgets to bump the version still counts
+        self.revision = f"{self.version}.{self.source_digest[:12]}"
+        self._slot_mask = self.slot_count - 1
+        self._probes: Dict[str, Optional[int]] = {}
+        self.job_categories: Dict[str, List[str]] = json.loads(self._string(job_categories_offset, job_categories_length))
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._blob_offset + offset
+        return self._data[start:start + length].decode('utf-8')
+
+    def _record(self, index: int) -> Tuple[int, int, int, int]:
+        return SKILL_RECORD.unpack_from(self._data, self._skills_offset + index * SKILL_RECORD.size)
+
+    def _find(self, key: str) -> Optional[int]:
+        """Record index stored for a key, PREFIX_ONLY for a bare prefix, None if absent; see SLOT_RECORD"""
+        record = self._probes.get(key, _UNSEEN)
+        if record is _UNSEEN:
+            record = self._probe(key)
+            if len(self._probes) >= PROBE_CACHE_SIZE:
+                self._probes.clear()
+            self._probes[key] = record
+        return record
+
+    def _probe(self, key: str) -> Optional[int]:
+        """Look a key up in the mapped hash table"""
+        encoded = key.encode('utf-8')
+        key_hash = zlib.crc32(encoded)
+        data = self._data
+        slot = key_hash & self._slot_mask
+        while True:
+            slot_hash, offset, length, record = SLOT_RECORD.unpack_from(data, self._slots_offset + slot * SLOT_RECORD.size)
+            if not length:
+                return None
+            if slot_hash == key_hash and length == len(encoded):
+                start = self._blob_offset + offset
+                if data[start:start + length] == encoded:
+                    return record
+            slot = (slot + 1) & self._slot_mask
+
+    def _index_of(self, skill_id: int) -> Optional[int]:
+        """Record index of a skill id, by binary search over the id-sorted skill table"""
+        low, high = 0, self.skill_count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            current = self._record(middle)[0]
+            if current == skill_id:
+                return middle
+            if current < skill_id:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def __len__(self) -> int:
+        return self.skill_count
+
+    def categories(self) -> List[str]:
+        return [self._string(*CATEGORY_RECORD.unpack_from(self._data, self._categories_offset + index * CATEGORY_RECORD.size))
+                for index in range(self.category_count)]
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Skill id of a name or synonym, written in any case or spacing; None if unknown"""
+        return self.lookup_key(phrase_key(name))
+
+    def lookup_key(self, key: str) -> Optional[int]:
+        """Skill id stored under a ``phrase_key``; None if unknown"""
+        record = self._find(key) if key else None
+        if record is None or record == PREFIX_ONLY:
+            return None
+        if record < 0:
+            record = LOOKUP_ONLY - record
+        return self._record(record)[0]
+
+    def name(self, skill_id: int) -> Optional[str]:
+        """Canonical name of a skill id; None if the id is not in this taxonomy"""
+        index = self._index_of(skill_id)
+        if index is None:
+            return None
+        _, offset, length, _ = self._record(index)
+        return self._string(offset, length)
+
+    def category_of(self, skill_id: int) -> str:
+        """Category of a skill id; 'other' if the id is not in this taxonomy"""
+        index = self._index_of(skill_id)
+        if index is None:
+            return 'other'
+        category = self._record(index)[3]
+        return self._string(*CATEGORY_RECORD.unpack_from(self._data, self._categories_offset + category * CATEGORY_RECORD.size))
+
+    def canonical(self, name: str) -> Optional[str]:
+        """Canonical name of a name or synonym; None if unknown"""
+        skill_id = self.lookup(name)
+        return None if skill_id is None else self.name(skill_id)
+
+    def category(self, name: str) -> str:
+        """Category of a name or synonym; 'other' if unknown"""
+        skill_id = self.lookup(name)
+        return 'other' if skill_id is None else self.category_of(skill_id)
+
+    def match(self, tokens: List[Tuple[str, int, int]], ambiguous: bool = False) -> Iterator[Tuple[int, int, int]]:
+        """Skill id, start and end offset of every taxonomy phrase in a tokenized text, left to right.
+
+        The bare names of ambiguous skills only match with ``ambiguous``, for
+        text known to list skills; free text finds them by their synonyms.
+        """
+        position = 0
+        count = len(tokens)
+        while position < count:
+            found = None
+            key = tokens[position][0]
+            cursor = position
+            while True:
+                record = self._find(key)
+                if record is None:
+                    break
+                if record >= 0:
+                    found = (record, cursor)
+                elif ambiguous and record != PREFIX_ONLY:
+                    found = (LOOKUP_ONLY - record, cursor)
+                cursor += 1
+                if cursor == count or cursor - position == self.max_phrase_tokens:
+                    break
+                key = f"{key} {tokens[cursor][0]}"
+
+            if found is None:
+                position += 1
+            else:
+                record, last = found
+                yield self._record(record)[0], tokens[position][1], tokens[last][2]
+                position = last + 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'revision': self.revision,
+            'skills': self.skill_count,
+            'categories': self.category_count,
+            'job_categories': len(self.job_categories),
+            'bytes': len(self._data),
+            'path': self.path
+        }
+
+
+def _artefact_is_current(source_path: str, artefact_path: str) -> bool:
+    """Whether the artefact exists and was compiled from the current source file"""
+    try:
+        with open(artefact_path, 'rb') as f:
+            header = f.read(HEADER.size)
+        with open(source_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).digest()[:16]
+    except FileNotFoundError:
+        return False
+    if len(header) < HEADER.size:
+        return False
+    magic, format_version, _, _, artefact_digest = HEADER.unpack_from(header)[:5]
+    return magic == MAGIC and format_version == FORMAT_VERSION and artefact_digest == digest
+
+
+# Process-wide shared taxonomy, swapped when the artefact file changes
+_taxonomy: Optional[SkillTaxonomy] = None
+_taxonomy_lock = threading.Lock()
+_next_check = 0.0
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """Return the shared taxonomy, mapping the artefact on first use.
+
+    The artefact is compiled from the source if missing or stale. At most every
+    SKILL_TAXONOMY_RELOAD_SECONDS the artefact file is checked, and a
+    recompiled one is mapped in its place. Callers that already hold the old
+    taxonomy keep a consistent view of it.
+    """
+    global _taxonomy, _next_check
+    if _taxonomy is not None and time.monotonic() < _next_check:
+        return _taxonomy
+
+    with _taxonomy_lock:
+        if _taxonomy is None:
+            if not _artefact_is_current(SKILL_TAXONOMY_PATH, SKILL_TAXONOMY_ARTEFACT_PATH):
+                compile_taxonomy()
+            _taxonomy = SkillTaxonomy()
+            logger.info(f"Mapped skill taxonomy {_taxonomy.revision} with {len(_taxonomy)} skills")
+        elif time.monotonic() >= _next_check:
+            _reload_if_changed()
+        _next_check = time.monotonic() + SKILL_TAXONOMY_RELOAD_SECONDS
+    return _taxonomy
+
+
+def _reload_if_changed():
+    """Map the artefact again if the file was replaced; a broken file leaves the current one in use"""
+    global _taxonomy
+    try:
+        stat = os.stat(SKILL_TAXONOMY_ARTEFACT_PATH)
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == _taxonomy.file_id:
+            return
+        taxonomy = SkillTaxonomy()
+    except Exception as e:
+        logger.error(f"Error reloading skill taxonomy: {e}")
+        return
+    logger.info(f"Skill taxonomy reloaded: {_taxonomy.revision} -> {taxonomy.revision}")
+    _taxonomy = taxonomy
+
+
+def reload_skill_taxonomy() -> Dict[str, Any]:
+    """Recompile the source file and map the result in this process; other processes follow on their next check"""
+    global _next_check
+    compiled = compile_taxonomy()
+    _next_check = 0.0
+    taxonomy = get_skill_taxonomy()
+    return {**compiled, 'revision': taxonomy.revision}
+
+
+def skill_id(name: str) -> int:
+    """Integer id of a skill name: its taxonomy id, or a stable hash of the normalised name for skills outside it"""
+    key = phrase_key(name or '') or (name or '').strip().lower()
+    known = get_skill_taxonomy().lookup_key(key)
+    if known is not None:
+        return known
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=6).digest()
+    return HASHED_SKILL_ID_BASE + int.from_bytes(digest, 'little')
+
+
+def skill_ids(names: List[str]) -> List[int]:
+    """``skill_id`` of every name, in order, so ids can be stored alongside their names"""
+    return [skill_id(name) for name in names]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    json.dump(compile_taxonomy(), sys.stdout, indent=2)
+    print()
@@ -0,0 +1,117 @@
+"""
+Shared test fixtures
+
+``db`` is an in-memory stand-in for the Motor database, built on mongomock;
+tests that use it are skipped where mongomock is not installed.
+"""
+
+import sys
+import os
+
+import pytest
+from pymongo import InsertOne, UpdateOne, DeleteMany
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+# A demo script run directly (python test_system.py), not a test module
+collect_ignore = ['test_system.py']
+
+
+class AsyncCursor:
+    """Motor-style cursor over a mongomock cursor"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count):
+        self.cursor = self.cursor.skip(count)
+        return self
+
+    def limit(self, count):
+        self.cursor = self.cursor.limit(count)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def to_list(self, length=None):
+        documents = list(self.cursor)
+        return documents if length is None else documents[:length]
+
+    def __aiter__(self):
+        self.iterator = iter(self.cursor)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class BulkWriteResult:
+    def __init__(self):
+        self.inserted_count = self.upserted_count = self.matched_count = self.modified_count = self.deleted_count = 0
+
+
+class AsyncCollection:
+    """Motor-style collection: mongomock calls made awaitable"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self.collection.find(*args, **kwargs))
+
+    def aggregate(self, pipeline, **kwargs):
+        return AsyncCursor(self.collection.aggregate(pipeline))
+
+    async def bulk_write(self, operations, ordered=True):
+        result = BulkWriteResult()
+        for operation in operations:
+            if isinstance(operation, InsertOne):
+                self.collection.insert_one(dict(operation._doc))
+                result.inserted_count += 1
+            elif isinstance(operation, UpdateOne):
+                update = self.collection.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+                result.matched_count += update.matched_count
+                result.modified_count += update.modified_count
+                result.upserted_count += update.upserted_id is not None
+            elif isinstance(operation, DeleteMany):
+                result.deleted_count += self.collection.delete_many(operation._filter).deleted_count
+        return result
+
+    def __getattr__(self, name):
+        attribute = getattr(self.collection, name)
+        if not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            return attribute(*args, **kwargs)
+        return call
+
+
+class AsyncDatabase:
+    def __init__(self, database):
+        self.database = database
+
+    def __getattr__(self, name):
+        return AsyncCollection(self.database[name])
+
+    def __getitem__(self, name):
+        return AsyncCollection(self.database[name])
+
+
+@pytest.fixture
+def db():
+    mongomock = pytest.importorskip('mongomock')
+    from match_index import job_index, volunteer_index
+    # The shared indexes would take a fresh database with the same counts for the last one
+    job_index.invalidate()
+    volunteer_index.invalidate()
+    return AsyncDatabase(mongomock.MongoClient().db)
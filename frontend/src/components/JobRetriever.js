@@ -56,10 +56,16 @@ const JobRetriever = () => {
       const response = await axios.post(`${API_BASE_URL}/api/jobs/retrieve`, {
         limit: 50,
       });
-      setResult(response.data);
+      // The retrieval runs in the background; poll its status until it finishes
+      let status;
+      do {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        status = (await axios.get(`${API_BASE_URL}${response.data.status_url}`)).data;
+      } while (status.triggered);
+      setResult(status.last_result);
       // Refresh counts after retrieval
       getJobsCount();
-      console.log("Job retrieval result:", response.data);
+      console.log("Job retrieval result:", status.last_result);
     } catch (err) {
       setError(err.response?.data?.detail || err.message || "Failed to retrieve jobs");
       console.error("Error retrieving jobs:", err);
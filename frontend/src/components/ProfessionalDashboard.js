@@ -126,10 +126,17 @@ const ProfessionalDashboard = () => {
         limit: 50
       });
       
-      if (response.data.success) {
+      // The retrieval runs in the background; poll its status until it finishes
+      let status;
+      do {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        status = (await axios.get(`${API_BASE_URL}${response.data.status_url}`)).data;
+      } while (status.triggered);
+      
+      if (status.last_result?.success) {
         await fetchJobs();
       } else {
-        setError(response.data.message || 'Failed to retrieve jobs');
+        setError(status.last_result?.message || 'Failed to retrieve jobs');
       }
     } catch (err) {
       setError(err.response?.data?.detail || err.message || 'Failed to retrieve jobs');
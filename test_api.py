@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+API endpoint tests: HTTP errors keep their status through the endpoint's error handling
+
+    python -m pytest -q test_api.py
+"""
+
+import asyncio
+import sys
+import os
+
+import pytest
+from fastapi import HTTPException
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import main
+
+
+def test_missing_profile_is_404(monkeypatch):
+    async def get_profile(profile_id):
+        return None
+
+    monkeypatch.setattr(main.volunteer_service, 'get_profile', get_profile)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.get_volunteer_profile('missing'))
+    assert error.value.status_code == 404
+    assert error.value.detail == "Profile not found"
+
+
+def test_failed_volunteer_ranking_keeps_its_detail(monkeypatch):
+    async def find_volunteers_for_job(job_id, top_k=50):
+        return {'success': False, 'matches': [], 'total_matches': 0}
+
+    monkeypatch.setattr(main.volunteer_service, 'find_volunteers_for_job', find_volunteers_for_job)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.get_volunteer_matches('job'))
+    assert error.value.status_code == 500
+    assert error.value.detail == "Failed to find volunteers"
+
+
+def test_shutdown_awaits_the_cancelled_search_backfill(monkeypatch):
+    backfill = {}
+
+    async def backfill_search_tokens():
+        backfill['started'] = True
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            backfill['cancelled'] = True
+            raise
+
+    async def noop(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(main, 'connect_to_mongo', noop)
+    monkeypatch.setattr(main, 'close_mongo_connection', noop)
+    monkeypatch.setattr(main, 'ensure_indexes', noop)
+    monkeypatch.setattr(main.job_service, 'backfill_search_tokens', backfill_search_tokens)
+    monkeypatch.setattr(main.job_refresh_scheduler, 'enabled', False)
+    monkeypatch.setattr(main.cv_extraction_pool, 'shutdown', lambda: None)
+    monkeypatch.setattr(main.bulk_import_service, 'close', lambda: None)
+
+    async def scenario():
+        async with main.lifespan(main.app):
+            await asyncio.sleep(0)
+        # Cancelled and finished by the time shutdown returns
+        assert backfill == {'started': True, 'cancelled': True}
+    asyncio.run(scenario())
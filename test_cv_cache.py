@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Processed CV cache tests: hits, misses and least recently used eviction
+
+    python -m pytest -q test_cv_cache.py
+"""
+
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from models import Skill, SkillLevel
+from services import cv_cache as cv_cache_module
+from services.cv_cache import CVCache
+
+
+class Clock:
+    """``datetime`` stand-in whose utcnow advances a second per call, so use order is never a tie"""
+
+    def __init__(self):
+        self.now = datetime(2025, 1, 1)
+
+    def utcnow(self):
+        self.now += timedelta(seconds=1)
+        return self.now
+
+
+def processed_cv(name):
+    return {'cv_text': f'{name} CV', 'skills': [Skill(name=name, level=SkillLevel.ADVANCED, years_experience=3)],
+            'skill_count': 1, 'categories_found': ['programming'], 'contact_info': {}, 'experience_summary': '',
+            'profile_id': 'not cached'}
+
+
+@pytest.fixture
+def cache(db, monkeypatch):
+    monkeypatch.setattr(cv_cache_module, 'datetime', Clock())
+    cache = CVCache(enabled=True, max_entries=3)
+    cache.db = db
+    return cache
+
+
+def test_cached_result_round_trips(cache):
+    async def scenario():
+        key = cache.key('abc', 'cv.pdf')
+        assert await cache.get(key) is None
+        await cache.put(key, processed_cv('Python'))
+        result = await cache.get(key)
+        assert result['skills'] == processed_cv('Python')['skills']
+        assert result['cv_text'] == 'Python CV' and 'profile_id' not in result
+        metrics = cache.get_metrics()
+        assert (metrics['hits'], metrics['misses'], metrics['stores']) == (1, 1, 1)
+    asyncio.run(scenario())
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    async def scenario():
+        for name in ('a', 'b', 'c'):
+            await cache.put(name, processed_cv(name))
+        # Reading "a" makes "b" the least recently used
+        assert await cache.get('a') is not None
+        await cache.put('d', processed_cv('d'))
+        assert await cache.get('b') is None
+        for name in ('a', 'c', 'd'):
+            assert await cache.get(name) is not None
+        assert cache.get_metrics()['evictions'] == 1
+        assert await cache.db.cv_cache.count_documents({}) == 3
+    asyncio.run(scenario())
+
+
+def test_key_depends_on_format_and_content():
+    cache = CVCache(enabled=True)
+    assert cache.key('abc', 'cv.pdf') == cache.key('abc', 'other.PDF')
+    assert cache.key('abc', 'cv.pdf') != cache.key('abc', 'cv.docx')
+    assert cache.key('abc', 'cv.pdf') != cache.key('abd', 'cv.pdf')
+
+
+def test_disabled_cache_stores_nothing(cache):
+    async def scenario():
+        cache.enabled = False
+        await cache.put('a', processed_cv('a'))
+        assert await cache.get('a') is None
+        assert await cache.db.cv_cache.count_documents({}) == 0
+        assert cache.get_metrics()['misses'] == 0
+    asyncio.run(scenario())
+
+
+def test_cache_failures_are_counted_not_raised():
+    async def failing(*args, **kwargs):
+        raise ConnectionError('database unavailable')
+
+    cache = CVCache(enabled=True)
+    cache.db = SimpleNamespace(cv_cache=SimpleNamespace(find_one_and_update=failing, replace_one=failing))
+
+    async def scenario():
+        await cache.put('a', processed_cv('a'))
+        assert await cache.get('a') is None
+        assert cache.get_metrics()['errors'] == 2
+    asyncio.run(scenario())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Job ingestion tests: resumable crawls, the transform pool and triggered refreshes
+
+    python -m pytest -q test_job_ingestion.py
+"""
+
+import asyncio
+import sys
+import os
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from services import job_scheduler as job_scheduler_module
+from services import job_service as job_service_module
+from services.job_scheduler import JobRefreshScheduler
+from services.job_service import JobService, INGEST_STATE_ID
+
+PAGE_SIZE = 10
+
+
+class StateCollection:
+    """pipeline_state stand-in holding documents by _id"""
+
+    def __init__(self, documents=None):
+        self.documents = {document['_id']: dict(document) for document in documents or []}
+
+    async def find_one(self, query, projection=None):
+        document = self.documents.get(query['_id'])
+        return dict(document) if document else None
+
+    async def update_one(self, query, update, upsert=False):
+        self.documents.setdefault(query['_id'], {'_id': query['_id']}).update(update['$set'])
+
+
+class PagedJobService(JobService):
+    """JobService over a fake API of ``total`` jobs in pages of PAGE_SIZE, failing at ``fail_page``"""
+
+    def __init__(self, total, checkpoint=None, fail_page=None):
+        super().__init__()
+        self.total = total
+        self.fail_page = fail_page
+        self.fetched_pages = []
+        self.stored = []
+        self.db = SimpleNamespace(pipeline_state=StateCollection([checkpoint] if checkpoint else []))
+
+    async def iter_job_pages(self, limit=100, start_page=1):
+        last_page = -(-min(limit, self.total) // PAGE_SIZE)
+        for page in range(start_page, last_page + 1):
+            if page == self.fail_page:
+                raise RuntimeError(f"page {page} unavailable")
+            self.fetched_pages.append(page)
+            first = (page - 1) * PAGE_SIZE
+            yield page, [{'id': str(i)} for i in range(first, min(first + PAGE_SIZE, self.total))]
+
+    async def transform_jobs(self, records):
+        return records, []
+
+    async def store_jobs(self, jobs):
+        self.stored.extend(job['id'] for job in jobs)
+        return {'stored': len(jobs), 'updated': 0, 'unchanged': 0, 'duplicates': 0}
+
+    @property
+    def checkpoint(self):
+        return self.db.pipeline_state.documents.get(INGEST_STATE_ID)
+
+
+def failed_checkpoint(limit, next_page):
+    retrieved = (next_page - 1) * PAGE_SIZE
+    return {
+        '_id': INGEST_STATE_ID, 'status': 'failed', 'limit': limit, 'next_page': next_page,
+        'pages_processed': next_page - 1, 'jobs_retrieved': retrieved, 'jobs_stored': retrieved,
+        'jobs_updated': 0, 'jobs_unchanged': 0, 'errors': 0
+    }
+
+
+def test_failed_run_resumes_from_its_checkpoint():
+    service = PagedJobService(total=50, fail_page=3)
+    result = asyncio.run(service.retrieve_and_store_jobs(limit=50))
+    assert not result['success']
+    assert service.checkpoint['status'] == 'failed'
+    assert service.checkpoint['next_page'] == 3
+
+    service.fail_page = None
+    result = asyncio.run(service.retrieve_and_store_jobs(limit=50))
+    assert result['success']
+    assert result['resumed_from_page'] == 3
+    assert result['jobs_retrieved'] == 50
+    assert service.fetched_pages == [1, 2, 3, 4, 5]
+    assert service.checkpoint['status'] == 'completed'
+
+
+def test_run_with_another_limit_leaves_unfinished_checkpoint_alone():
+    crawl = failed_checkpoint(limit=5000, next_page=40)
+    service = PagedJobService(total=5000, checkpoint=crawl)
+    result = asyncio.run(service.retrieve_and_store_jobs(limit=100))
+
+    assert result['success']
+    assert result['resumed_from_page'] is None
+    assert result['jobs_retrieved'] == 100
+    assert service.fetched_pages == list(range(1, 11))
+    assert service.checkpoint == crawl
+
+    # The crawl still resumes where it stopped
+    service.fetched_pages = []
+    result = asyncio.run(service.retrieve_and_store_jobs(limit=5000))
+    assert result['resumed_from_page'] == 40
+    assert service.fetched_pages[0] == 40
+    assert result['jobs_retrieved'] == 5000
+
+
+def test_resume_disabled_starts_over():
+    service = PagedJobService(total=30, checkpoint=failed_checkpoint(limit=30, next_page=2))
+    result = asyncio.run(service.retrieve_and_store_jobs(limit=30, resume=False))
+    assert result['resumed_from_page'] is None
+    assert service.fetched_pages == [1, 2, 3]
+    assert service.checkpoint['status'] == 'completed'
+    assert service.checkpoint['jobs_retrieved'] == 30
+
+
+def test_transform_pool_matches_in_process_transform(monkeypatch):
+    monkeypatch.setattr(job_service_module, 'JOB_TRANSFORM_POOL_MIN_RECORDS', 1)
+    records = [{'id': i, 'title': f'Role {i}', 'description': 'Help out', 'skills': 'Python, Teaching'}
+               for i in range(20)] + [{'id': 'broken', 'title': None}]
+
+    async def scenario():
+        in_process = JobService(transform_workers=0)
+        pooled = JobService(transform_workers=2)
+        try:
+            expected = await in_process.transform_jobs(records)
+            jobs, errors = await pooled.transform_jobs(records)
+            # Workers start fresh rather than as forks of the server process
+            assert pooled._transform_pool._mp_context.get_start_method() == 'spawn'
+        finally:
+            await pooled.close()
+            await in_process.close()
+        generated = {'id', 'created_at', 'updated_at'}
+        assert [job.dict(exclude=generated) for job in jobs] == [job.dict(exclude=generated) for job in expected[0]]
+        assert errors == expected[1]
+    asyncio.run(scenario())
+
+
+class BlockingJobService:
+    """Job service whose retrieval waits until ``release`` is set"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.calls = []
+
+    async def retrieve_and_store_jobs(self, limit, resume=True):
+        self.calls.append((limit, resume))
+        await self.release.wait()
+        return {'success': True, 'message': 'Successfully processed 5 jobs', 'jobs_retrieved': 5,
+                'jobs_stored': 0, 'jobs_updated': 0, 'errors': None}
+
+
+def test_triggered_refresh_runs_in_the_background(db, monkeypatch):
+    monkeypatch.setattr(job_scheduler_module, 'get_database', lambda: db)
+
+    async def scenario():
+        job_service = BlockingJobService()
+        scheduler = JobRefreshScheduler(job_service, enabled=False)
+        assert scheduler.trigger(25, resume=False)
+        # A second request while the first runs is refused, not queued
+        assert not scheduler.trigger(25)
+        await asyncio.sleep(0.05)
+        assert scheduler.get_status()['triggered'] and scheduler.get_status()['running']
+
+        job_service.release.set()
+        while scheduler.get_status()['triggered']:
+            await asyncio.sleep(0.01)
+        status = scheduler.get_status()
+        assert job_service.calls == [(25, False)]
+        assert status['last_result']['jobs_retrieved'] == 5 and status['runs'] == 1
+        assert status['skipped_overlaps'] == 1
+        await scheduler.stop()
+    asyncio.run(scenario())
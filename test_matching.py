@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Match scoring tests: the vectorized scorer against the scalar scoring rules
+
+    python -m pytest -q test_matching.py
+"""
+
+import asyncio
+import sys
+import os
+import itertools
+
+import numpy as np
+from bson import ObjectId
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from agents.event_matcher import EventMatcherAgent, MATCH_WEIGHTS, MATCH_PROJECTION
+from match_index import JobCatalogue, JobSkillSnapshot, VolunteerSnapshot, job_index
+
+WEEKDAYS = [{'day_of_week': day, 'status': 'available', 'start_time': '09:00', 'end_time': '17:00'} for day in range(5)]
+WEEKEND = [{'day_of_week': day, 'status': 'available', 'start_time': '10:00', 'end_time': '14:00'} for day in (5, 6)]
+
+JOBS = [
+    {'title': 'Python tutor', 'description': 'Teach kids to code', 'organization': 'Code Club',
+     'skills_required': ['Python', 'Teaching'], 'location': 'London', 'time_commitment': 'Part-time, flexible'},
+    {'title': 'Garden helper', 'description': 'Community garden ' + 'weeding ' * 3000, 'organization': 'Green Town',
+     'skills_required': [], 'location': 'London, UK', 'time_commitment': 'Weekend'},
+    {'title': 'Hospital driver', 'description': 'Drive patients', 'organization': 'NHS',
+     'skills_required': ['Driving'], 'location': None, 'time_commitment': 'Full-time'},
+    {'title': 'Fundraiser', 'description': 'Charity events', 'organization': 'Food Bank',
+     'skills_required': ['Fundraising', 'Event Planning'], 'location': 'Manchester', 'time_commitment': None},
+]
+
+VOLUNTEERS = [
+    {'skills': [{'name': 'Python'}, {'name': 'Teaching'}], 'location': 'London',
+     'availability': WEEKDAYS, 'interests': ['teach', 'code']},
+    {'skills': [], 'location': 'london', 'availability': WEEKEND, 'interests': ['garden', 'Community']},
+    {'skills': [{'name': 'Driving'}], 'location': None, 'availability': [], 'interests': []},
+    {'skills': [{'name': 'Event Planning'}], 'location': 'Greater Manchester',
+     'availability': {'type': 'monthly', 'hoursPerWeek': 20, 'preferredDays': 'weekends'}, 'interests': ['charity']},
+]
+
+
+def with_ids(documents):
+    return [{'_id': ObjectId(), **document} for document in documents]
+
+
+def score(volunteers, jobs):
+    agent = EventMatcherAgent()
+    catalogue = JobCatalogue(jobs)
+    snapshot = VolunteerSnapshot(volunteers, agent._calculate_availability_match, catalogue.index)
+    return agent, catalogue, agent._score_matrix(snapshot, catalogue)
+
+
+def test_component_scores_match_scalar_rules():
+    volunteers, jobs = with_ids(VOLUNTEERS), with_ids(JOBS)
+    agent, _, scores = score(volunteers, jobs)
+    for (row, volunteer), (column, job) in itertools.product(enumerate(volunteers), enumerate(jobs)):
+        assert scores['location_score'][row, column] == agent._calculate_location_match(volunteer['location'], job['location'])
+        assert scores['availability_score'][row, column] == agent._calculate_availability_match(volunteer['availability'], job)
+        assert scores['interest_score'][row, column] == agent._calculate_interest_match(volunteer['interests'], job)
+
+
+def test_total_is_weighted_sum_of_components():
+    _, _, scores = score(with_ids(VOLUNTEERS), with_ids(JOBS))
+    expected = sum(scores[name] * weight for name, weight in MATCH_WEIGHTS.items())
+    assert np.allclose(scores['total_score'], expected)
+    assert scores['total_score'].shape == (len(VOLUNTEERS), len(JOBS))
+
+
+def test_skill_score_rules():
+    volunteers, jobs = with_ids(VOLUNTEERS), with_ids(JOBS)
+    _, _, scores = score(volunteers, jobs)
+    skill = scores['skill_score']
+    # Jobs without requirements score 0.8, volunteers without skills 0.2
+    assert np.all(skill[:, 1] == 0.8)
+    assert skill[1, 0] == 0.2
+    # Identical skill sets score in full; a disjoint one does not
+    assert np.isclose(skill[0, 0], 1.0)
+    assert np.isclose(skill[2, 2], 1.0)
+    assert skill[2, 0] == 0.0
+    # Half the requirements by id and text
+    assert 0.0 < skill[3, 3] < 1.0
+
+
+def test_jobs_outside_the_snapshot_are_projected_into_it():
+    jobs = with_ids(JOBS)
+    agent = EventMatcherAgent()
+    volunteers = with_ids(VOLUNTEERS)
+    indexed = JobSkillSnapshot(jobs[:2])
+    catalogue = JobCatalogue(jobs, indexed)
+    full = JobCatalogue(jobs, JobSkillSnapshot(jobs))
+    assert catalogue.job_matrix.shape[0] == len(jobs)
+
+    snapshot = VolunteerSnapshot(volunteers, agent._calculate_availability_match, indexed)
+    scores = agent._score_matrix(snapshot, catalogue)
+    # Same components apart from skills, which live in the smaller snapshot's space
+    full_scores = agent._score_matrix(VolunteerSnapshot(volunteers, agent._calculate_availability_match, full.index), full)
+    for name in ('location_score', 'availability_score', 'interest_score'):
+        assert np.array_equal(scores[name], full_scores[name])
+
+
+def test_subset_keeps_rows_aligned():
+    volunteers, jobs = with_ids(VOLUNTEERS), with_ids(JOBS)
+    agent, catalogue, scores = score(volunteers, jobs)
+    rows = [3, 1]
+    subset = catalogue.subset(rows)
+    assert subset.job_ids == [jobs[row]['_id'] for row in rows]
+    snapshot = VolunteerSnapshot(volunteers, agent._calculate_availability_match, catalogue.index)
+    subset_scores = agent._score_matrix(snapshot, subset)
+    for name, values in scores.items():
+        assert np.allclose(subset_scores[name], values[:, rows])
+
+
+def test_interest_texts_are_not_padded():
+    catalogue = JobCatalogue(with_ids(JOBS))
+    # Plain strings, not a fixed-width array sized by the longest description
+    assert all(isinstance(text, str) for text in catalogue.interest_texts)
+    assert len(catalogue.interest_texts[0]) < 100
+    assert len(catalogue.subset([0]).interest_texts[0]) < 100
+
+
+def test_malformed_profile_scores_zero_without_failing_the_batch():
+    volunteers = with_ids(VOLUNTEERS)
+    malformed = with_ids([
+        {'availability': [{'status': 'available', 'start_time': 'nine', 'end_time': '17:00'}]},
+        {'skills': [{'name': None}]},
+        {'interests': [42]},
+    ])
+    agent, catalogue, scores = score(volunteers[:1] + malformed + volunteers[1:], with_ids(JOBS))
+    _, _, expected = score(volunteers, with_ids(JOBS))
+    assert np.all(scores['total_score'][1:4] == 0.0)
+    assert np.allclose(np.delete(scores['total_score'], [1, 2, 3], axis=0), expected['total_score'])
+
+
+def test_rank_volunteers_skips_malformed_profiles(db):
+    async def scenario():
+        job = with_ids(JOBS[:1])[0]
+        await db.volunteer_jobs.insert_one(job)
+        profiles = with_ids(VOLUNTEERS)
+        profiles.insert(1, {'_id': ObjectId(), 'availability': [{'status': 'available', 'start_time': '9am', 'end_time': '5pm'}]})
+        for i, profile in enumerate(profiles):
+            profile['volunteer_id'] = f'volunteer-{i}'
+        await db.volunteer_profiles.insert_many(profiles)
+
+        agent = EventMatcherAgent()
+        agent.db = db
+        result = await agent.rank_volunteers(str(job['_id']))
+        ranked = [match['volunteer_id'] for match in result['matches']]
+        assert result['total'] == len(VOLUNTEERS)
+        assert 'volunteer-1' not in ranked
+        assert ranked[0] == 'volunteer-0'
+    asyncio.run(scenario())
+
+
+def test_streamed_top_k_equals_a_stable_sort_of_every_job(db):
+    async def scenario():
+        # Repeated jobs make ties, which must keep the job seen first
+        await db.volunteer_jobs.insert_many(with_ids(JOBS * 5))
+        volunteer = {**with_ids(VOLUNTEERS[:1])[0], 'volunteer_id': 'volunteer-0'}
+        await db.volunteer_profiles.insert_one(volunteer)
+
+        agent = EventMatcherAgent()
+        agent.db = db
+        jobs = await db.volunteer_jobs.find({}, MATCH_PROJECTION).to_list(length=None)
+        await job_index.ensure_fresh(db)
+        snapshot = job_index.snapshot
+        totals = agent._score_matrix(VolunteerSnapshot([volunteer], agent._calculate_availability_match, snapshot),
+                                     JobCatalogue(jobs, snapshot))['total_score'][0]
+        passing = np.flatnonzero(totals > 0.1)
+        ranked = [jobs[i]['_id'] for i in passing[np.argsort(-totals[passing], kind='stable')]]
+
+        for top_k, batch_size in itertools.product([1, 3, 7, 50], [1, 4, 6, 100]):
+            result = await agent.process('volunteer-0', top_k=top_k, batch_size=batch_size)
+            assert result['total'] == len(passing)
+            assert [ObjectId(match['job']['_id']) for match in result['matches']] == ranked[:top_k]
+            assert [match['match_score'] for match in result['matches']] == \
+                   sorted((float(totals[i]) for i in passing), reverse=True)[:top_k]
+    asyncio.run(scenario())
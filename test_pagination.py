@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Cursor pagination tests: keyset pages walk a listing once, in order
+
+    python -m pytest -q test_pagination.py
+"""
+
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from pagination import fetch_page, keyset_query, encode_offset_cursor, decode_offset_cursor, count_total
+
+START = datetime(2025, 1, 1)
+
+
+def listing():
+    # Runs of equal timestamps, and documents stored without one
+    return [{'_id': ObjectId(), 'n': i, 'created_at': START + timedelta(minutes=i // 3) if i < 10 else None}
+            for i in range(13)]
+
+
+async def walk(collection, query, limit):
+    pages, cursor = [], None
+    while True:
+        docs, cursor = await fetch_page(collection, query, limit, cursor)
+        pages.append([doc['n'] for doc in docs])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 5, 13, 20])
+def test_pages_cover_the_listing_once_in_order(db, limit):
+    async def scenario():
+        docs = listing()
+        await db.jobs.insert_many(docs)
+        pages = await walk(db.jobs, {}, limit)
+        expected = sorted(docs, key=lambda doc: (doc['created_at'] or datetime.min, doc['_id']), reverse=True)
+        assert [n for page in pages for n in page] == [doc['n'] for doc in expected]
+        assert all(len(page) == limit for page in pages[:-1])
+        assert 0 < len(pages[-1]) <= limit
+    asyncio.run(scenario())
+
+
+def test_pages_keep_the_filter(db):
+    async def scenario():
+        await db.jobs.insert_many(listing())
+        query = {'n': {'$in': [1, 4, 5, 11, 12]}}
+        pages = await walk(db.jobs, query, 2)
+        assert sorted(n for page in pages for n in page) == [1, 4, 5, 11, 12]
+        assert await count_total(db.jobs, query) == 5
+        assert await count_total(db.jobs, {}) == 13
+    asyncio.run(scenario())
+
+
+def test_documents_stored_after_the_first_page_do_not_shift_later_pages(db):
+    async def scenario():
+        docs = listing()[:10]
+        await db.jobs.insert_many(docs)
+        first, cursor = await fetch_page(db.jobs, {}, 4)
+        # A newer job arrives while the user reads the first page
+        await db.jobs.insert_one({'_id': ObjectId(), 'n': 99, 'created_at': START + timedelta(days=1)})
+        rest, _ = await fetch_page(db.jobs, {}, 10, cursor)
+        assert sorted(doc['n'] for doc in first + rest) == list(range(10))
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize('cursor', ['not a cursor', encode_offset_cursor(3), 'W10'])
+def test_invalid_keyset_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        keyset_query({}, cursor)
+
+
+def test_offset_cursor_round_trip():
+    assert decode_offset_cursor(None) == 0
+    assert decode_offset_cursor(encode_offset_cursor(40)) == 40
+    with pytest.raises(ValueError):
+        decode_offset_cursor(encode_offset_cursor(-1))
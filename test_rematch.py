@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Materialized match tests: stored matches agree with live matching
+
+    python -m pytest -q test_rematch.py
+"""
+
+import asyncio
+import sys
+import os
+from datetime import datetime
+
+from bson import ObjectId
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from agents.event_matcher import EventMatcherAgent
+from match_index import JobCatalogue
+from services import rematch_service as rematch_module
+from services.rematch_service import RematchService
+
+LOCATIONS = ['London', 'Manchester', 'Leeds', None]
+SKILLS = [['Python', 'Teaching'], ['Driving'], ['Fundraising', 'Event Planning'], [], ['Cooking'], ['Python']]
+COMMITMENTS = ['Part-time', 'Weekend', 'Full-time', None]
+LONG_AGO = datetime(2024, 1, 1)
+
+
+def job(i, updated_at=LONG_AGO):
+    return {
+        '_id': ObjectId(), 'title': f'Role {i}', 'description': f'Help the community garden {i}',
+        'organization': f'Org {i % 3}', 'skills_required': SKILLS[i % len(SKILLS)],
+        'location': LOCATIONS[i % len(LOCATIONS)], 'time_commitment': COMMITMENTS[i % len(COMMITMENTS)],
+        'created_at': updated_at, 'updated_at': updated_at
+    }
+
+
+def profile(i):
+    return {
+        '_id': ObjectId(), 'volunteer_id': f'volunteer-{i}',
+        'skills': [{'name': name} for name in SKILLS[(i + 1) % len(SKILLS)]],
+        'location': LOCATIONS[(i + 2) % len(LOCATIONS)],
+        'availability': [{'day_of_week': day, 'status': 'available'} for day in range(i % 7)],
+        'interests': ['garden'] if i % 2 else [],
+        'updated_at': LONG_AGO
+    }
+
+
+async def seed(db, jobs=12, profiles=6):
+    await db.volunteer_jobs.insert_many([job(i) for i in range(jobs)])
+    await db.volunteer_profiles.insert_many([profile(i) for i in range(profiles)])
+
+
+def rematch_service(db, top_n=5):
+    service = RematchService(top_n=top_n, chunk_size=2, workers=1)
+    service.db = db
+    return service
+
+
+async def assert_materialized_matches_live(db, service, limit=5, tolerance=0.0, skip=()):
+    """Stored matches and totals agree with live matching.
+
+    After an incremental run, pairs that were not rescored keep the scores of
+    the previous TF-IDF fit, so scores may drift by ``tolerance`` (more so in
+    a corpus this small) and near-ties may swap; totals still agree exactly.
+    """
+    matcher = EventMatcherAgent()
+    matcher.db = db
+    async for stored_profile in db.volunteer_profiles.find({}, {'volunteer_id': 1}):
+        volunteer_id = stored_profile['volunteer_id']
+        if volunteer_id in skip:
+            continue
+        materialized = await service.get_materialized_matches(volunteer_id, limit=limit)
+        live = await matcher.process(volunteer_id, top_k=1000)
+        assert materialized is not None
+        assert materialized['total'] == live['total']
+        live_scores = {match['job']['_id']: match['match_score'] for match in live['matches']}
+        for stored in materialized['matches']:
+            assert abs(stored['match_score'] - live_scores[stored['job']['_id']]) <= tolerance + 1e-9
+        if not tolerance:
+            assert [match['job']['_id'] for match in materialized['matches']] == \
+                   [match['job']['_id'] for match in live['matches'][:limit]]
+
+
+def test_full_rematch_matches_live_matching(db):
+    async def scenario():
+        await seed(db)
+        service = rematch_service(db)
+        result = await service.run(full=True)
+        assert result['success'] and result['volunteers_rescored'] == 6
+        await assert_materialized_matches_live(db, service)
+    asyncio.run(scenario())
+
+
+def test_changed_jobs_fall_back_to_live_matching_until_rematched(db):
+    async def scenario():
+        await seed(db)
+        service = rematch_service(db)
+        await service.run(full=True)
+
+        # A job stored after the run: stored matches no longer cover it
+        await db.volunteer_jobs.insert_one(job(99, updated_at=datetime.utcnow()))
+        assert await service.get_materialized_matches('volunteer-0') is None
+
+        result = await service.run()
+        assert result['success'] and not result['full']
+        await assert_materialized_matches_live(db, service, tolerance=0.05)
+    asyncio.run(scenario())
+
+
+def test_incremental_rematch_of_updated_jobs_keeps_totals(db):
+    async def scenario():
+        await seed(db)
+        service = rematch_service(db, top_n=20)
+        await service.run(full=True)
+
+        # An existing job changes its requirements and location
+        changed = await db.volunteer_jobs.find_one({'title': 'Role 1'})
+        await db.volunteer_jobs.update_one({'_id': changed['_id']}, {'$set': {
+            'skills_required': ['Python'], 'location': 'London', 'updated_at': datetime.utcnow()
+        }})
+        result = await service.run()
+        assert result['jobs_rescored'] == 1
+        await assert_materialized_matches_live(db, service, limit=20, tolerance=0.05)
+    asyncio.run(scenario())
+
+
+def test_deleted_jobs_fall_back_to_live_matching(db):
+    async def scenario():
+        await seed(db)
+        service = rematch_service(db)
+        await service.run(full=True)
+        assert await service.get_materialized_matches('volunteer-0') is not None
+
+        await db.volunteer_jobs.delete_one({'title': 'Role 0'})
+        assert await service.get_materialized_matches('volunteer-0') is None
+    asyncio.run(scenario())
+
+
+def test_overlapping_rematch_is_refused(db):
+    async def scenario():
+        await seed(db, jobs=4, profiles=2)
+        service = rematch_service(db)
+        first = asyncio.create_task(service.run(full=True))
+        await asyncio.sleep(0)
+        assert await service.run(full=True) is None
+        assert (await first)['success']
+    asyncio.run(scenario())
+
+
+def test_unreadable_profile_does_not_fail_the_rematch(db):
+    async def scenario():
+        await seed(db)
+        await db.volunteer_profiles.update_one({'volunteer_id': 'volunteer-1'}, {'$set': {
+            'availability': [{'status': 'available', 'start_time': 'nine', 'end_time': 'five'}]
+        }})
+        service = rematch_service(db)
+        result = await service.run(full=True)
+        assert result['success'] and result['volunteers_rescored'] == 6
+        assert (await db.pipeline_state.find_one({'_id': 'rematch'}))['last_run_at'] is not None
+        await assert_materialized_matches_live(db, service, skip={'volunteer-1'})
+
+        # No stored matches for the unreadable profile, and none live either
+        matcher = EventMatcherAgent()
+        matcher.db = db
+        assert await service.get_materialized_matches('volunteer-1') is None
+        assert (await matcher.process('volunteer-1'))['total'] == 0
+    asyncio.run(scenario())
+
+
+def test_failing_profile_is_skipped_within_its_block():
+    volunteers = [profile(i) for i in range(3)]
+    rematch_module._init_worker(JobCatalogue([job(i) for i in range(4)]))
+    matcher = rematch_module._worker_matcher
+    top_matches_block = matcher.top_matches_block
+
+    def failing_on_second(block, catalogue, top_n):
+        if any(volunteer is volunteers[1] for volunteer in block):
+            raise ValueError('unreadable profile')
+        return top_matches_block(block, catalogue, top_n)
+
+    matcher.top_matches_block = failing_on_second
+    results = rematch_module._score_block(volunteers, None, 5)
+    assert [result['volunteer_id'] for result in results] == [volunteers[0]['_id'], volunteers[2]['_id']]
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Skill extraction tests for ambiguous skill names
+
+    python -m pytest -q test_skill_extraction.py
+"""
+
+import asyncio
+import sys
+import os
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from agents.skill_profiler import SkillProfilerAgent
+from skill_pipeline import SkillStage
+from skill_taxonomy import get_skill_taxonomy, tokenize
+
+
+def extract_skill_names(cv_text):
+    result = asyncio.run(SkillProfilerAgent().process(cv_text))
+    return [skill.name for skill in result['skills']]
+
+
+def test_everyday_word_is_not_a_skill():
+    """ "go" the verb is not the Go language"""
+    cv_text = "Reliable volunteer, I am happy to go the extra mile for the people I support."
+    assert 'Go' not in extract_skill_names(cv_text)
+
+
+def test_ambiguous_skill_found_by_synonym():
+    cv_text = "Built delivery tracking services in golang for a food bank."
+    assert 'Go' in extract_skill_names(cv_text)
+
+
+def test_ambiguous_skill_found_in_skills_section():
+    cv_text = """
+    Developer who is happy to go the extra mile.
+
+    SKILLS
+    - Go (Intermediate, 2 years)
+    - Python
+
+    EXPERIENCE
+    Backend developer at a charity
+    """
+    names = extract_skill_names(cv_text)
+    assert 'Go' in names
+    assert 'Python' in names
+
+
+def test_ambiguous_name_still_resolves_by_lookup():
+    """Names typed into a profile or job still get their taxonomy id"""
+    taxonomy = get_skill_taxonomy()
+    assert taxonomy.canonical('Go') == 'Go'
+    assert taxonomy.lookup('go') == taxonomy.lookup('golang')
+    assert not list(taxonomy.match(tokenize("go the extra mile")))
+    assert [taxonomy.name(skill_id) for skill_id, _, _ in taxonomy.match(tokenize("go"), ambiguous=True)] == ['Go']
+
+
+def test_stage_without_extract_cannot_be_built():
+    class UnfinishedStage(SkillStage):
+        name = 'unfinished'
+
+    with pytest.raises(TypeError):
+        UnfinishedStage()
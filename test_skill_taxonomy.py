@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Skill taxonomy artefact tests: lookups and matching over the memory-mapped tables
+
+    python -m pytest -q test_skill_taxonomy.py
+"""
+
+import json
+import sys
+import os
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from skill_taxonomy import SkillTaxonomy, compile_taxonomy, tokenize, _artefact_is_current
+
+SKILLS = [
+    {'id': 1, 'name': 'Python', 'category': 'programming', 'synonyms': ['python3']},
+    {'id': 2, 'name': 'Java', 'category': 'programming'},
+    {'id': 3, 'name': 'JavaScript', 'category': 'programming', 'synonyms': ['js']},
+    {'id': 4, 'name': 'Machine Learning', 'category': 'data', 'synonyms': ['ML']},
+    {'id': 5, 'name': 'Machine Learning Operations', 'category': 'data', 'synonyms': ['mlops']},
+    {'id': 6, 'name': 'C++', 'category': 'programming'},
+    {'id': 8, 'name': 'Go', 'category': 'programming', 'synonyms': ['golang'], 'ambiguous': True},
+    {'id': 20, 'name': 'First Aid', 'synonyms': ['cpr']},
+]
+
+
+def compile_source(tmp_path, skills, version=1):
+    source = tmp_path / 'skills.json'
+    source.write_text(json.dumps({'version': version, 'job_categories': {'tech': ['software']}, 'skills': skills}))
+    artefact = tmp_path / 'skills.bin'
+    compile_taxonomy(str(source), str(artefact))
+    return str(source), str(artefact)
+
+
+@pytest.fixture
+def taxonomy(tmp_path):
+    return SkillTaxonomy(compile_source(tmp_path, SKILLS)[1])
+
+
+def matched(taxonomy, text, ambiguous=False):
+    return [(taxonomy.name(skill_id), text[start:end])
+            for skill_id, start, end in taxonomy.match(tokenize(text.lower()), ambiguous=ambiguous)]
+
+
+def test_lookup_by_name_or_synonym_in_any_case(taxonomy):
+    assert taxonomy.lookup('python') == taxonomy.lookup(' PYTHON3 ') == 1
+    assert taxonomy.lookup('machine   learning') == 4
+    assert taxonomy.canonical('golang') == 'Go'
+    assert taxonomy.lookup('Go') == 8  # Ambiguous names still resolve by lookup
+    assert taxonomy.lookup('machine') is None  # A bare prefix is not a skill
+    assert taxonomy.lookup('rust') is None and taxonomy.lookup('') is None
+
+
+def test_ids_resolve_names_and_categories(taxonomy):
+    assert len(taxonomy) == len(SKILLS)
+    assert taxonomy.name(20) == 'First Aid' and taxonomy.category_of(20) == 'other'
+    assert taxonomy.category('ml') == 'data'
+    assert taxonomy.name(7) is None and taxonomy.category_of(7) == 'other'
+    assert taxonomy.categories() == ['programming', 'data', 'other']
+    assert taxonomy.job_categories == {'tech': ['software']}
+
+
+def test_match_takes_the_longest_phrase_on_word_boundaries(taxonomy):
+    text = "Machine learning operations in Python and JavaScript, c++ and java. Machine learning too."
+    assert matched(taxonomy, text) == [
+        ('Machine Learning Operations', 'Machine learning operations'), ('Python', 'Python'),
+        ('JavaScript', 'JavaScript'), ('C++', 'c++'), ('Java', 'java'), ('Machine Learning', 'Machine learning')
+    ]
+    assert matched(taxonomy, "pythonic javas") == []
+
+
+def test_ambiguous_names_only_match_when_asked(taxonomy):
+    assert matched(taxonomy, "happy to go on, golang too") == [('Go', 'golang')]
+    assert matched(taxonomy, "go, golang", ambiguous=True) == [('Go', 'go'), ('Go', 'golang')]
+
+
+def test_every_skill_of_a_large_taxonomy_resolves(tmp_path):
+    # Enough keys for hash collisions and a deep binary search
+    skills = [{'id': 3 * i + 1, 'name': f'Skill {i}', 'category': f'category {i % 7}', 'synonyms': [f'alias{i}']}
+              for i in range(2000)]
+    taxonomy = SkillTaxonomy(compile_source(tmp_path, skills)[1])
+    for skill in skills:
+        assert taxonomy.lookup(skill['name']) == taxonomy.lookup(skill['synonyms'][0]) == skill['id']
+        assert taxonomy.name(skill['id']) == skill['name']
+        assert taxonomy.category_of(skill['id']) == skill['category']
+    assert taxonomy.name(2) is None and taxonomy.name(3 * 2000 + 1) is None
+
+
+def test_duplicate_ids_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        compile_source(tmp_path, SKILLS + [{'id': 1, 'name': 'Rust'}])
+
+
+def test_artefact_goes_stale_when_the_source_changes(tmp_path):
+    source, artefact = compile_source(tmp_path, SKILLS)
+    revision = SkillTaxonomy(artefact).revision
+    assert _artefact_is_current(source, artefact)
+
+    # An edit that forgets to bump the version still changes the revision
+    with open(source, 'w') as f:
+        json.dump({'version': 1, 'skills': SKILLS[:3]}, f)
+    assert not _artefact_is_current(source, artefact)
+    compile_taxonomy(source, artefact)
+    assert _artefact_is_current(source, artefact)
+    assert SkillTaxonomy(artefact).revision != revision